@@ -1,11 +1,48 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import companies, chat
+from .routers import companies
+
+logger = logging.getLogger(__name__)
+
+# ENABLE_CHAT=0 serves only the data API; LangChain and the OpenAI client are
+# then never imported and OPENAI_API_KEY is not needed
+chat_enabled = os.getenv("ENABLE_CHAT", "1") != "0"
+# With CHAT_WARMUP=0 the LLM stack is initialised on the first chat request
+# instead of in the background right after startup
+chat_warmup = os.getenv("CHAT_WARMUP", "1") != "0"
+
+if chat_enabled:
+    from .routers import chat
+
+async def _warm_up_chat():
+    try:
+        await asyncio.to_thread(chat.load_llm_service)
+        logger.info("Chat service initialised")
+    except Exception as e:
+        # The first chat request retries and reports the error
+        logger.warning(f"Chat warm-up failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs in the background so the worker can serve requests at once
+    warmup = asyncio.create_task(_warm_up_chat()) if chat_enabled and chat_warmup else None
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    llm_service = chat.loaded_llm_service() if chat_enabled else None
+    if llm_service is not None:
+        # Close the agent's pooled HTTP client (remote data mode only)
+        await llm_service.company_tool.aclose()
 
 app = FastAPI(
     title="Financial Dashboard API",
     description="API for accessing company financial data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -19,8 +56,9 @@ app.add_middleware(
 
 # Include routers
 app.include_router(companies.router, prefix="/api", tags=["companies"])
-app.include_router(chat.router, prefix="/api", tags=["chat"])
+if chat_enabled:
+    app.include_router(chat.router, prefix="/api", tags=["chat"])
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Financial Dashboard API"} 
\ No newline at end of file
+    return {"message": "Welcome to Financial Dashboard API"}
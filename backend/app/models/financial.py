@@ -23,6 +23,8 @@ class QuarterlyReport(BaseModel):
     quarter: str
     year: str
     financial_metrics: FinancialMetrics
+    # Only present when derived metrics are requested, e.g. ?metrics=gross_margin
+    derived_metrics: Optional[Dict[str, Optional[float]]] = None
 
 class Company(BaseModel):
     symbol: str
@@ -30,4 +32,50 @@ class Company(BaseModel):
     latest_year: str
 
 class CompanyList(BaseModel):
-    companies: List[Company] 
\ No newline at end of file
+    companies: List[Company] 
+
+class CompanySeries(BaseModel):
+    symbol: str
+    periods: List[str]
+    metrics: Dict[str, List[Optional[float]]]
+
+class BulkFinancials(BaseModel):
+    """Column-oriented financials for several companies in one payload."""
+    metrics: List[str]
+    companies: List[CompanySeries]
+
+class RankedCompany(BaseModel):
+    rank: int
+    symbol: str
+    value: float
+
+class MetricRanking(BaseModel):
+    metric: str
+    # None only when no reports are loaded
+    period: Optional[str] = None
+    order: str
+    # Companies with a value for the metric in the period
+    total: int
+    companies: List[RankedCompany]
+
+class ScreenedCompany(BaseModel):
+    symbol: str
+    metrics: Dict[str, Optional[float]]
+
+class ScreenResult(BaseModel):
+    period: Optional[str] = None
+    filters: List[str]
+    sort: Optional[str] = None
+    total: int
+    companies: List[ScreenedCompany]
+
+class MetricAggregates(BaseModel):
+    """Cross-sectional statistics of one metric over all companies in a period."""
+    metric: str
+    period: Optional[str] = None
+    count: int
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    median: Optional[float] = None
+    percentiles: Dict[str, Optional[float]]
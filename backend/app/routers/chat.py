@@ -1,7 +1,13 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.llm_service import get_llm_response
+import asyncio
+import importlib
+import json
 import logging
+import threading
+from types import ModuleType
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -9,19 +15,69 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# The LLM stack (LangChain, the OpenAI client, the agent) is imported on the
+# first chat request or by the warm-up task, not when the app starts
+_llm_service: Optional[ModuleType] = None
+_llm_lock = threading.Lock()
+
+def load_llm_service() -> ModuleType:
+    """Import and initialise ``app.services.llm_service`` once (blocking)."""
+    global _llm_service
+    if _llm_service is None:
+        with _llm_lock:
+            if _llm_service is None:
+                _llm_service = importlib.import_module("app.services.llm_service")
+    return _llm_service
+
+def loaded_llm_service() -> Optional[ModuleType]:
+    """The LLM service if it has been initialised, without loading it."""
+    return _llm_service
+
+async def _get_llm_service() -> ModuleType:
+    if _llm_service is not None:
+        return _llm_service
+    try:
+        return await asyncio.to_thread(load_llm_service)
+    except (ImportError, ValueError) as e:
+        # Missing chat dependencies or OPENAI_API_KEY
+        logger.error(f"Chat is unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Chat is unavailable: {str(e)}")
+
 class ChatRequest(BaseModel):
     message: str
+    # Turns with the same session id share conversation history
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
+    llm_service = await _get_llm_service()
     try:
-        response = await get_llm_response(request.message)
+        response = await llm_service.get_llm_response(request.message, request.session_id)
         if not response:
             raise HTTPException(status_code=500, detail="Failed to generate response")
         return ChatResponse(response=response)
     except Exception as e:
         logger.error(f"Error processing chat request: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams Server-Sent Events: ``tool_start``/``tool_end``
+    while the agent works, ``token`` chunks of the answer, then ``done``.
+    """
+    llm_service = await _get_llm_service()
+
+    async def event_stream():
+        async for event in llm_service.stream_llm_response(request.message, request.session_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Keep proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,22 +1,196 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-from ..models.financial import Company, QuarterlyReport, CompanyList
-from ..services.data_service import DataService
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Optional, Sequence, Tuple
+from ..models.financial import (
+    BulkFinancials,
+    Company,
+    CompanyList,
+    MetricAggregates,
+    MetricRanking,
+    QuarterlyReport,
+    ScreenResult,
+)
+from ..services.data_service import data_service
+from ..services.http_cache import make_etag
+from ..services.offload import data_offload
+from ..services.response_cache import cached_json_response
 
 router = APIRouter()
-data_service = DataService()
 
 @router.get("/companies", response_model=CompanyList)
-async def get_companies():
+async def get_companies(request: Request):
     """Get list of all companies with their latest quarter data"""
-    companies = data_service.get_companies()
-    return CompanyList(companies=companies)
-
-@router.get("/companies/{symbol}/financials", response_model=List[QuarterlyReport])
-async def get_company_financials(symbol: str, year: Optional[str] = None):
-    """Get quarterly financial data for a specific company"""
-    files = data_service._get_company_files(symbol)
-    if not files:
-        raise HTTPException(status_code=404, detail=f"Company {symbol} not found")
-    reports = data_service.get_company_financials(symbol, year)
-    return reports 
\ No newline at end of file
+    fingerprint, cache_version, last_modified = await _versions()
+    return await cached_json_response(
+        request,
+        make_etag("companies", fingerprint),
+        cache_version,
+        last_modified,
+        lambda: CompanyList(companies=data_service.get_companies()),
+    )
+
+@router.get("/companies/financials", response_model=BulkFinancials)
+async def get_bulk_financials(
+    request: Request,
+    symbols: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    metrics: Optional[str] = None,
+):
+    """
+    Get financial data for several companies in one request.
+
+    - ``symbols``: comma separated, e.g. ``DIPD,REXP`` (default: all companies)
+    - ``start`` / ``end``: inclusive period range as ``YYYY`` or ``YYYY-Qn``
+    - ``metrics``: comma separated reported or derived metrics (default: all reported)
+    """
+    symbol_list = _split_list(symbols)
+    fingerprint, cache_version, last_modified = await _versions(symbol_list)
+    try:
+        return await cached_json_response(
+            request,
+            make_etag("bulk", fingerprint, symbol_list, start, end, metrics),
+            cache_version,
+            last_modified,
+            lambda: data_service.get_bulk_financials(symbol_list, start, end, _split_list(metrics)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/companies/analytics/rank", response_model=MetricRanking)
+async def rank_companies(
+    request: Request,
+    metric: str,
+    period: Optional[str] = None,
+    order: str = "desc",
+    limit: int = Query(10, ge=1, le=500),
+):
+    """
+    Rank all companies by a reported or derived metric.
+
+    - ``period``: ``YYYY-Qn`` (default: the latest period with data for the metric)
+    - ``order``: ``desc`` (highest first) or ``asc``
+    """
+    fingerprint, cache_version, last_modified = await _versions()
+    try:
+        return await cached_json_response(
+            request,
+            make_etag("rank", fingerprint, metric, period, order, limit),
+            cache_version,
+            last_modified,
+            lambda: data_service.rank_companies(metric, period, order, limit),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/companies/analytics/screen", response_model=ScreenResult)
+async def screen_companies(
+    request: Request,
+    filters: Optional[str] = None,
+    period: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: str = "desc",
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Companies passing every threshold filter in one period.
+
+    - ``filters``: comma separated, e.g. ``net_margin>0.1,revenue_yoy>=0``
+      (URL-encode ``>``/``<``)
+    - ``period``: ``YYYY-Qn`` (default: the latest period with data for every filtered metric)
+    - ``sort``: metric to order the matches by (default: symbol)
+    """
+    fingerprint, cache_version, last_modified = await _versions()
+    try:
+        return await cached_json_response(
+            request,
+            make_etag("screen", fingerprint, filters, period, sort, order, limit),
+            cache_version,
+            last_modified,
+            lambda: data_service.screen_companies(_split_list(filters) or [], period, sort, order, limit),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/companies/analytics/aggregates", response_model=List[MetricAggregates])
+async def get_metric_aggregates(
+    request: Request,
+    metrics: Optional[str] = None,
+    period: Optional[str] = None,
+    percentiles: Optional[str] = None,
+):
+    """
+    Cross-sectional statistics (count, mean, min, max, median, percentiles)
+    of each metric across all companies.
+
+    - ``metrics``: comma separated reported or derived metrics (default: all reported)
+    - ``period``: ``YYYY-Qn`` (default: each metric's latest period with data)
+    - ``percentiles``: comma separated, e.g. ``5,50,95`` (default: ``10,25,75,90``)
+    """
+    fingerprint, cache_version, last_modified = await _versions()
+    try:
+        return await cached_json_response(
+            request,
+            make_etag("aggregates", fingerprint, metrics, period, percentiles),
+            cache_version,
+            last_modified,
+            lambda: data_service.get_metric_aggregates(
+                _split_list(metrics),
+                period,
+                [float(q) for q in _split_list(percentiles) or ()],
+            ),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get(
+    "/companies/{symbol}/financials",
+    response_model=List[QuarterlyReport],
+    response_model_exclude_unset=True,
+)
+async def get_company_financials(
+    symbol: str,
+    request: Request,
+    year: Optional[str] = None,
+    metrics: Optional[str] = None,
+):
+    """
+    Get quarterly financial data for a specific company.
+
+    Pass ``metrics`` (comma separated, e.g. ``gross_margin,revenue_yoy``) to
+    include precomputed derived metrics with each quarter.
+    """
+    fingerprint, cache_version, last_modified = await _versions([symbol])
+    try:
+        return await cached_json_response(
+            request,
+            make_etag("financials", symbol, fingerprint, year, metrics),
+            cache_version,
+            last_modified,
+            lambda: data_service.get_company_financials(symbol, year, _split_list(metrics)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _data_version(symbols: Optional[Sequence[str]] = None) -> Tuple[str, int, float]:
+    """
+    (content fingerprint for the ETag, response cache version, last
+    modified) for a response, after checking that every symbol exists.
+
+    Blocking: it may rescan the data directory, so routes go through
+    ``_versions``.
+    """
+    missing = [s for s in symbols or () if not data_service.has_company(s)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Company {', '.join(missing)} not found")
+    fingerprint, last_modified = data_service.data_version(symbols)
+    return fingerprint, data_service.version, last_modified
+
+async def _versions(symbols: Optional[Sequence[str]] = None) -> Tuple[str, int, float]:
+    # Runs on a worker thread; concurrent requests for the same symbols share one check
+    key = ("version", tuple(symbols) if symbols is not None else None)
+    return await data_offload.run_once(key, _data_version, symbols)
+
+def _split_list(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+# Runs in a fresh interpreter, like a newly spawned uvicorn worker: import the
+# app, run its startup hooks and serve one data request
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+# The test client itself is not part of a worker's startup
+client_imported = time.perf_counter()
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    status = client.get("/api/companies").status_code
+    served = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started,
+        "startup": ready - client_imported,
+        "first_request": served - ready,
+        "total": served - started - (client_imported - imported),
+        "status": status,
+        "llm_loaded": "app.services.llm_service" in sys.modules,
+    }))
+"""
+
+
+def run_probe(env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr.strip())
+        sys.exit(f"FAIL: the app did not start (exit status {result.returncode})")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_startup():
+    parser = argparse.ArgumentParser(
+        description="Measure how long a fresh API worker takes to import the app and serve its first request."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Exit with status 1 if the median time to the first response exceeds this",
+    )
+    args = parser.parse_args()
+
+    # The measured worker should not start the chat warm-up, so its timing
+    # reflects the data API alone; chat stays enabled to catch eager imports
+    env = {**os.environ, "CHAT_WARMUP": "0", "PYTHONPATH": str(BACKEND_DIR)}
+    runs = [run_probe(env) for _ in range(args.runs)]
+
+    for name in ("import", "startup", "first_request", "total"):
+        values = [run[name] for run in runs]
+        print(f"{name:14s} median {statistics.median(values):.3f}s  min {min(values):.3f}s  max {max(values):.3f}s")
+
+    failures = []
+    if any(run["status"] != 200 for run in runs):
+        failures.append("GET /api/companies did not return 200")
+    if any(run["llm_loaded"] for run in runs):
+        failures.append("the LLM service was imported at startup")
+    median_total = statistics.median(run["total"] for run in runs)
+    if args.max_seconds is not None and median_total > args.max_seconds:
+        failures.append(f"median startup {median_total:.3f}s exceeds {args.max_seconds:.3f}s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    benchmark_startup()
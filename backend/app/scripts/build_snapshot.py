@@ -0,0 +1,23 @@
+import argparse
+import logging
+import time
+from pathlib import Path
+from app.services.financial_snapshot import SNAPSHOT_NAME, compile_snapshot
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent.parent / "data" / "processed" / "jsons"
+
+def build_snapshot():
+    parser = argparse.ArgumentParser(
+        description="Pack the processed quarterly report JSONs into a binary snapshot for fast API startup."
+    )
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", type=Path, default=None, help=f"Defaults to <data-dir>/{SNAPSHOT_NAME}")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    path = compile_snapshot(args.data_dir, args.output)
+    print(f"Snapshot written to {path} ({path.stat().st_size} bytes) in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_snapshot()
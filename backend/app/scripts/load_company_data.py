@@ -1,32 +1,74 @@
-import os
-import json
+import argparse
+import logging
+import time
 from pathlib import Path
+from typing import List
 from app.services.document_service import document_service
+from app.services.report_text import report_index
+
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+DEFAULT_DATA_DIR = BASE_DIR / "data" / "processed" / "jsons"
+DEFAULT_REPORT_DIR = BASE_DIR / "data" / "raw" / "reports"
+DEFAULT_PDF_DIR = BASE_DIR / "data" / "raw" / "pdfs"
+
+
+def report_files(report_dir: Path, pdf_dir: Path) -> List[Path]:
+    """
+    Full report PDFs, falling back to the statement page for periods
+    scraped before full reports were kept.
+    """
+    files = {path.name: path for path in sorted(pdf_dir.glob("*.pdf"))}
+    files.update({path.name: path for path in sorted(report_dir.glob("*.pdf"))})
+    return [files[name] for name in sorted(files)]
+
 
 def load_company_data():
-    # Define paths
-    processed_dir = Path("../../data/processed/jsons")  # Updated path
-    
-    # Process each company's JSON data
-    json_files = list(processed_dir.glob("*.json"))
-    
-    for json_file in json_files:
-        company_name = json_file.stem.split('_')[0]  # Get company name from filename (e.g., DIPD from DIPD_2024_03_31.json)
-        print(f"Processing data for {company_name} from {json_file.name}...")
-        
-        try:
-            with open(json_file, 'r') as f:
-                json_data = json.load(f)
-            print(f"Successfully loaded {json_file.name}")
-            
-            # Process the JSON data
-            document_service.process_json_data(json_data, company_name)
-            print(f"Successfully processed {json_file.name}")
-            
-        except Exception as e:
-            print(f"Error processing {json_file.name}: {str(e)}")
-    
-    print("Data loading complete!")
+    parser = argparse.ArgumentParser(
+        description="Index the processed quarterly report JSONs and report text into the local Chroma collections."
+    )
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--report-dir", type=Path, default=DEFAULT_REPORT_DIR, help="Full report PDFs to index")
+    parser.add_argument(
+        "--pdf-dir",
+        type=Path,
+        default=DEFAULT_PDF_DIR,
+        help="Statement pages, indexed for periods without a full report",
+    )
+    parser.add_argument("--skip-reports", action="store_true", help="Don't index the report PDF text")
+    parser.add_argument("--force", action="store_true", help="Drop the collections and re-embed everything")
+    args = parser.parse_args()
+
+    if args.force:
+        document_service.reset()
+        report_index.reset()
+
+    # Process every company's JSON data in one batched pass
+    json_files = sorted(args.data_dir.glob("*.json"))
+    print(f"Indexing {len(json_files)} report files from {args.data_dir}...")
+
+    started = time.perf_counter()
+    stats = document_service.index_files(json_files)
+    print(
+        f"Data loading complete! {stats.indexed} indexed, {stats.skipped} unchanged, "
+        f"{stats.failed} failed in {time.perf_counter() - started:.2f}s"
+    )
+
+    if args.skip_reports:
+        return
+    pdf_files = report_files(args.report_dir, args.pdf_dir)
+    full_reports = sum(path.parent == args.report_dir for path in pdf_files)
+    print(
+        f"Indexing the text of {len(pdf_files)} report PDFs "
+        f"({full_reports} full reports from {args.report_dir}, the rest statement pages)..."
+    )
+
+    started = time.perf_counter()
+    stats = report_index.index_pdfs(pdf_files)
+    print(
+        f"Report text indexed! {stats.indexed} reports indexed, {stats.skipped} unchanged, "
+        f"{stats.failed} failed in {time.perf_counter() - started:.2f}s"
+    )
 
 if __name__ == "__main__":
-    load_company_data() 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    load_company_data()
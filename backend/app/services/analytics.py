@@ -0,0 +1,288 @@
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..models.financial import (
+    MetricAggregates,
+    MetricRanking,
+    RankedCompany,
+    ScreenedCompany,
+    ScreenResult,
+)
+from .financial_frame import FinancialFrame, format_period, optional_float, parse_period
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = (10, 25, 75, 90)
+
+FILTER_PATTERN = re.compile(r"^\s*([a-z0-9_]+)\s*(>=|<=|>|<)\s*(-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?)\s*$", re.IGNORECASE)
+
+# (metric, operator, threshold)
+ScreenFilter = Tuple[str, str, float]
+
+
+def parse_quarter(value: str) -> int:
+    """Parse "2024-Q2" into a period ordinal; a bare year is ambiguous here."""
+    if value.strip().isdigit():
+        raise ValueError(f"Invalid period: {value!r} (expected YYYY-Qn)")
+    return parse_period(value)
+
+
+def parse_filters(values: Sequence[str]) -> List[ScreenFilter]:
+    """Parse filters like "net_margin>0.1" or "revenue_yoy>=0"."""
+    filters = []
+    for value in values:
+        match = FILTER_PATTERN.match(value)
+        if not match:
+            raise ValueError(f"Invalid filter: {value!r} (expected e.g. net_margin>0.1)")
+        filters.append((match.group(1), match.group(2), float(match.group(3))))
+    return filters
+
+
+@dataclass
+class PeriodIndex:
+    """
+    Every company's metrics for one period, with each metric's companies
+    pre-sorted by value.
+
+    ``values[m]`` is aligned with ``symbols`` (NaN when missing);
+    ``order[m]`` holds the positions that have a value, ascending by value,
+    and ``sorted_values[m]`` the matching values. ``descending[m]`` is the
+    same positions by descending value; ties are broken by symbol in both.
+    ``period`` is None only for the index of an empty store.
+    """
+
+    period: Optional[int]
+    symbols: List[str]
+    values: Dict[str, np.ndarray]
+    order: Dict[str, np.ndarray]
+    descending: Dict[str, np.ndarray]
+    sorted_values: Dict[str, np.ndarray]
+    sums: Dict[str, float]
+
+    @classmethod
+    def build(cls, frame: FinancialFrame, period: Optional[int], metrics: Sequence[str]) -> "PeriodIndex":
+        symbols, rows = [], []
+        for symbol in frame.company_symbols() if period is not None else ():
+            block = frame.rows(symbol, period, period)
+            if block.stop > block.start:
+                symbols.append(symbol)
+                rows.append(block.start)
+        rows = np.asarray(rows, dtype=np.int64)
+        names = np.asarray(symbols, dtype=object)
+        values, order, descending, sorted_values, sums = {}, {}, {}, {}, {}
+        for metric in metrics:
+            column = frame.columns[metric][rows]  # fancy indexing copies
+            present = np.flatnonzero(~np.isnan(column))
+            # Ties are broken by symbol in both directions so rankings are stable
+            if len(present):
+                ranked = present[np.lexsort((names[present], column[present]))]
+                descending[metric] = present[np.lexsort((names[present], -column[present]))]
+            else:
+                ranked = descending[metric] = present
+            values[metric] = column
+            order[metric] = ranked
+            sorted_values[metric] = column[ranked]
+            sums[metric] = float(sorted_values[metric].sum())
+        return cls(period, symbols, values, order, descending, sorted_values, sums)
+
+    @property
+    def label(self) -> Optional[str]:
+        return format_period(self.period) if self.period is not None else None
+
+    def matching(self, metric: str, operator: str, threshold: float) -> np.ndarray:
+        """Positions whose value passes ``metric <operator> threshold``, by binary search."""
+        sorted_values = self.sorted_values[metric]
+        if operator in (">", ">="):
+            start = np.searchsorted(sorted_values, threshold, side="right" if operator == ">" else "left")
+            return self.order[metric][start:]
+        end = np.searchsorted(sorted_values, threshold, side="left" if operator == "<" else "right")
+        return self.order[metric][:end]
+
+    def percentile(self, metric: str, q: float) -> Optional[float]:
+        """Linearly interpolated percentile, read straight off the sorted values."""
+        sorted_values = self.sorted_values[metric]
+        if len(sorted_values) == 0:
+            return None
+        position = (len(sorted_values) - 1) * q / 100
+        lo = math.floor(position)
+        hi = min(lo + 1, len(sorted_values) - 1)
+        return float(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (position - lo))
+
+
+class AnalyticsIndex:
+    """
+    Sorted per-period, per-metric indexes for rankings, screens and
+    cross-sectional aggregates.
+
+    A period's index is built on first use and kept until the data in that
+    period changes; when the frame moves to a new version only periods
+    whose values differ for companies whose files changed are dropped.
+    """
+
+    def __init__(self, metrics: Sequence[str]):
+        self.metrics = list(metrics)
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._frame: Optional[FinancialFrame] = None
+        self._symbol_versions: Dict[str, int] = {}
+        self._symbol_periods: Dict[str, Set[int]] = {}
+        self._indexes: Dict[int, PeriodIndex] = {}
+        self._periods: List[int] = []
+
+    def _company_rows(self, frame: FinancialFrame, symbol: str) -> Dict[int, np.ndarray]:
+        """Period -> the company's metric values in that period."""
+        rows = frame.rows(symbol)
+        if rows.stop == rows.start:
+            return {}
+        block = np.column_stack([frame.columns[metric][rows] for metric in self.metrics])
+        return dict(zip(frame.periods[rows].tolist(), block))
+
+    def _sync(self, frame: FinancialFrame) -> None:
+        if frame.version == self._version:
+            return
+        versions = frame.symbol_versions
+        symbols = set(frame.company_symbols())
+        stale: Set[int] = set()
+        for symbol in symbols | set(self._symbol_periods):
+            if symbol in self._symbol_periods and versions.get(symbol) == self._symbol_versions.get(symbol):
+                continue
+            # Only periods where the company's values actually changed (a new
+            # quarter, a corrected filing and the growth figures it feeds) are dropped
+            old = self._company_rows(self._frame, symbol) if self._frame is not None else {}
+            new = self._company_rows(frame, symbol)
+            stale.update(
+                period for period in old.keys() | new.keys()
+                if period not in old or period not in new
+                or not np.array_equal(old[period], new[period], equal_nan=True)
+            )
+            if new:
+                self._symbol_periods[symbol] = set(new)
+            else:
+                self._symbol_periods.pop(symbol, None)
+        for period in stale:
+            self._indexes.pop(period, None)
+        if stale:
+            logger.info(f"Analytics indexes invalidated for {len(stale)} periods")
+        self._symbol_versions = dict(versions)
+        self._periods = sorted(set().union(*self._symbol_periods.values()))
+        self._frame = frame
+        self._version = frame.version
+
+    def _index(self, period: Optional[int]) -> PeriodIndex:
+        index = self._indexes.get(period)
+        if index is None:
+            index = PeriodIndex.build(self._frame, period, self.metrics)
+            if index.symbols:
+                # Periods without any reports are not kept
+                self._indexes[period] = index
+        return index
+
+    def _resolve(self, frame: FinancialFrame, period: Optional[str], metrics: Sequence[str]) -> PeriodIndex:
+        """
+        Index for ``period``, or for the latest period with data for every
+        one of ``metrics``. A metric nobody reports is not an error: it is
+        answered from the latest period with any data, where it is empty.
+        """
+        self._sync(frame)
+        if period is not None:
+            return self._index(parse_quarter(period))
+        for ordinal in reversed(self._periods):
+            index = self._index(ordinal)
+            if all(len(index.order[metric]) for metric in metrics):
+                return index
+        return self._index(self._periods[-1] if self._periods else None)
+
+    def rank(
+        self,
+        frame: FinancialFrame,
+        metric: str,
+        period: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 10,
+    ) -> MetricRanking:
+        with self._lock:
+            index = self._resolve(frame, period, [metric])
+            order = index.descending[metric] if descending else index.order[metric]
+            top = order[:limit]
+            values = index.values[metric]
+            return MetricRanking.model_construct(
+                metric=metric,
+                period=index.label,
+                order="desc" if descending else "asc",
+                total=len(order),
+                companies=[
+                    RankedCompany.model_construct(rank=i, symbol=index.symbols[pos], value=float(values[pos]))
+                    for i, pos in enumerate(top.tolist(), 1)
+                ],
+            )
+
+    def screen(
+        self,
+        frame: FinancialFrame,
+        filters: Sequence[ScreenFilter],
+        period: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 50,
+    ) -> ScreenResult:
+        metrics = list(dict.fromkeys([name for name, _, _ in filters] + ([sort] if sort else [])))
+        with self._lock:
+            index = self._resolve(frame, period, metrics)
+            # Start from the most selective filter and narrow down
+            matches = sorted((index.matching(*f) for f in filters), key=len)
+            selected = set(matches[0].tolist()) if matches else set(range(len(index.symbols)))
+            for positions in matches[1:]:
+                selected.intersection_update(positions.tolist())
+            if sort:
+                values = index.values[sort]
+                present = [pos for pos in selected if values[pos] == values[pos]]
+                missing = sorted((pos for pos in selected if values[pos] != values[pos]), key=lambda p: index.symbols[p])
+                sign = -1 if descending else 1
+                ordered = sorted(present, key=lambda p: (sign * values[p], index.symbols[p])) + missing
+            else:
+                ordered = sorted(selected, key=lambda p: index.symbols[p])
+            return ScreenResult.model_construct(
+                period=index.label,
+                filters=[f"{name}{op}{threshold:g}" for name, op, threshold in filters],
+                sort=sort,
+                total=len(ordered),
+                companies=[
+                    ScreenedCompany.model_construct(
+                        symbol=index.symbols[pos],
+                        metrics={name: optional_float(index.values[name][pos]) for name in metrics},
+                    )
+                    for pos in ordered[:limit]
+                ],
+            )
+
+    def aggregates(
+        self,
+        frame: FinancialFrame,
+        metrics: Sequence[str],
+        period: Optional[str] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> List[MetricAggregates]:
+        with self._lock:
+            index = self._resolve(frame, period, []) if period is not None else None
+            results = []
+            for metric in metrics:
+                metric_index = index or self._resolve(frame, None, [metric])
+                sorted_values = metric_index.sorted_values[metric]
+                count = len(sorted_values)
+                results.append(MetricAggregates.model_construct(
+                    metric=metric,
+                    period=metric_index.label,
+                    count=count,
+                    mean=metric_index.sums[metric] / count if count else None,
+                    min=float(sorted_values[0]) if count else None,
+                    max=float(sorted_values[-1]) if count else None,
+                    median=metric_index.percentile(metric, 50),
+                    percentiles={f"p{q:g}": metric_index.percentile(metric, q) for q in percentiles},
+                ))
+            return results
@@ -0,0 +1,155 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ORDINALS = {"first": "1", "1st": "1", "second": "2", "2nd": "2", "third": "3", "3rd": "3", "fourth": "4", "4th": "4"}
+
+
+def normalize_question(text: str) -> str:
+    """
+    Reduce a question to a canonical form so trivially different phrasings
+    share a cache entry, e.g. "DIPD revenue, Q4 2024?" and "dipd revenue q4-2024".
+    """
+    text = text.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    # "fourth quarter" / "4th quarter" / "quarter 4" -> "q4"
+    text = re.sub(
+        r"\b(first|1st|second|2nd|third|3rd|fourth|4th)\s+quarter\b",
+        lambda m: "q" + _ORDINALS[m.group(1)],
+        text,
+    )
+    text = re.sub(r"\bquarter\s+([1-4])\b", r"q\1", text)
+    return " ".join(text.split())
+
+
+def numeric_anchors(key: str) -> FrozenSet[str]:
+    """Tokens that must match exactly for a similar question to count (years, quarters)."""
+    return frozenset(token for token in key.split() if any(c.isdigit() for c in token))
+
+
+@dataclass
+class _Entry:
+    answer: str
+    created: float
+    anchors: FrozenSet[str]
+    vector: Optional[np.ndarray] = None
+
+
+class AnswerCache:
+    """
+    LRU/TTL cache of chat answers keyed by normalized question text.
+
+    Entries are only valid for the data version they were answered from; the
+    cache empties itself when the version changes. With an ``embed`` function
+    a miss on the exact key falls back to the most similar cached question
+    (cosine similarity of at least ``similarity_threshold``) whose
+    ``anchors`` match exactly, so "Q3 2024" never answers "Q4 2024".
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        similarity_threshold: float = 0.95,
+        anchors: Callable[[str], FrozenSet[str]] = numeric_anchors,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.anchors = anchors
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        # Lazily rebuilt (keys, unit vectors) matrix for similarity lookups
+        self._index: Optional[Tuple[List[str], np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sync(self, version: int) -> None:
+        if version != self._version:
+            if self._entries:
+                logger.info("Financial data changed, clearing answer cache")
+            self._entries.clear()
+            self._index = None
+            self._version = version
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding failed, using exact answer cache only: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _similar_key(self, key: str, vector: np.ndarray) -> Optional[str]:
+        if self._index is None:
+            keys = [k for k, e in self._entries.items() if e.vector is not None]
+            if not keys:
+                return None
+            self._index = (keys, np.stack([self._entries[k].vector for k in keys]))
+        keys, matrix = self._index
+        anchors = self.anchors(key)
+        scores = matrix @ vector
+        for i in np.argsort(scores)[::-1]:
+            if scores[i] < self.similarity_threshold:
+                break
+            if self._entries[keys[i]].anchors == anchors:
+                return keys[i]
+        return None
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created > self.ttl_seconds:
+            del self._entries[key]
+            self._index = None
+            return None
+        self._entries.move_to_end(key)
+        return entry.answer
+
+    def get(self, question: str, version: int) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            self._sync(version)
+            answer = self._lookup(key)
+            if answer is not None or self.embed is None:
+                return answer
+        # Embedding may call a remote API, so it runs outside the lock
+        vector = self._embed(key)
+        if vector is None:
+            return None
+        with self._lock:
+            self._sync(version)
+            similar = self._similar_key(key, vector)
+            return self._lookup(similar) if similar else None
+
+    def put(self, question: str, version: int, answer: str) -> None:
+        key = normalize_question(question)
+        vector = self._embed(key) if self.embed is not None else None
+        with self._lock:
+            self._sync(version)
+            self._entries[key] = _Entry(
+                answer=answer, created=time.monotonic(), anchors=self.anchors(key), vector=vector
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._index = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index = None
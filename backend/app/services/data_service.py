@@ -1,66 +1,226 @@
-import json
-import os
+import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
-from ..models.financial import Company, QuarterlyReport
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..models.financial import (
+    BulkFinancials,
+    Company,
+    CompanySeries,
+    MetricAggregates,
+    MetricRanking,
+    QuarterlyReport,
+    ScreenResult,
+)
+from .analytics import DEFAULT_PERCENTILES, AnalyticsIndex, parse_filters
+from .derived_metrics import DerivedMetricsEngine, DERIVED_FIELDS
+from .financial_frame import FinancialFrame, METRIC_FIELDS, format_period, optional_float, parse_period
+from .financial_snapshot import SNAPSHOT_NAME, load_snapshot, reports_from_frame
+from .financial_store import FinancialStore
+
+logger = logging.getLogger(__name__)
 
 class DataService:
-    def __init__(self):
+    def __init__(self, data_dir: Optional[Path] = None):
         # Get the absolute path to the data directory
         base_dir = Path(__file__).parent.parent.parent.parent
-        self.data_dir = base_dir / "data" / "processed" / "jsons"
-        
-    def _get_all_files(self) -> List[Path]:
-        return list(self.data_dir.glob("*.json"))
-    
-    def _get_company_files(self, symbol: str) -> List[Path]:
-        return list(self.data_dir.glob(f"{symbol}_*.json"))
-    
-    def _read_json_file(self, file_path: Path) -> Dict:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        self.data_dir = data_dir or base_dir / "data" / "processed" / "jsons"
+        self._frame: Optional[FinancialFrame] = None
+        self._frame_lock = threading.Lock()
+        self.derived = DerivedMetricsEngine()
+        self.analytics = AnalyticsIndex(METRIC_FIELDS + DERIVED_FIELDS)
+        # Start from the compiled binary snapshot when there is one, so only
+        # JSON files written after it was compiled need to be parsed
+        snapshot = self._load_snapshot()
+        preloaded = (snapshot[1], reports_from_frame(snapshot[0])) if snapshot else None
+        # Reports are loaded once and kept in memory; changed files are
+        # re-read on demand based on their mtime/inode.
+        self.store = FinancialStore(self.data_dir, preloaded=preloaded)
+        if snapshot and self.store.version == 1:
+            # Nothing changed since the snapshot: serve its memory-mapped columns
+            frame = snapshot[0]
+            frame.version = 1
+            frame.symbol_versions = self.store.symbol_versions()
+            self.derived.apply(frame, frame.symbol_versions)
+            self._frame = frame
+
+    def _load_snapshot(self):
+        path = self.data_dir / SNAPSHOT_NAME
+        if not path.exists():
+            return None
+        try:
+            return load_snapshot(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring snapshot {path}, falling back to JSON files: {str(e)}")
+            return None
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever the underlying report files change."""
+        self.store.refresh()
+        return self.store.version
+
+    @property
+    def frame(self) -> FinancialFrame:
+        """Columnar view of every report, rebuilt only when the store changes."""
+        frame = self._frame
+        if frame is not None and frame.version == self.version:
+            return frame
+        with self._frame_lock:
+            if self._frame is None or self._frame.version != self.store.version:
+                self._frame = self._build_frame(*self.store.snapshot())
+            return self._frame
+
+    def _build_frame(self, version: int, reports, symbol_versions: Dict[str, int]) -> FinancialFrame:
+        frame = FinancialFrame.from_reports(reports, version=version)
+        frame.symbol_versions = dict(symbol_versions)
+        # Adds margins, growth and TTM columns and the calculated operating_income,
+        # recomputing only companies whose files changed
+        self.derived.apply(frame, symbol_versions)
+        return frame
+
+    def data_version(self, symbols: Optional[Sequence[str]] = None) -> Tuple[str, float]:
+        """
+        (fingerprint, last modified) of the files behind a response, for
+        HTTP validators that hold across restarts and worker processes.
+
+        With ``symbols`` only those companies count, so editing one company's
+        file leaves the other companies' cache validators untouched.
+        """
+        return self.store.fingerprint(symbols), self.store.last_modified(symbols)
+
+    def has_company(self, symbol: str) -> bool:
+        return self.store.has_symbol(symbol)
     
     def get_companies(self) -> List[Company]:
-        files = self._get_all_files()
-        companies = {}
-        
-        for file in files:
-            symbol = file.stem.split('_')[0]
-            data = self._read_json_file(file)
-            
-            if symbol not in companies or (
-                data['year'] > companies[symbol]['latest_year'] or
-                (data['year'] == companies[symbol]['latest_year'] and
-                 data['quarter'] > companies[symbol]['latest_quarter'])
-            ):
-                companies[symbol] = {
-                    'latest_quarter': data['quarter'],
-                    'latest_year': data['year']
-                }
-        
         return [
-            Company(symbol=symbol, **data)
-            for symbol, data in companies.items()
+            Company(symbol=symbol, latest_year=year, latest_quarter=quarter)
+            for symbol, (year, quarter) in sorted(self.store.latest().items())
         ]
     
-    def get_company_financials(self, symbol: str, year: Optional[str] = None) -> List[QuarterlyReport]:
-        files = self._get_company_files(symbol)
-        reports = []
-        
-        for file in files:
-            data = self._read_json_file(file)
-            if year is None or data['year'] == year:
-                # Calculate operating_income if possible
-                fm = data.get('financial_metrics', {})
-                gross_profit = fm.get('gross_profit')
-                other_income = fm.get('other_income', 0)
-                distribution_costs = fm.get('distribution_costs')
-                administrative_expenses = fm.get('administrative_expenses')
-                # Only calculate if required fields are present
-                if gross_profit is not None and distribution_costs is not None and administrative_expenses is not None:
-                    calculated_oi = gross_profit + (other_income or 0) - abs(distribution_costs) - abs(administrative_expenses)
-                    fm['operating_income'] = calculated_oi
-                    data['financial_metrics'] = fm
-                reports.append(QuarterlyReport(**data))
-        
-        return sorted(reports, key=lambda x: (x.year, x.quarter)) 
\ No newline at end of file
+    def get_company_financials(
+        self,
+        symbol: str,
+        year: Optional[str] = None,
+        derived: Optional[Sequence[str]] = None,
+    ) -> List[QuarterlyReport]:
+        self._check_metrics(derived or (), DERIVED_FIELDS)
+        frame = self.frame
+        # ``year`` matches the report's year label, so an unknown year gives
+        # an empty list rather than an error
+        rows = frame.rows(symbol) if year is None else frame.year_rows(symbol, year)
+        return frame.to_reports(rows, derived)
+
+    @staticmethod
+    def _check_metrics(metrics: Sequence[str], allowed: Sequence[str]) -> None:
+        unknown = set(metrics) - set(allowed)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+    def get_company_series(
+        self,
+        symbol: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        metrics: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Metric columns for a symbol over an inclusive period range.
+
+        ``metrics`` may name both reported and derived metrics.
+        ``start``/``end`` accept "YYYY" or "YYYY-Qn". The returned arrays are
+        views into the shared frame, together with a "period" column of
+        period ordinals; callers must not modify them.
+        """
+        self._check_metrics(metrics or (), METRIC_FIELDS + DERIVED_FIELDS)
+        frame = self.frame
+        rows, columns = frame.select(
+            symbol,
+            parse_period(start) if start else None,
+            parse_period(end, end=True) if end else None,
+            metrics,
+        )
+        columns['period'] = frame.periods[rows]
+        return columns
+
+    def get_bulk_financials(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        metrics: Optional[Sequence[str]] = None,
+    ) -> BulkFinancials:
+        """
+        Financials for many companies from a single frame snapshot.
+
+        Defaults to every company and every reported metric. Each company gets
+        its own period list, with one value list per metric aligned to it.
+        """
+        metrics = list(metrics or METRIC_FIELDS)
+        self._check_metrics(metrics, METRIC_FIELDS + DERIVED_FIELDS)
+        frame = self.frame
+        start_period = parse_period(start) if start else None
+        end_period = parse_period(end, end=True) if end else None
+        companies = []
+        for symbol in symbols or frame.company_symbols():
+            rows, columns = frame.select(symbol, start_period, end_period, metrics)
+            companies.append(CompanySeries.model_construct(
+                symbol=symbol,
+                periods=[format_period(p) for p in frame.periods[rows].tolist()],
+                metrics={
+                    name: [optional_float(v) for v in values.tolist()]
+                    for name, values in columns.items()
+                },
+            ))
+        return BulkFinancials.model_construct(metrics=metrics, companies=companies)
+
+    @staticmethod
+    def _check_order(order: str) -> bool:
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order!r} (expected asc or desc)")
+        return order == "desc"
+
+    def rank_companies(
+        self,
+        metric: str,
+        period: Optional[str] = None,
+        order: str = "desc",
+        limit: int = 10,
+    ) -> MetricRanking:
+        """
+        Top ``limit`` companies by a reported or derived metric in one period
+        (default: the latest period with data for the metric).
+        """
+        self._check_metrics([metric], METRIC_FIELDS + DERIVED_FIELDS)
+        return self.analytics.rank(self.frame, metric, period, self._check_order(order), limit)
+
+    def screen_companies(
+        self,
+        filters: Sequence[str],
+        period: Optional[str] = None,
+        sort: Optional[str] = None,
+        order: str = "desc",
+        limit: int = 50,
+    ) -> ScreenResult:
+        """Companies passing every threshold filter, e.g. ``["net_margin>0.1", "revenue_yoy>=0"]``."""
+        parsed = parse_filters(filters)
+        self._check_metrics([name for name, _, _ in parsed] + ([sort] if sort else []), METRIC_FIELDS + DERIVED_FIELDS)
+        return self.analytics.screen(self.frame, parsed, period, sort, self._check_order(order), limit)
+
+    def get_metric_aggregates(
+        self,
+        metrics: Optional[Sequence[str]] = None,
+        period: Optional[str] = None,
+        percentiles: Optional[Sequence[float]] = None,
+    ) -> List[MetricAggregates]:
+        """Count, mean, min/max, median and percentiles of each metric across companies."""
+        metrics = list(metrics or METRIC_FIELDS)
+        self._check_metrics(metrics, METRIC_FIELDS + DERIVED_FIELDS)
+        percentiles = list(percentiles or DEFAULT_PERCENTILES)
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        return self.analytics.aggregates(self.frame, metrics, period, percentiles)
+
+
+# Shared instance so every router and the chat agent use one resident store
+data_service = DataService()
@@ -0,0 +1,149 @@
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .financial_frame import FinancialFrame
+
+logger = logging.getLogger(__name__)
+
+# Flow metrics that get quarter-on-quarter / year-on-year growth and TTM sums
+GROWTH_METRICS = [
+    "revenue",
+    "gross_profit",
+    "operating_income",
+    "profit_before_tax",
+    "net_income",
+    "eps_basic",
+]
+
+RATIO_METRICS = [
+    "gross_margin",
+    "operating_margin",
+    "net_margin",
+    "effective_tax_rate",
+]
+
+DERIVED_FIELDS: List[str] = (
+    ["operating_income"]
+    + RATIO_METRICS
+    + [f"{m}_{suffix}" for m in GROWTH_METRICS for suffix in ("qoq", "yoy", "ttm")]
+)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def _lag_index(keys: np.ndarray, lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each row, the index of the row ``lag`` quarters earlier for the same
+    company, plus a mask of rows where such a row exists.
+    """
+    target = keys - lag
+    idx = np.searchsorted(keys, target)
+    idx_clipped = np.minimum(idx, len(keys) - 1)
+    found = (idx < len(keys)) & (keys[idx_clipped] == target)
+    return idx_clipped, found
+
+
+def _lagged(values: np.ndarray, idx: np.ndarray, found: np.ndarray) -> np.ndarray:
+    return np.where(found, values[idx], np.nan)
+
+
+def compute_derived(columns: Dict[str, np.ndarray], codes: np.ndarray, periods: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute every derived metric in one vectorized pass.
+
+    ``codes`` identifies the company of each row and ``periods`` holds period
+    ordinals; rows must be sorted by (code, period). Missing inputs give NaN.
+    """
+    n = len(periods)
+    derived: Dict[str, np.ndarray] = {}
+    if n == 0:
+        return {name: np.empty(0, dtype=np.float64) for name in DERIVED_FIELDS}
+
+    # Operating income = Gross Profit + Other Income - Distribution Costs - Administrative Expenses
+    calculated_oi = (
+        columns["gross_profit"]
+        + np.nan_to_num(columns["other_income"])
+        - np.abs(columns["distribution_costs"])
+        - np.abs(columns["administrative_expenses"])
+    )
+    operating_income = np.where(np.isnan(calculated_oi), columns["operating_income"], calculated_oi)
+    derived["operating_income"] = operating_income
+
+    revenue = columns["revenue"]
+    derived["gross_margin"] = _ratio(columns["gross_profit"], revenue)
+    derived["operating_margin"] = _ratio(operating_income, revenue)
+    derived["net_margin"] = _ratio(columns["net_income"], revenue)
+    derived["effective_tax_rate"] = _ratio(np.abs(columns["tax_expense"]), columns["profit_before_tax"])
+
+    # Period ordinals are < 2**20 for any realistic year, so this key keeps
+    # rows of one company contiguous and consecutive quarters 1 apart.
+    keys = codes.astype(np.int64) * (1 << 20) + periods
+    lags = {lag: _lag_index(keys, lag) for lag in (1, 2, 3, 4)}
+
+    for name in GROWTH_METRICS:
+        values = operating_income if name == "operating_income" else columns[name]
+        for suffix, lag in (("qoq", 1), ("yoy", 4)):
+            previous = _lagged(values, *lags[lag])
+            derived[f"{name}_{suffix}"] = _ratio(values - previous, np.abs(previous))
+        # Trailing twelve months: only when all four quarters are present
+        ttm = values.copy()
+        for lag in (1, 2, 3):
+            ttm = ttm + _lagged(values, *lags[lag])
+        derived[f"{name}_ttm"] = ttm
+
+    return derived
+
+
+class DerivedMetricsEngine:
+    """
+    Caches derived metrics per company and recomputes only companies whose
+    source files changed since the last run, in a single batched pass.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # symbol -> (symbol version, derived column blocks)
+        self._cache: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+
+    def apply(self, frame: FinancialFrame, symbol_versions: Dict[str, int]) -> None:
+        """Add derived columns to ``frame`` (and replace its operating_income)."""
+        with self._lock:
+            symbols = frame.company_symbols()
+            dirty = [
+                s for s in symbols
+                if s not in self._cache or self._cache[s][0] != symbol_versions.get(s, 0)
+            ]
+            for stale in set(self._cache) - set(symbols):
+                del self._cache[stale]
+
+            if dirty:
+                blocks = [frame.rows(s) for s in dirty]
+                rows = np.concatenate([np.arange(b.start, b.stop) for b in blocks])
+                codes = np.repeat(np.arange(len(blocks)), [b.stop - b.start for b in blocks])
+                sub_columns = {name: column[rows] for name, column in frame.columns.items()}
+                computed = compute_derived(sub_columns, codes, frame.periods[rows])
+                offset = 0
+                for symbol, block in zip(dirty, blocks):
+                    size = block.stop - block.start
+                    self._cache[symbol] = (
+                        symbol_versions.get(symbol, 0),
+                        {name: values[offset:offset + size] for name, values in computed.items()},
+                    )
+                    offset += size
+                logger.info(f"Recomputed derived metrics for {len(dirty)} of {len(symbols)} companies")
+
+            derived = {name: np.full(len(frame), np.nan, dtype=np.float64) for name in DERIVED_FIELDS}
+            for symbol in symbols:
+                block = frame.rows(symbol)
+                for name, values in self._cache[symbol][1].items():
+                    derived[name][block] = values
+
+        frame.columns.update(derived)
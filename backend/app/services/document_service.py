@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import chromadb
+
+from ..models.financial import FinancialMetrics
+from .embeddings import EmbedFunction, default_embedding_backend, get_embed_function
+from .financial_frame import period_ordinal
+
+logger = logging.getLogger(__name__)
+
+METRIC_LABELS = {
+    "revenue": "Revenue",
+    "cost_of_goods_sold": "Cost of goods sold",
+    "gross_profit": "Gross profit",
+    "other_income": "Other income",
+    "distribution_costs": "Distribution costs",
+    "administrative_expenses": "Administrative expenses",
+    "operating_income": "Operating income",
+    "finance_costs": "Finance costs",
+    "finance_income": "Finance income",
+    "share_of_profit_equity_investee": "Share of profit of equity investee",
+    "profit_before_tax": "Profit before tax",
+    "tax_expense": "Tax expense",
+    "net_income": "Net income",
+    "eps_basic": "EPS (basic)",
+    "eps_diluted": "EPS (diluted)",
+    "dividend_per_share": "Dividend per share",
+}
+
+
+@dataclass
+class Document:
+    id: str
+    text: str
+    metadata: Dict
+
+
+@dataclass
+class IndexStats:
+    files: int = 0
+    skipped: int = 0
+    indexed: int = 0
+    failed: int = 0
+
+
+def content_hash(json_data: Dict) -> str:
+    """Stable hash of a report's content, independent of key order and formatting."""
+    canonical = json.dumps(json_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _format_amount(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return "not reported"
+    if metric.startswith(("eps_", "dividend_")):
+        return f"LKR {value:,.2f}"
+    return f"LKR {value:,.0f}"
+
+
+def report_to_document(json_data: Dict, symbol: str, source: str = "") -> Document:
+    """Turn one processed quarterly report JSON into a text document for embedding."""
+    year, quarter = str(json_data["year"]), json_data["quarter"]
+    metrics = FinancialMetrics(**(json_data.get("financial_metrics") or {})).model_dump()
+    lines = [f"{symbol} quarterly income statement for {quarter} {year} (Group, 3 months)."]
+    lines.extend(
+        f"{METRIC_LABELS.get(name, name)}: {_format_amount(name, value)}"
+        for name, value in metrics.items()
+    )
+    return Document(
+        id=f"{symbol}_{year}_{quarter}",
+        text="\n".join(lines),
+        metadata={
+            "symbol": symbol,
+            "year": year,
+            "quarter": quarter,
+            "period": period_ordinal(year, quarter),
+            "source": source,
+            "content_hash": content_hash(json_data),
+        },
+    )
+
+
+class DocumentService:
+    """
+    Indexes processed quarterly reports into a local, persisted Chroma collection.
+
+    Unchanged reports (same content hash as the indexed copy) are skipped,
+    embeddings are computed in batches on a small worker pool, and documents
+    are upserted in batches.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Optional[Path] = None,
+        collection_name: str = "company_financials",
+        embed_documents: Optional[EmbedFunction] = None,
+        embedding_backend: Optional[str] = None,
+        batch_size: int = 128,
+        workers: int = 4,
+    ):
+        base_dir = Path(__file__).parent.parent.parent.parent
+        self.persist_dir = Path(persist_dir or os.getenv("CHROMA_DIR") or base_dir / "data" / "chroma")
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.workers = workers
+        # An injected embedding function is recorded as "custom"
+        self.embedding_backend = "custom" if embed_documents else (embedding_backend or default_embedding_backend())
+        self._embed_documents = embed_documents
+        self._collection = None
+
+    @property
+    def collection(self):
+        # Created on first use so importing the service stays cheap
+        if self._collection is None:
+            client = chromadb.PersistentClient(path=str(self.persist_dir))
+            self._collection = client.get_or_create_collection(
+                self.collection_name,
+                metadata={"hnsw:space": "cosine", "embedding": self.embedding_backend},
+            )
+            indexed_with = (self._collection.metadata or {}).get("embedding")
+            if indexed_with and indexed_with != self.embedding_backend:
+                logger.warning(
+                    f"Collection {self.collection_name} was built with {indexed_with} embeddings, "
+                    f"but {self.embedding_backend} is configured; rebuild it with load_company_data --force"
+                )
+        return self._collection
+
+    @property
+    def embed_documents(self) -> EmbedFunction:
+        if self._embed_documents is None:
+            self._embed_documents = get_embed_function(self.embedding_backend)
+        return self._embed_documents
+
+    def reset(self) -> None:
+        """Drop the collection so the next write recreates it with the configured embeddings."""
+        client = chromadb.PersistentClient(path=str(self.persist_dir))
+        # list_collections returns names on newer chromadb, Collection objects on older
+        if self.collection_name in {getattr(c, "name", c) for c in client.list_collections()}:
+            client.delete_collection(self.collection_name)
+        self._collection = None
+
+    def _batches(self, items: Sequence) -> List[Sequence]:
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    def _indexed_hashes(self, ids: List[str]) -> Dict[str, str]:
+        hashes = {}
+        for batch in self._batches(ids):
+            existing = self.collection.get(ids=list(batch), include=["metadatas"])
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"]):
+                hashes[doc_id] = (metadata or {}).get("content_hash")
+        return hashes
+
+    def index_documents(self, documents: List[Document], force: bool = False) -> Tuple[int, int]:
+        """
+        Embed and upsert ``documents``, skipping ones already indexed with the
+        same content hash. Returns (indexed, skipped).
+        """
+        # Later documents win when two share an id
+        documents = list({doc.id: doc for doc in documents}.values())
+        if not force:
+            indexed = self._indexed_hashes([doc.id for doc in documents])
+            fresh = [doc for doc in documents if indexed.get(doc.id) != doc.metadata["content_hash"]]
+        else:
+            fresh = documents
+        skipped = len(documents) - len(fresh)
+        if not fresh:
+            return 0, skipped
+
+        batches = self._batches(fresh)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Embedding batches run concurrently; upserts stay on this thread
+            embeddings = pool.map(lambda batch: self.embed_documents([doc.text for doc in batch]), batches)
+            for batch, vectors in zip(batches, embeddings):
+                self.collection.upsert(
+                    ids=[doc.id for doc in batch],
+                    embeddings=vectors,
+                    documents=[doc.text for doc in batch],
+                    metadatas=[doc.metadata for doc in batch],
+                )
+        logger.info(f"Indexed {len(fresh)} documents into {self.collection_name}, skipped {skipped} unchanged")
+        return len(fresh), skipped
+
+    def search(self, query: str, k: int = 4, where: Optional[Dict] = None) -> List[Dict]:
+        """Top ``k`` documents closest to ``query``, optionally filtered on metadata."""
+        if self.collection.count() == 0:
+            return []
+        results = self.collection.query(
+            query_embeddings=self.embed_documents([query]),
+            n_results=k,
+            where=where or None,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            {"id": doc_id, "text": text, "metadata": metadata, "score": round(1 - distance, 4)}
+            for doc_id, text, metadata, distance in zip(
+                results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+
+    def process_json_data(self, json_data: Dict, company_name: str) -> bool:
+        """Index one processed report. Returns False if it was already up to date."""
+        indexed, _ = self.index_documents([report_to_document(json_data, company_name)])
+        return indexed > 0
+
+    def index_files(self, files: Iterable[Path], force: bool = False) -> IndexStats:
+        """Index processed report JSON files (``SYMBOL_YYYY_MM_DD.json``) in batches."""
+        stats = IndexStats()
+        documents = []
+        for path in files:
+            stats.files += 1
+            try:
+                with open(path, "r") as f:
+                    json_data = json.load(f)
+                symbol = Path(path).stem.split("_")[0]
+                documents.append(report_to_document(json_data, symbol, source=Path(path).name))
+            except Exception as e:
+                stats.failed += 1
+                logger.error(f"Error reading {path}: {str(e)}")
+        stats.indexed, stats.skipped = self.index_documents(documents, force=force)
+        return stats
+
+
+document_service = DocumentService()
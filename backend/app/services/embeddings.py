@@ -0,0 +1,60 @@
+import hashlib
+import math
+import os
+import re
+from typing import Callable, List
+
+EmbedFunction = Callable[[List[str]], List[List[float]]]
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+")
+
+
+class HashingEmbeddings:
+    """
+    Deterministic local embeddings by feature hashing.
+
+    Words and adjacent word pairs are hashed into a fixed number of buckets
+    and the vector is L2-normalised, so texts sharing vocabulary land close
+    under cosine distance. No model download or network access is needed,
+    which keeps indexing and search reproducible offline.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        # The top bit picks the sign so collisions tend to cancel out
+        return value % self.dimensions, 1.0 if value >> 63 else -1.0
+
+    def embed_query(self, text: str) -> List[float]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = [0.0] * self.dimensions
+        for feature in features:
+            index, sign = self._bucket(feature)
+            vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def default_embedding_backend() -> str:
+    # EMBEDDING_BACKEND=local uses HashingEmbeddings; anything else uses OpenAI
+    return os.getenv("EMBEDDING_BACKEND", "openai").lower()
+
+
+def get_embed_function(backend: str = None) -> EmbedFunction:
+    """Document embedding function for ``backend`` ("openai" or "local")."""
+    backend = backend or default_embedding_backend()
+    if backend == "local":
+        return HashingEmbeddings(int(os.getenv("EMBEDDING_DIMENSIONS", "512"))).embed_documents
+
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    ).embed_documents
@@ -0,0 +1,191 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..models.financial import FinancialMetrics, QuarterlyReport
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS: List[str] = list(FinancialMetrics.model_fields)
+
+QUARTERS = ("Q1", "Q2", "Q3", "Q4")
+
+
+def period_ordinal(year: str, quarter: str) -> int:
+    """Map ("2024", "Q2") to a sortable integer; consecutive quarters differ by 1."""
+    try:
+        return int(year) * 4 + QUARTERS.index(quarter.upper())
+    except (ValueError, AttributeError):
+        return -1
+
+
+def parse_period(value: str, end: bool = False) -> int:
+    """
+    Parse "2024-Q2" / "2024Q2" or a bare year "2024" into a period ordinal.
+
+    A bare year resolves to Q1 as a range start and to Q4 as a range end.
+    """
+    value = value.strip().upper().replace("-", "").replace(" ", "")
+    if len(value) == 4 and value.isdigit():
+        return int(value) * 4 + (3 if end else 0)
+    ordinal = period_ordinal(value[:4], value[4:])
+    if ordinal < 0:
+        raise ValueError(f"Invalid period: {value!r} (expected YYYY or YYYY-Qn)")
+    return ordinal
+
+
+def format_period(ordinal: int) -> str:
+    return f"{ordinal // 4}-{QUARTERS[ordinal % 4]}"
+
+
+def optional_float(value: float) -> Optional[float]:
+    """Column value for a response: NaN (missing) becomes None."""
+    return None if value != value else float(value)
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class FinancialFrame:
+    """
+    Columnar, NumPy-backed view of all quarterly reports.
+
+    Each metric is one contiguous float64 array (NaN for missing values).
+    Rows are sorted by (symbol, period), so a company's history is one
+    contiguous block and a period range inside it is a binary search away.
+    Pydantic objects are only built when a caller asks for them.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        years: Sequence[str],
+        quarters: Sequence[str],
+        columns: Dict[str, np.ndarray],
+        version: int = 0,
+    ):
+        self.version = version
+        # Per-company versions of the data the frame was built from
+        self.symbol_versions: Dict[str, int] = {}
+        self.symbols = list(symbols)
+        self.years = list(years)
+        self.quarters = list(quarters)
+        self.periods = np.fromiter(
+            (period_ordinal(y, q) for y, q in zip(self.years, self.quarters)),
+            dtype=np.int64,
+            count=len(self.years),
+        )
+        self.columns = columns
+        # Backing buffer (e.g. an mmap) that must outlive the column arrays
+        self.buffer = None
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        start = 0
+        for i in range(1, len(self.symbols) + 1):
+            if i == len(self.symbols) or self.symbols[i] != self.symbols[start]:
+                self._blocks[self.symbols[start]] = (start, i)
+                start = i
+
+    @classmethod
+    def from_reports(
+        cls,
+        reports: Iterable[Tuple[Tuple[str, str, str], Dict]],
+        version: int = 0,
+    ) -> "FinancialFrame":
+        """Build from (symbol, year, quarter) -> raw report dict pairs."""
+        rows = sorted(
+            reports,
+            key=lambda item: (item[0][0], period_ordinal(item[0][1], item[0][2]), item[0][1], item[0][2]),
+        )
+        n = len(rows)
+        columns = {name: np.full(n, np.nan, dtype=np.float64) for name in METRIC_FIELDS}
+        for i, (_, report) in enumerate(rows):
+            fm = report.get("financial_metrics") or {}
+            for name, value in fm.items():
+                column = columns.get(name)
+                if column is not None:
+                    column[i] = _to_float(value)
+        return cls(
+            symbols=[key[0] for key, _ in rows],
+            years=[key[1] for key, _ in rows],
+            quarters=[key[2] for key, _ in rows],
+            columns=columns,
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def company_symbols(self) -> List[str]:
+        return list(self._blocks)
+
+    def has_symbol(self, symbol: str) -> bool:
+        return symbol in self._blocks
+
+    def rows(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None) -> slice:
+        """Row slice for a symbol, optionally limited to an inclusive period range."""
+        lo, hi = self._blocks.get(symbol, (0, 0))
+        if lo == hi:
+            return slice(0, 0)
+        block = self.periods[lo:hi]
+        if start is not None:
+            lo += int(np.searchsorted(block, start, side="left"))
+            block = self.periods[lo:hi]
+        if end is not None:
+            hi = lo + int(np.searchsorted(block, end, side="right"))
+        return slice(lo, hi)
+
+    def year_rows(self, symbol: str, year: str) -> np.ndarray:
+        """
+        Rows of a symbol whose year label is ``year``. Unlike a period range
+        this keeps reports with non-standard quarter labels, and an unknown
+        year simply matches nothing.
+        """
+        block = self.rows(symbol)
+        return np.array([i for i in range(block.start, block.stop) if self.years[i] == year], dtype=np.int64)
+
+    def select(
+        self,
+        symbol: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        metrics: Optional[Sequence[str]] = None,
+    ) -> Tuple[slice, Dict[str, np.ndarray]]:
+        """Slice a metric subset for a symbol and period range (views, no copies)."""
+        rows = self.rows(symbol, start, end)
+        names = metrics if metrics is not None else METRIC_FIELDS
+        return rows, {name: self.columns[name][rows] for name in names}
+
+    def to_reports(
+        self, rows: Union[slice, np.ndarray], derived: Optional[Sequence[str]] = None
+    ) -> List[QuarterlyReport]:
+        """
+        Materialise Pydantic reports for a row slice or array of row indices
+        (response boundary only).
+
+        Columns named in ``derived`` are attached as ``derived_metrics``.
+        """
+        block = {name: self.columns[name][rows].tolist() for name in METRIC_FIELDS}
+        extra = {name: self.columns[name][rows].tolist() for name in derived or ()}
+        reports = []
+        indices = range(*rows.indices(len(self))) if isinstance(rows, slice) else rows.tolist()
+        for offset, i in enumerate(indices):
+            fields = {
+                "quarter": self.quarters[i],
+                "year": self.years[i],
+                "financial_metrics": FinancialMetrics.model_construct(**_row(block, offset)),
+            }
+            if derived:
+                fields["derived_metrics"] = _row(extra, offset)
+            reports.append(QuarterlyReport.model_construct(**fields))
+        return reports
+
+
+def _row(block: Dict[str, list], offset: int) -> Dict[str, Optional[float]]:
+    return {name: optional_float(values[offset]) for name, values in block.items()}
@@ -0,0 +1,187 @@
+"""
+Compact binary snapshot of the processed financial reports.
+
+Layout (little-endian):
+
+    8 bytes   magic  b"CSEFIN01"
+    8 bytes   header length (uint64)
+    n bytes   header, UTF-8 JSON: row index, metric names, source files
+    padding   up to an 8-byte boundary
+    data      one float64 column of ``rows`` values per metric, in header order
+
+The data section can be memory-mapped and used as NumPy arrays without
+copying or parsing, so startup does not depend on the number of JSON files.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+from .financial_frame import FinancialFrame, METRIC_FIELDS, optional_float
+from .financial_store import FileSignature, FinancialStore, ReportKey
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CSEFIN01"
+SNAPSHOT_NAME = "financials.snapshot"
+
+# file name -> (signature, report key) of every JSON packed in a snapshot
+SnapshotFiles = Dict[str, Tuple[FileSignature, ReportKey]]
+
+
+def compile_snapshot(data_dir: Path, output_path: Optional[Path] = None) -> Path:
+    """Pack every processed report JSON in ``data_dir`` into one snapshot file."""
+    data_dir = Path(data_dir)
+    output_path = Path(output_path or data_dir / SNAPSHOT_NAME)
+    store = FinancialStore(data_dir)
+    _, reports, _ = store.snapshot()
+    frame = FinancialFrame.from_reports(reports)
+    row_of = {
+        key: i for i, key in enumerate(zip(frame.symbols, frame.years, frame.quarters))
+    }
+
+    header = {
+        "rows": len(frame),
+        "metrics": METRIC_FIELDS,
+        "symbols": frame.symbols,
+        "years": frame.years,
+        "quarters": frame.quarters,
+        "files": {
+            name: [*signature, row_of[store.file_key(name)]]
+            for name, signature in store.signatures().items()
+        },
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    padding = -(len(MAGIC) + 8 + len(header_bytes)) % 8
+
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        for name in METRIC_FIELDS:
+            f.write(np.ascontiguousarray(frame.columns[name], dtype="<f8").tobytes())
+    # Readers never see a half-written snapshot
+    os.replace(tmp_path, output_path)
+    logger.info(f"Wrote snapshot with {len(frame)} reports to {output_path}")
+    return output_path
+
+
+def load_snapshot(path: Path) -> Tuple[FinancialFrame, SnapshotFiles]:
+    """
+    Memory-map a snapshot. Metric columns are read-only views into the map.
+
+    Raises ValueError if the file is not a valid snapshot.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("bad magic bytes")
+        (header_size,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(buffer[header_start:header_start + header_size]))
+        offset = header_start + header_size
+        offset += -offset % 8
+
+        rows = header["rows"]
+        if offset + rows * 8 * len(header["metrics"]) > len(buffer):
+            raise ValueError("file is truncated")
+        columns = {}
+        for i, name in enumerate(header["metrics"]):
+            columns[name] = np.frombuffer(buffer, dtype="<f8", count=rows, offset=offset + i * rows * 8)
+        # Metrics added to the model after the snapshot was written
+        for name in METRIC_FIELDS:
+            if name not in columns:
+                columns[name] = np.full(rows, np.nan)
+    except (KeyError, TypeError, ValueError, struct.error) as e:
+        buffer.close()
+        raise ValueError(f"Invalid snapshot {path}: {str(e)}")
+
+    frame = FinancialFrame(header["symbols"], header["years"], header["quarters"], columns)
+    frame.buffer = buffer
+    keys = list(zip(header["symbols"], header["years"], header["quarters"]))
+    files = {
+        name: ((mtime_ns, ino, size), keys[row])
+        for name, (mtime_ns, ino, size, row) in header["files"].items()
+    }
+    return frame, files
+
+
+class FrameReports(MutableMapping):
+    """
+    Report dicts (for the store) backed by frame rows.
+
+    Nothing is copied up front: the key -> row index is built on first
+    lookup and a row's dict only when that report is read. Writes and
+    deletes are kept as an overlay on top of the frame.
+    """
+
+    def __init__(self, frame: FinancialFrame):
+        self._frame = frame
+        self._row_of: Optional[Dict[ReportKey, int]] = None
+        self._overlay: Dict[ReportKey, Dict] = {}
+        self._deleted: Set[ReportKey] = set()
+
+    def _rows(self) -> Dict[ReportKey, int]:
+        if self._row_of is None:
+            frame = self._frame
+            self._row_of = {key: i for i, key in enumerate(zip(frame.symbols, frame.years, frame.quarters))}
+        return self._row_of
+
+    def _materialise(self, key: ReportKey, row: int) -> Dict:
+        report = {
+            "year": key[1],
+            "quarter": key[2],
+            "financial_metrics": {
+                name: optional_float(self._frame.columns[name][row]) for name in METRIC_FIELDS
+            },
+        }
+        self._overlay[key] = report
+        return report
+
+    def __getitem__(self, key: ReportKey) -> Dict:
+        if key in self._overlay:
+            return self._overlay[key]
+        row = self._rows().get(key)
+        if row is None or key in self._deleted:
+            raise KeyError(key)
+        return self._materialise(key, row)
+
+    def __contains__(self, key) -> bool:
+        return key in self._overlay or (key in self._rows() and key not in self._deleted)
+
+    def __setitem__(self, key: ReportKey, report: Dict) -> None:
+        self._overlay[key] = report
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: ReportKey) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._overlay.pop(key, None)
+        if key in self._rows():
+            self._deleted.add(key)
+
+    def __iter__(self) -> Iterator[ReportKey]:
+        yield from self._overlay
+        for key in self._rows():
+            if key not in self._overlay and key not in self._deleted:
+                yield key
+
+    def __len__(self) -> int:
+        rows = self._rows()
+        return len(self._overlay) + sum(
+            1 for key in rows if key not in self._overlay and key not in self._deleted
+        )
+
+
+def reports_from_frame(frame: FinancialFrame) -> FrameReports:
+    """Lazy report dicts (for the store) over frame rows."""
+    return FrameReports(frame)
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, MutableMapping, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (symbol, year, quarter), e.g. ("DIPD", "2024", "Q1")
+ReportKey = Tuple[str, str, str]
+# (st_mtime_ns, st_ino, st_size) used to detect changed files
+FileSignature = Tuple[int, int, int]
+
+
+class FinancialStore:
+    """
+    Resident, indexed copy of the processed quarterly report JSONs.
+
+    Files are parsed once and kept in memory, indexed by (symbol, year, quarter).
+    A refresh only stats the directory; a file is re-read only when its
+    mtime/inode/size signature changes, so new extractor output shows up
+    without a restart and without re-parsing everything.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        refresh_interval: float = 1.0,
+        preloaded: Optional[Tuple[Dict[str, Tuple[FileSignature, ReportKey]], MutableMapping[ReportKey, Dict]]] = None,
+    ):
+        self.data_dir = Path(data_dir)
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self._signatures: Dict[str, FileSignature] = {}
+        self._file_keys: Dict[str, ReportKey] = {}
+        self._reports: MutableMapping[ReportKey, Dict] = {}
+        self._symbol_keys: Dict[str, Set[ReportKey]] = {}
+        self._latest: Dict[str, Tuple[str, str]] = {}
+        self._symbol_versions: Dict[str, int] = {}
+        self._symbol_mtimes: Dict[str, float] = {}
+        # (store version, symbols) -> fingerprint, dropped when the version moves on
+        self._fingerprints: Dict[Tuple[int, Optional[Tuple[str, ...]]], str] = {}
+        if preloaded:
+            self._seed(*preloaded)
+        self.refresh(force=True)
+
+    def _seed(self, files: Dict[str, Tuple[FileSignature, ReportKey]], reports: MutableMapping[ReportKey, Dict]) -> None:
+        """
+        Start from already-parsed reports (e.g. a binary snapshot) instead of
+        reading every file; the first refresh then only re-reads files whose
+        signature differs from the one recorded with them.
+
+        ``reports`` is adopted as-is, so a lazy mapping (a snapshot's
+        ``FrameReports``) stays lazy until reports are actually read.
+        """
+        self._reports = reports
+        for name, (signature, key) in files.items():
+            if key not in reports:
+                continue
+            self._signatures[name] = signature
+            self._file_keys[name] = key
+            self._symbol_keys.setdefault(key[0], set()).add(key)
+        self.version = 1
+        self._symbol_versions = {symbol: self.version for symbol in self._symbol_keys}
+        self._update_latest(set(self._symbol_keys))
+
+    @staticmethod
+    def _symbol_from_filename(name: str) -> str:
+        return name.split('_')[0]
+
+    def _scan(self) -> Dict[str, FileSignature]:
+        signatures = {}
+        try:
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json') or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    signatures[entry.name] = (st.st_mtime_ns, st.st_ino, st.st_size)
+        except FileNotFoundError:
+            logger.warning(f"Data directory not found: {self.data_dir}")
+        return signatures
+
+    def _read_json_file(self, file_path: Path) -> Optional[Dict]:
+        try:
+            with open(file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            # A file may be caught mid-write by the extractor; it is picked up
+            # again on the next refresh once its signature changes.
+            logger.warning(f"Could not read {file_path.name}: {str(e)}")
+            return None
+
+    def _drop_file(self, name: str) -> Optional[str]:
+        self._signatures.pop(name, None)
+        key = self._file_keys.pop(name, None)
+        if key is None:
+            return None
+        if key in self._file_keys.values():
+            # Another file still provides this report
+            return key[0]
+        self._reports.pop(key, None)
+        keys = self._symbol_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._symbol_keys[key[0]]
+        return key[0]
+
+    def _load_file(self, name: str, signature: FileSignature) -> Optional[str]:
+        data = self._read_json_file(self.data_dir / name)
+        if data is None or 'year' not in data or 'quarter' not in data:
+            return None
+        symbol = self._symbol_from_filename(name)
+        key = (symbol, str(data['year']), str(data['quarter']))
+        self._signatures[name] = signature
+        self._file_keys[name] = key
+        self._reports[key] = data
+        self._symbol_keys.setdefault(symbol, set()).add(key)
+        return symbol
+
+    def _update_latest(self, symbols: Set[str]) -> None:
+        mtimes: Dict[str, int] = {}
+        for name, key in self._file_keys.items():
+            if key[0] in symbols:
+                mtimes[key[0]] = max(mtimes.get(key[0], 0), self._signatures[name][0])
+        for symbol in symbols:
+            keys = self._symbol_keys.get(symbol)
+            if not keys:
+                self._latest.pop(symbol, None)
+                self._symbol_mtimes.pop(symbol, None)
+                continue
+            _, year, quarter = max(keys, key=lambda k: (k[1], k[2]))
+            self._latest[symbol] = (year, quarter)
+            self._symbol_mtimes[symbol] = mtimes.get(symbol, 0) / 1e9
+
+    def refresh(self, force: bool = False) -> Set[str]:
+        """
+        Pick up added, changed and removed files.
+
+        Returns the set of symbols whose reports changed. Unless ``force`` is
+        set, the directory is stat'ed at most once per ``refresh_interval``.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return set()
+
+        with self._lock:
+            # Another thread may have rescanned while this one waited for the
+            # lock; concurrent refreshes then collapse into that one scan
+            if not force and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return set()
+            self._last_refresh = now
+            current = self._scan()
+            changed: Set[str] = set()
+
+            for name in list(self._signatures):
+                if name not in current:
+                    symbol = self._drop_file(name)
+                    if symbol:
+                        changed.add(symbol)
+
+            for name, signature in current.items():
+                if self._signatures.get(name) == signature:
+                    continue
+                old_symbol = self._drop_file(name)
+                if old_symbol:
+                    changed.add(old_symbol)
+                new_symbol = self._load_file(name, signature)
+                if new_symbol:
+                    changed.add(new_symbol)
+
+            if changed:
+                self._update_latest(changed)
+                self.version += 1
+                for symbol in changed:
+                    self._symbol_versions[symbol] = self.version
+                logger.info(
+                    f"Financial store refreshed (version {self.version}): {sorted(changed)}"
+                )
+            return changed
+
+    def signatures(self) -> Dict[str, FileSignature]:
+        """Signature of every report file currently loaded."""
+        with self._lock:
+            return dict(self._signatures)
+
+    def file_key(self, name: str) -> Optional[ReportKey]:
+        return self._file_keys.get(name)
+
+    def symbols(self) -> List[str]:
+        self.refresh()
+        return sorted(self._symbol_keys)
+
+    def has_symbol(self, symbol: str) -> bool:
+        self.refresh()
+        return symbol in self._symbol_keys
+
+    def latest(self) -> Dict[str, Tuple[str, str]]:
+        """Latest (year, quarter) per symbol."""
+        self.refresh()
+        return dict(self._latest)
+
+    def symbol_versions(self) -> Dict[str, int]:
+        """Store version at which each symbol's reports last changed."""
+        self.refresh()
+        return dict(self._symbol_versions)
+
+    def fingerprint(self, symbols: Optional[Sequence[str]] = None) -> str:
+        """
+        Digest of the (name, mtime_ns, size) of every file behind ``symbols``
+        (default: all). Unlike ``version``, which counts refreshes in this
+        process, it depends only on the files, so it is the same after a
+        restart and in every worker serving the same data directory.
+        """
+        self.refresh()
+        with self._lock:
+            key = (self.version, tuple(symbols) if symbols is not None else None)
+            fingerprint = self._fingerprints.get(key)
+            if fingerprint is None:
+                wanted = set(symbols) if symbols is not None else None
+                files = sorted(
+                    (name, signature[0], signature[2])
+                    for name, signature in self._signatures.items()
+                    if wanted is None or self._file_keys[name][0] in wanted
+                )
+                fingerprint = hashlib.sha1(repr(files).encode("utf-8")).hexdigest()[:20]
+                if len(self._fingerprints) >= 1024 or any(v != self.version for v, _ in self._fingerprints):
+                    self._fingerprints.clear()
+                self._fingerprints[key] = fingerprint
+            return fingerprint
+
+    def last_modified(self, symbols: Optional[Sequence[str]] = None) -> float:
+        """Newest file mtime (epoch seconds) for the given symbols, or for all."""
+        self.refresh()
+        mtimes = self._symbol_mtimes
+        if symbols is None:
+            return max(mtimes.values(), default=0.0)
+        return max((mtimes.get(s, 0.0) for s in symbols), default=0.0)
+
+    def get(self, symbol: str, year: str, quarter: str) -> Optional[Dict]:
+        self.refresh()
+        return self._reports.get((symbol, year, quarter))
+
+    def snapshot(self) -> Tuple[int, List[Tuple[ReportKey, Dict]], Dict[str, int]]:
+        """
+        Consistent view of the store: its version, every (key, report) pair
+        and the version at which each symbol last changed.
+        """
+        self.refresh()
+        with self._lock:
+            return self.version, list(self._reports.items()), dict(self._symbol_versions)
+
+    def get_company_reports(self, symbol: str, year: Optional[str] = None) -> List[Dict]:
+        """Raw report dicts for a symbol, sorted by (year, quarter)."""
+        self.refresh()
+        with self._lock:
+            keys = sorted(
+                k for k in self._symbol_keys.get(symbol, ())
+                if year is None or k[1] == year
+            )
+            return [self._reports[k] for k in keys]
@@ -0,0 +1,55 @@
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import Request
+
+# Browsers and CDNs may reuse a response for this long, then revalidate
+# with If-None-Match / If-Modified-Since and usually get a cheap 304.
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "60"))
+CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag derived from the data version and anything that shapes the response."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def cache_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Evaluate conditional GET headers; If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(last_modified) <= since
+    return False
+
@@ -1,13 +1,18 @@
 import os
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import StructuredTool
 from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.memory import ConversationBufferMemory
 from dotenv import load_dotenv
 import logging
 import httpx
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
+from app.services.answer_cache import AnswerCache, numeric_anchors
+from app.services.data_service import data_service
+from app.services.offload import data_offload
+from app.services.query_router import parse_query, try_fast_answer
+from app.services.report_text import report_index
+from app.services.session_memory import SessionMemoryStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,42 +29,115 @@ if not api_key:
 # Initialize LangChain components
 llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, api_key=api_key)
 
-# Initialize conversation memory
-memory = ConversationBufferMemory(
-    memory_key="chat_history",
-    return_messages=True,
-    output_key="output",
-    max_token_limit=2000,  # Limit total tokens in memory
-    k=10,  # Keep only the last 10 messages
+# Answers to self-contained questions, reused until the financial data changes.
+# ANSWER_CACHE_SEMANTIC=1 also matches differently worded questions by embedding
+# similarity (costs one embedding call per cache lookup miss).
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+    embed=(
+        OpenAIEmbeddings(api_key=api_key).embed_query
+        if os.getenv("ANSWER_CACHE_SEMANTIC") == "1"
+        else None
+    ),
+    anchors=lambda key: numeric_anchors(key) | _symbol_tokens(key),
+)
+
+# Simple lookups ("REXP net income Q2 2023") are answered straight from the
+# data without calling the LLM; set CHAT_FAST_PATH=0 to always use the agent
+fast_path_enabled = os.getenv("CHAT_FAST_PATH", "1") != "0"
+
+# Conversation memory per chat session, with a token budget per session,
+# idle expiry and a cap on the number of sessions kept
+session_store = SessionMemoryStore(
+    llm,
+    max_token_limit=int(os.getenv("CHAT_MEMORY_MAX_TOKENS", "2000")),
+    ttl_seconds=float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800")),
+    max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "1000")),
 )
 
 
 class CompanyDataTool:
+    """
+    Financial data access for the agent.
+
+    By default reads straight from the shared in-process DataService. Set
+    COMPANY_DATA_MODE=remote to fetch from another API instance instead, over
+    one pooled, long-lived HTTP client.
+    """
+
     def __init__(self):
-        self.base_url = (
-            "http://localhost:8000/api"  # FastAPI server URL with /api prefix
+        self.mode = os.getenv("COMPANY_DATA_MODE", "local").lower()
+        self.base_url = os.getenv(
+            "COMPANY_DATA_API_URL", "http://localhost:8000/api"  # FastAPI server URL with /api prefix
         )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_company_data(
         self, symbol: str, year: Optional[str] = None
     ) -> List[Dict]:
-        """Fetch company financial data from the API"""
+        """Fetch company financial data"""
+        symbol = symbol.strip().upper()
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.base_url}/companies/{symbol}/financials"
-                if year:
-                    url += f"?year={year}"
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.json()
+            if self.mode == "remote":
+                return await self._fetch_remote(symbol, year)
+            # Reads can rescan the data directory; keep them off the event loop
+            return await data_offload.run(self._read_local, symbol, year)
         except Exception as e:
             logger.error(f"Error fetching company data: {str(e)}")
             return []
 
+    def _read_local(self, symbol: str, year: Optional[str]) -> List[Dict]:
+        if not data_service.has_company(symbol):
+            logger.warning(f"Company {symbol} not found")
+            return []
+        reports = data_service.get_company_financials(symbol, year)
+        return [report.model_dump(exclude_unset=True) for report in reports]
+
+    async def _fetch_remote(self, symbol: str, year: Optional[str]) -> List[Dict]:
+        params = {"year": year} if year else None
+        response = await self._get_client().get(f"/companies/{symbol}/financials", params=params)
+        response.raise_for_status()
+        return response.json()
+
 
 # Initialize the company data tool
 company_tool = CompanyDataTool()
 
+
+async def search_report_text(
+    query: str,
+    symbol: Optional[str] = None,
+    year: Optional[str] = None,
+    quarter: Optional[str] = None,
+    top_k: int = 4,
+) -> List[Dict]:
+    """Search the indexed quarterly report text"""
+    try:
+        results = await data_offload.run(report_index.search_reports, query, symbol, year, quarter, top_k)
+        return [
+            {"text": result["text"], **{key: result["metadata"].get(key) for key in ("symbol", "year", "quarter", "page")}}
+            for result in results
+        ]
+    except Exception as e:
+        logger.error(f"Error searching report text: {str(e)}")
+        return []
+
+
 # Define the tools
 tools = [
     StructuredTool.from_function(
@@ -69,7 +147,16 @@ tools = [
         Input should be a JSON string with 'symbol' (DIPD or REXP) and optional 'year'.
         Example: {"symbol": "DIPD", "year": "2023"}""",
         coroutine=company_tool.get_company_data,
-    )
+    ),
+    StructuredTool.from_function(
+        func=search_report_text,
+        name="search_report_text",
+        description="""Use this tool to find passages in the quarterly reports themselves, e.g. management
+        commentary, reasons behind a change or items not covered by get_company_financials.
+        Input should be a JSON string with 'query' and optional 'symbol', 'year', 'quarter' (Q1-Q4) and 'top_k'.
+        Example: {"query": "reasons for lower gross margin", "symbol": "REXP", "year": "2024", "quarter": "Q2"}""",
+        coroutine=search_report_text,
+    ),
 ]
 
 # Define the prompt template
@@ -106,13 +193,15 @@ prompt = ChatPromptTemplate.from_messages(
     - If comparing companies, highlight key differences
     - If information is not available, clearly state that
     - For questions about specific quarters, fetch the relevant data using the tool
+    - For questions about commentary or the reasons behind the numbers, use the search_report_text tool and base your answer on the passages it returns
     - When asked for investment advice (e.g., 'which company is better to invest in?', 'should I invest in DIPD or REXP?', 'what\\'s a good investment?'), first use the `get_company_financials` tool to fetch recent data for BOTH DIPD and REXP. Then, provide a comparative analysis based *solely* on this fetched financial data. Based on this analysis, you can offer an interpretation of which company *appears* to exhibit more favorable trends or stronger key performance indicators from an investment perspective, clearly stating this is based on past data. Always conclude with a strong disclaimer: 'Please remember, this is not professional financial advice. These observations are based on past financial data and do not guarantee future performance. You should consult with a qualified financial advisor before making any investment decisions.' Avoid definitive predictions or speculative statements not directly and clearly supported by the comparative financial data.
     
     Available companies: DIPD, REXP
     Available quarters: Q1-Q4 (2023-2024)""",
         ),
+        MessagesPlaceholder(variable_name="chat_history", optional=True),
         ("human", "{input}"),
-        ("ai", "{agent_scratchpad}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
     ]
 )
 
@@ -124,22 +213,148 @@ agent_executor = AgentExecutor(
     verbose=True,
     handle_parsing_errors=True,
     max_iterations=10,
-    memory=memory,
 )
 
 
-async def get_llm_response(message: str) -> str:
+async def get_llm_response(message: str, session_id: Optional[str] = None) -> str:
     """
     Get a response from the LLM model based on the user's message.
     Focus on CSE financial insights for DIPD and REXP.
+    Turns with the same ``session_id`` share conversation history; without one
+    the question is answered without history.
     """
     try:
         logger.info(f"Processing message: {message}")
-        response = await agent_executor.ainvoke({"input": message})
-        logger.info(f"Agent response: {response}")
-        return response["output"]
+        if session_id is None:
+            return await _answer(message, [])
+        session = session_store.get(session_id)
+        async with session.lock:
+            answer = await _answer(message, session.history())
+            await _save_turn(session, message, answer)
+        return answer
     except Exception as e:
         logger.error(f"Error in get_llm_response: {str(e)}")
         logger.error(f"Error type: {type(e)}")
         logger.error(f"Error details: {str(e)}")
         return "I encountered an error while processing your request. Please try again."
+
+
+async def stream_llm_response(message: str, session_id: Optional[str] = None) -> AsyncIterator[Dict]:
+    """
+    Run the agent and yield progress events as they happen:
+    ``tool_start`` / ``tool_end`` around each tool call, ``token`` for each
+    chunk of the answer, then a final ``done`` (or ``error``) event.
+    """
+    if session_id is None:
+        async for event in _stream_answer(message, []):
+            yield event
+        return
+    session = session_store.get(session_id)
+    async with session.lock:
+        async for event in _stream_answer(message, session.history()):
+            if event["type"] == "done":
+                await _save_turn(session, message, event["response"])
+            yield event
+
+
+async def _save_turn(session, message: str, answer: str) -> None:
+    # Saving prunes history by token count, which may load the tokenizer
+    # (a download on first use); keep it off the event loop and never let a
+    # failure here cost the user an answer that is already computed
+    try:
+        await data_offload.run(session.save, message, answer)
+    except Exception as e:
+        logger.error(f"Could not save chat history: {str(e)}")
+
+
+def _is_cacheable(message: str, history: List) -> bool:
+    # Follow-ups like "and for REXP?" depend on the conversation, even when
+    # they name a company. Within a conversation only a question that states
+    # the company, metric and period itself is shared with other sessions.
+    if not history:
+        return True
+    query = parse_query(message, data_service.store.symbols())
+    return query is not None and query.year is not None
+
+
+def _symbol_tokens(key: str) -> FrozenSet[str]:
+    symbols = {symbol.lower() for symbol in data_service.store.symbols()}
+    return frozenset(token for token in key.split() if token in symbols)
+
+
+def _agent_inputs(message: str, history: List) -> Dict:
+    inputs = {"input": message}
+    if history:
+        inputs["chat_history"] = history
+    return inputs
+
+
+def _fast_answer(message: str) -> Optional[str]:
+    return try_fast_answer(message, data_service) if fast_path_enabled else None
+
+
+def _cache_context(message: str, history: List) -> Tuple[int, bool]:
+    return data_service.version, _is_cacheable(message, history)
+
+
+async def _answer(message: str, history: List) -> str:
+    fast = await data_offload.run(_fast_answer, message)
+    if fast is not None:
+        return fast
+    version, cacheable = await data_offload.run(_cache_context, message, history)
+    if cacheable:
+        cached = await data_offload.run(answer_cache.get, message, version)
+        if cached is not None:
+            logger.info("Answered from cache")
+            return cached
+    response = await agent_executor.ainvoke(_agent_inputs(message, history))
+    logger.info(f"Agent response: {response}")
+    if cacheable:
+        await data_offload.run(answer_cache.put, message, version, response["output"])
+    return response["output"]
+
+
+async def _stream_answer(message: str, history: List) -> AsyncIterator[Dict]:
+    fast = await data_offload.run(_fast_answer, message)
+    if fast is not None:
+        yield {"type": "token", "content": fast}
+        yield {"type": "done", "response": fast}
+        return
+    version, cacheable = await data_offload.run(_cache_context, message, history)
+    if cacheable:
+        cached = await data_offload.run(answer_cache.get, message, version)
+        if cached is not None:
+            logger.info("Answered from cache")
+            yield {"type": "token", "content": cached}
+            yield {"type": "done", "response": cached}
+            return
+    async for event in _stream_agent(_agent_inputs(message, history)):
+        if event["type"] == "done" and cacheable and event["response"]:
+            await data_offload.run(answer_cache.put, message, version, event["response"])
+        yield event
+
+
+async def _stream_agent(inputs: Dict) -> AsyncIterator[Dict]:
+    try:
+        logger.info(f"Streaming message: {inputs['input']}")
+        output = None
+        async for event in agent_executor.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    yield {"type": "token", "content": content}
+            elif kind == "on_tool_start":
+                yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+            elif kind == "on_tool_end":
+                yield {"type": "tool_end", "tool": event["name"]}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # End of the top-level agent run
+                output = (event["data"].get("output") or {}).get("output")
+        yield {"type": "done", "response": output or ""}
+    except Exception as e:
+        logger.error(f"Error in stream_llm_response: {str(e)}")
+        yield {
+            "type": "error",
+            "response": "I encountered an error while processing your request. Please try again.",
+        }
@@ -0,0 +1,76 @@
+import asyncio
+import functools
+import os
+import weakref
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+import anyio
+from anyio import to_thread
+
+T = TypeVar("T")
+
+
+class _LoopState:
+    def __init__(self, max_threads: int):
+        self.limiter = anyio.CapacityLimiter(max_threads)
+        self.in_flight: Dict[Hashable, asyncio.Task] = {}
+
+
+class BlockingOffload:
+    """
+    Runs blocking data access (directory scans, JSON parsing, frame builds,
+    response encoding) on a bounded pool of worker threads so the event loop
+    keeps serving other requests.
+
+    ``run_once`` also coalesces concurrent calls with the same key into a
+    single execution whose result every caller shares (single-flight).
+    """
+
+    def __init__(self, max_threads: int = 8):
+        self.max_threads = max_threads
+        # Limiters and in-flight tasks belong to one event loop
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_threads)
+        return state
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Call ``func(*args)`` on a worker thread."""
+        return await to_thread.run_sync(functools.partial(func, *args), limiter=self._state().limiter)
+
+    async def run_once(self, key: Hashable, func: Callable[..., T], *args: Any) -> T:
+        """
+        Like ``run``, but callers arriving while a call with the same ``key``
+        is in flight wait for that call instead of starting their own.
+        """
+        state = self._state()
+        task = state.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.run(func, *args))
+            state.in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, state, key))
+        # A cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finished(state: _LoopState, key: Hashable, task: asyncio.Task) -> None:
+        state.in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark the error as retrieved even if every waiter was cancelled
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Coalesced calls currently running on this event loop."""
+        return len(self._state().in_flight)
+
+
+# Shared by the API routes and the chat agent; DATA_WORKER_THREADS bounds how
+# many blocking data calls run at once
+data_offload = BlockingOffload(max_threads=int(os.getenv("DATA_WORKER_THREADS", "8")))
@@ -0,0 +1,272 @@
+"""
+Deterministic answers for simple, structured financial questions.
+
+Questions such as "what was REXP net income in Q2 2023" or "compare DIPD and
+REXP revenue for 2024" are parsed into symbols, metrics and a period and
+answered straight from the data layer. Anything open-ended (why, should I
+invest, trends, ...) or not fully understood is left to the LLM agent: a
+question is only answered here when every word in it is accounted for.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .answer_cache import normalize_question
+from .data_service import DataService
+
+logger = logging.getLogger(__name__)
+
+COMPANY_ALIASES = {
+    "dipped products": "DIPD",
+    "richard pieris exports": "REXP",
+    "richard pieris": "REXP",
+}
+
+# Phrase -> metric, longest phrases first so "gross profit" wins over "profit"
+METRIC_PHRASES = [
+    ("profit before tax", "profit_before_tax"),
+    ("profit after tax", "net_income"),
+    ("cost of goods sold", "cost_of_goods_sold"),
+    ("cost of sales", "cost_of_goods_sold"),
+    ("administrative expenses", "administrative_expenses"),
+    ("admin expenses", "administrative_expenses"),
+    ("distribution costs", "distribution_costs"),
+    ("distribution expenses", "distribution_costs"),
+    ("earnings per share", "eps_basic"),
+    ("dividend per share", "dividend_per_share"),
+    ("operating income", "operating_income"),
+    ("operating profit", "operating_income"),
+    ("operating margin", "operating_margin"),
+    ("gross profit", "gross_profit"),
+    ("gross margin", "gross_margin"),
+    ("net income", "net_income"),
+    ("net profit", "net_income"),
+    ("net margin", "net_margin"),
+    ("finance costs", "finance_costs"),
+    ("finance income", "finance_income"),
+    ("other income", "other_income"),
+    ("tax expense", "tax_expense"),
+    ("diluted eps", "eps_diluted"),
+    ("turnover", "revenue"),
+    ("revenue", "revenue"),
+    ("sales", "revenue"),
+    ("cogs", "cost_of_goods_sold"),
+    ("pbt", "profit_before_tax"),
+    ("eps", "eps_basic"),
+    ("dps", "dividend_per_share"),
+    ("profit", "net_income"),
+]
+
+METRIC_LABELS = {
+    "revenue": "revenue",
+    "cost_of_goods_sold": "cost of goods sold",
+    "gross_profit": "gross profit",
+    "other_income": "other income",
+    "distribution_costs": "distribution costs",
+    "administrative_expenses": "administrative expenses",
+    "operating_income": "operating income",
+    "finance_costs": "finance costs",
+    "finance_income": "finance income",
+    "profit_before_tax": "profit before tax",
+    "tax_expense": "tax expense",
+    "net_income": "net income",
+    "eps_basic": "EPS (basic)",
+    "eps_diluted": "EPS (diluted)",
+    "dividend_per_share": "dividend per share",
+    "gross_margin": "gross margin",
+    "operating_margin": "operating margin",
+    "net_margin": "net margin",
+}
+
+PER_SHARE_METRICS = {"eps_basic", "eps_diluted", "dividend_per_share"}
+RATIO_METRICS = {"gross_margin", "operating_margin", "net_margin"}
+
+# Words that signal an open-ended question the agent should handle
+OPEN_ENDED_WORDS = {
+    "why", "should", "invest", "investing", "investment", "better", "best", "worse",
+    "recommend", "advice", "advise", "explain", "reason", "trend", "trends", "outlook",
+    "predict", "forecast", "future", "analysis", "analyze", "analyse", "insight",
+    "insights", "think", "opinion", "good", "bad", "risk", "growth",
+}
+
+COMPARE_WORDS = {"compare", "comparison", "versus", "vs", "between"}
+
+# Words that can surround a lookup without changing what is asked. Anything
+# else left over ("last 4 quarters", "first half", "9 months", "yoy change",
+# "margins", "fy") qualifies the question in a way the templates don't cover.
+FILLER_WORDS = {
+    "what", "whats", "s", "was", "were", "is", "are", "the", "a", "an", "of", "for", "in",
+    "on", "during", "and", "with", "to", "from", "by", "me", "i", "you", "can", "could",
+    "please", "show", "give", "tell", "get", "find", "list", "see", "know", "want",
+    "how", "much", "did", "does", "do", "have", "has", "had", "make", "made", "earn",
+    "earned", "report", "reported", "record", "recorded", "post", "posted", "generate",
+    "generated", "its", "their", "both", "each", "company", "companies", "plc", "ltd",
+    "limited", "figure", "figures", "number", "numbers", "value", "amount", "total",
+    "year", "latest", "recent", "most", "current",
+}
+
+YEAR_PATTERN = re.compile(r"20\d{2}")
+QUARTER_PATTERN = re.compile(r"q([1-4])")
+
+
+@dataclass
+class ParsedQuery:
+    symbols: List[str]
+    metrics: List[str]
+    year: Optional[str] = None
+    quarter: Optional[str] = None
+    compare: bool = False
+
+
+def parse_query(message: str, known_symbols: Sequence[str]) -> Optional[ParsedQuery]:
+    """Parse a structured lookup/comparison question, or return None."""
+    # "fourth quarter of 2024" and "Q4-2024" both become "q4 2024"
+    text = normalize_question(message)
+    words = set(text.split())
+    if words & OPEN_ENDED_WORDS:
+        return None
+
+    symbols = [s for s in known_symbols if s.lower() in words]
+    remaining = f" {text} "
+    for alias, symbol in COMPANY_ALIASES.items():
+        if f" {alias} " in remaining and symbol in known_symbols:
+            if symbol not in symbols:
+                symbols.append(symbol)
+            remaining = remaining.replace(f" {alias} ", " ")
+    if not symbols:
+        return None
+
+    metrics = []
+    for phrase, metric in METRIC_PHRASES:
+        if f" {phrase} " in remaining:
+            if metric not in metrics:
+                metrics.append(metric)
+            remaining = remaining.replace(f" {phrase} ", " ")
+    if not metrics:
+        return None
+
+    symbol_words = {s.lower() for s in symbols}
+    years, quarters = [], []
+    for word in remaining.split():
+        quarter_match = QUARTER_PATTERN.fullmatch(word)
+        if YEAR_PATTERN.fullmatch(word):
+            years.append(word)
+        elif quarter_match:
+            quarters.append(quarter_match.group(1))
+        elif word not in symbol_words and word not in FILLER_WORDS and word not in COMPARE_WORDS:
+            return None  # an unrecognised qualifier, e.g. "profit margins"
+
+    year = quarter = None
+    if len(set(years)) > 1 or len(set(quarters)) > 1:
+        return None  # ranges and multi-period questions go to the agent
+    if years:
+        year = years[0]
+    if quarters:
+        if not year:
+            return None  # "Q2" without a year is ambiguous
+        quarter = f"Q{quarters[0]}"
+
+    return ParsedQuery(
+        symbols=symbols,
+        metrics=metrics,
+        year=year,
+        quarter=quarter,
+        compare=len(symbols) > 1 or bool(words & COMPARE_WORDS),
+    )
+
+
+def format_value(metric: str, value: Optional[float]) -> str:
+    if value is None or np.isnan(value):
+        return "not available"
+    if metric in RATIO_METRICS:
+        return f"{value * 100:.1f}%"
+    if metric in PER_SHARE_METRICS:
+        return f"LKR {value:,.2f}"
+    return f"LKR {value:,.0f}"
+
+
+def _period_label(year: str, quarter: str) -> str:
+    return f"{quarter} {year}"
+
+
+def answer_query(query: ParsedQuery, data_service: DataService) -> Optional[str]:
+    """Build a templated answer from the data, or None if there is nothing to say."""
+    start = end = None
+    if query.year:
+        start = end = f"{query.year}-{query.quarter}" if query.quarter else query.year
+
+    lines = []
+    # metric -> symbol -> (value, periods it covers); only like periods are ranked
+    totals: Dict[str, Dict[str, Tuple[float, Tuple[int, ...]]]] = {}
+    for symbol in query.symbols:
+        series = data_service.get_company_series(symbol, start, end, query.metrics)
+        periods = series["period"]
+        if len(periods) == 0:
+            when = ""
+            if query.year:
+                when = f" for {_period_label(query.year, query.quarter) if query.quarter else query.year}"
+            lines.append(f"No financial data is available for {symbol}{when}.")
+            continue
+        labels = [_period_label(str(p // 4), f"Q{p % 4 + 1}") for p in periods.tolist()]
+
+        for metric in query.metrics:
+            values = series[metric]
+            label = METRIC_LABELS.get(metric, metric)
+            if query.year is None or query.quarter:
+                # Single quarter: the one asked for, or the latest available
+                lines.append(f"{symbol} {label} for {labels[-1]}: {format_value(metric, values[-1])}")
+                totals.setdefault(metric, {})[symbol] = (values[-1], (int(periods[-1]),))
+                continue
+            # Whole year: every quarter, plus the total for amounts
+            lines.append(f"{symbol} {label} in {query.year}:")
+            for period_label, value in zip(labels, values.tolist()):
+                lines.append(f"- {period_label}: {format_value(metric, value)}")
+            if metric not in RATIO_METRICS and not np.isnan(values).any():
+                total = float(values.sum())
+                count = len(values)
+                suffix = "" if count == 4 else f" ({count} quarter{'s' if count > 1 else ''} reported)"
+                lines.append(f"- Total: {format_value(metric, total)}{suffix}")
+                totals.setdefault(metric, {})[symbol] = (total, tuple(periods.tolist()))
+
+    if query.compare:
+        for metric, by_symbol in totals.items():
+            valid = {s: v for s, v in by_symbol.items() if not np.isnan(v[0])}
+            if len(valid) < 2:
+                continue
+            label = METRIC_LABELS.get(metric, metric)
+            if len({covered for _, covered in valid.values()}) > 1:
+                # e.g. a full year against one quarter, or Q4 against Q1
+                lines.append(f"The {label} figures cover different quarters, so they are not ranked.")
+                continue
+            ranked = sorted(((s, v) for s, (v, _) in valid.items()), key=lambda item: item[1], reverse=True)
+            (top, top_value), (second, second_value) = ranked[0], ranked[1]
+            if metric in RATIO_METRICS:
+                gap = f"{(top_value - second_value) * 100:.1f} percentage points"
+            else:
+                gap = format_value(metric, top_value - second_value)
+            lines.append(f"{top} had the higher {label}, by {gap} over {second}.")
+
+    if not lines:
+        return None
+    if totals and any(metric not in PER_SHARE_METRICS | RATIO_METRICS for metric in query.metrics):
+        lines.append("All amounts are in Sri Lankan Rupees (LKR).")
+    return "\n".join(lines)
+
+
+def try_fast_answer(message: str, data_service: DataService) -> Optional[str]:
+    """Answer ``message`` directly if it is a structured lookup, else None."""
+    try:
+        query = parse_query(message, data_service.store.symbols())
+        if query is None:
+            return None
+        answer = answer_query(query, data_service)
+        if answer:
+            logger.info(f"Answered by fast path: {query}")
+        return answer
+    except Exception as e:
+        # Never let the fast path break chat; the agent can still answer
+        logger.warning(f"Fast path failed, falling back to agent: {str(e)}")
+        return None
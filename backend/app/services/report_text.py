@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import re
+import textwrap
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from pypdf import PdfReader
+
+from .document_service import Document, DocumentService, IndexStats
+
+logger = logging.getLogger(__name__)
+
+QUARTER_BY_MONTH = {3: "Q1", 6: "Q2", 9: "Q3", 12: "Q4"}
+
+# Report PDFs are saved as SYMBOL_YYYY_MM_DD.pdf (quarter-end date)
+REPORT_FILENAME = re.compile(r"^([A-Z0-9]+)_(\d{4})_(\d{2})_\d{2}$")
+
+
+def report_period(path: Path) -> Optional[Dict[str, str]]:
+    """Symbol, year and quarter encoded in a report PDF's file name."""
+    match = REPORT_FILENAME.match(Path(path).stem)
+    if not match or int(match.group(3)) not in QUARTER_BY_MONTH:
+        return None
+    return {
+        "symbol": match.group(1),
+        "year": match.group(2),
+        "quarter": QUARTER_BY_MONTH[int(match.group(3))],
+    }
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    """
+    Split text into chunks of about ``chunk_size`` characters on line
+    boundaries, repeating up to ``overlap`` characters of trailing lines at
+    the start of the next chunk. Lines longer than ``chunk_size`` are first
+    wrapped at word boundaries.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        lines.extend(textwrap.wrap(line, chunk_size, break_on_hyphens=False) if len(line) > chunk_size else [line])
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for line in filter(None, lines):
+        if current and length + len(line) + 1 > chunk_size:
+            chunks.append("\n".join(current))
+            tail: List[str] = []
+            tail_length = 0
+            for previous in reversed(current):
+                if tail_length + len(previous) + 1 > overlap:
+                    break
+                tail.insert(0, previous)
+                tail_length += len(previous) + 1
+            current, length = tail, tail_length
+        current.append(line)
+        length += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def report_documents(path: Path, period: Dict[str, str], pdf_hash: str) -> List[Document]:
+    """
+    One document per chunk of each page of a report PDF.
+
+    A PDF without extractable text (e.g. a scan) gets a single placeholder
+    on page 0, so its hash is recorded and it isn't re-read every run.
+    """
+    report_id = f"{period['symbol']}_{period['year']}_{period['quarter']}"
+    header = f"{period['symbol']} {period['quarter']} {period['year']} quarterly report"
+    metadata = {**period, "report": report_id, "source": Path(path).name, "content_hash": pdf_hash}
+    documents = []
+    for page_num, page in enumerate(PdfReader(str(path)).pages, 1):
+        for i, chunk in enumerate(chunk_text(page.extract_text() or "")):
+            documents.append(
+                Document(
+                    id=f"{report_id}_p{page_num}_{i}",
+                    text=f"{header}, page {page_num}:\n{chunk}",
+                    metadata={**metadata, "page": page_num},
+                )
+            )
+    if not documents:
+        documents.append(
+            Document(id=f"{report_id}_empty", text=f"{header}: no extractable text", metadata={**metadata, "page": 0})
+        )
+    return documents
+
+
+class ReportTextIndex(DocumentService):
+    """Chunked report text in its own Chroma collection, searchable by symbol and period."""
+
+    def __init__(self, collection_name: str = "report_text", **kwargs):
+        super().__init__(collection_name=collection_name, **kwargs)
+
+    def _indexed_reports(self, report_ids: List[str]) -> Dict[str, Dict[str, set]]:
+        indexed: Dict[str, Dict[str, set]] = {}
+        for batch in self._batches(report_ids):
+            existing = self.collection.get(where={"report": {"$in": list(batch)}}, include=["metadatas"])
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"]):
+                entry = indexed.setdefault(metadata["report"], {"ids": set(), "hashes": set()})
+                entry["ids"].add(doc_id)
+                entry["hashes"].add(metadata.get("content_hash"))
+        return indexed
+
+    def index_pdfs(self, files: Iterable[Path], force: bool = False) -> IndexStats:
+        """
+        Index the text of report PDFs. A report is only re-read when its PDF
+        changed; chunks it no longer has are removed.
+        """
+        stats = IndexStats()
+        reports = {}
+        for path in files:
+            stats.files += 1
+            period = report_period(path)
+            if period is None:
+                stats.failed += 1
+                logger.warning(f"Skipping {path}: expected SYMBOL_YYYY_MM_DD.pdf")
+                continue
+            reports[f"{period['symbol']}_{period['year']}_{period['quarter']}"] = (path, period)
+
+        indexed = self._indexed_reports(list(reports))
+        documents: List[Document] = []
+        stale_ids: List[str] = []
+        for report_id, (path, period) in reports.items():
+            pdf_hash = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            existing = indexed.get(report_id, {"ids": set(), "hashes": set()})
+            if not force and existing["hashes"] == {pdf_hash}:
+                stats.skipped += 1
+                continue
+            try:
+                chunks = report_documents(path, period, pdf_hash)
+            except Exception as e:
+                stats.failed += 1
+                logger.error(f"Error reading {path}: {str(e)}")
+                continue
+            documents.extend(chunks)
+            stale_ids.extend(existing["ids"] - {doc.id for doc in chunks})
+            if chunks[0].metadata["page"] == 0:
+                stats.failed += 1
+                logger.warning(f"No extractable text in {path}")
+            else:
+                stats.indexed += 1
+
+        if stale_ids:
+            self.collection.delete(ids=stale_ids)
+        if documents:
+            self.index_documents(documents, force=True)
+        return stats
+
+    def search_reports(
+        self,
+        query: str,
+        symbol: Optional[str] = None,
+        year: Optional[str] = None,
+        quarter: Optional[str] = None,
+        top_k: int = 4,
+    ) -> List[Dict]:
+        """Report passages most relevant to ``query``, filtered by symbol and period."""
+        # Page 0 holds placeholders for reports without text
+        filters = [{"page": {"$gt": 0}}] + [
+            {key: value.strip().upper()}
+            for key, value in (("symbol", symbol), ("year", year), ("quarter", quarter))
+            if value
+        ]
+        where = filters[0] if len(filters) == 1 else {"$and": filters}
+        return self.search(query, k=max(1, min(top_k, 20)), where=where)
+
+
+report_index = ReportTextIndex()
@@ -0,0 +1,157 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from .http_cache import cache_headers, is_not_modified
+from .offload import data_offload
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip copies are kept
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_unset=True)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode a response payload (Pydantic models allowed) to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class CachedBody:
+    identity: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.identity) + len(self.gzip or b"") + len(self.br or b"")
+
+    def for_encoding(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Pick the smallest body the client accepts."""
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of already-encoded response bodies.
+
+    Keys must identify the exact response (the ETag does). The whole cache is
+    dropped when the data version moves on, so stale bodies never linger.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, compress: bool = True):
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._size = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _sync(self, version: int) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._size = 0
+            self._version = version
+
+    def get(self, key: str, version: int) -> Optional[CachedBody]:
+        with self._lock:
+            self._sync(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, version: int, body: bytes) -> CachedBody:
+        entry = CachedBody(identity=body)
+        if self.compress and len(body) >= MIN_COMPRESS_SIZE:
+            entry.gzip = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                entry.br = brotli.compress(body, quality=5)
+        with self._lock:
+            self._sync(version)
+            if entry.size > self.max_bytes:
+                return entry
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+)
+
+
+def _build_body(etag: str, version: int, build: Callable[[], Any]) -> CachedBody:
+    # Another request may have filled the entry while this one was queued
+    entry = response_cache.get(etag, version)
+    if entry is None:
+        entry = response_cache.put(etag, version, encode_json(build()))
+    return entry
+
+
+async def cached_json_response(
+    request: Request,
+    etag: str,
+    version: int,
+    last_modified: float,
+    build: Callable[[], Any],
+) -> Response:
+    """
+    Answer a GET from the encoded-body cache, building and encoding the
+    payload with ``build`` only on a miss. Conditional requests get a 304.
+
+    Misses are built on a worker thread, and concurrent requests for the
+    same response share one build.
+    """
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    entry = response_cache.get(etag, version)
+    if entry is None:
+        entry = await data_offload.run_once(("response", etag, version), _build_body, etag, version, build)
+    body, encoding = entry.for_encoding(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
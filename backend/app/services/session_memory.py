@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List
+
+from langchain.memory import ConversationTokenBufferMemory
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatSession:
+    memory: ConversationTokenBufferMemory
+    # Serializes turns of one session so concurrent requests can't interleave history
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def history(self) -> List[BaseMessage]:
+        return self.memory.load_memory_variables({})["chat_history"]
+
+    def save(self, message: str, response: str) -> None:
+        self.memory.save_context({"input": message}, {"output": response})
+
+
+class SessionMemoryStore:
+    """
+    Conversation memory per chat session.
+
+    Each session keeps at most ``max_token_limit`` tokens of history (older
+    turns are dropped), sessions idle for ``ttl_seconds`` are evicted, and at
+    most ``max_sessions`` are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLanguageModel,
+        max_token_limit: int = 2000,
+        ttl_seconds: float = 1800,
+        max_sessions: int = 1000,
+    ):
+        self.llm = llm
+        self.max_token_limit = max_token_limit
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float) -> None:
+        # Sessions are kept in least-recently-used order
+        for session_id in list(self._sessions):
+            session = self._sessions[session_id]
+            expired = now - session.last_used >= self.ttl_seconds
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            if session.lock.locked():
+                continue  # still answering a request
+            del self._sessions[session_id]
+            logger.info(f"Evicted chat session {session_id}")
+
+    def get(self, session_id: str) -> ChatSession:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(
+                    memory=ConversationTokenBufferMemory(
+                        llm=self.llm,
+                        max_token_limit=self.max_token_limit,
+                        memory_key="chat_history",
+                        input_key="input",
+                        output_key="output",
+                        return_messages=True,
+                    )
+                )
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._evict(now)
+            return session
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
@@ -4,16 +4,16 @@ const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:800
 
 export async function POST(req: Request) {
     try {
-        const { message } = await req.json();
+        const { message, session_id, stream } = await req.json();
         console.log("Sending message to backend:", message);
 
         // Make request to FastAPI backend
-        const response = await fetch(`${BACKEND_URL}/api/chat`, {
+        const response = await fetch(`${BACKEND_URL}/api/chat${stream ? "/stream" : ""}`, {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
             },
-            body: JSON.stringify({ message }),
+            body: JSON.stringify({ message, session_id }),
         });
 
         if (!response.ok) {
@@ -22,6 +22,17 @@ export async function POST(req: Request) {
             throw new Error(`Backend error: ${response.status} - ${JSON.stringify(errorData)}`);
         }
 
+        if (stream && response.body) {
+            // Pass the Server-Sent Events through as they arrive instead of buffering
+            return new Response(response.body, {
+                headers: {
+                    "Content-Type": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                    Connection: "keep-alive",
+                },
+            });
+        }
+
         const data = await response.json();
         console.log("Received response from backend:", data);
         return NextResponse.json(data);
@@ -1,20 +1,17 @@
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
-import { getCompanies, getCompanyFinancials } from "@/lib/api";
+import { getBulkFinancials, getCompanies, seriesToReports } from "@/lib/api";
 import Link from "next/link";
 import { CompanyComparisonChart } from "@/components/CompanyComparisonChart";
 
 export default async function Home() {
   const companies = await getCompanies();
 
-  // Fetch financial data for all companies
-  const companyData = await Promise.all(
-    companies.map(async (company) => {
-      const data = await getCompanyFinancials(company.symbol);
-      return [company.symbol, data];
-    })
-  );
+  // Fetch financial data for all companies in a single request
+  const bulk = await getBulkFinancials(companies.map((company) => company.symbol));
 
-  const companyDataMap = Object.fromEntries(companyData);
+  const companyDataMap = Object.fromEntries(
+    bulk.companies.map((series) => [series.symbol, seriesToReports(series)])
+  );
 
   return (
     <main className="container mx-auto py-0">
@@ -18,6 +18,8 @@ export function ChatWindow() {
     const [isLoading, setIsLoading] = useState(false);
     const messagesEndRef = useRef<HTMLDivElement>(null);
     const inputRef = useRef<HTMLInputElement>(null);
+    // Lets the backend keep this conversation's history separate from others
+    const sessionIdRef = useRef<string>(crypto.randomUUID());
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -37,19 +39,50 @@ export function ChatWindow() {
         setIsLoading(true);
 
         try {
-            // TODO: Replace with your actual API endpoint
             const response = await fetch("/api/chat", {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ message: input }),
+                body: JSON.stringify({ message: input, session_id: sessionIdRef.current, stream: true }),
             });
+            if (!response.ok || !response.body) {
+                throw new Error(`Chat request failed: ${response.status}`);
+            }
 
-            const data = await response.json();
-            const assistantMessage: Message = {
-                role: "assistant",
-                content: data.response,
+            // Start the assistant message on the first event and fill it in as tokens arrive
+            let started = false;
+            const updateAssistant = (update: (content: string) => string) => {
+                const isFirst = !started;
+                started = true;
+                setIsLoading(false);
+                setMessages((prev) => {
+                    if (isFirst) return [...prev, { role: "assistant", content: update("") }];
+                    const last = prev[prev.length - 1];
+                    return [...prev.slice(0, -1), { ...last, content: update(last.content) }];
+                });
             };
-            setMessages((prev) => [...prev, assistantMessage]);
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                // SSE events are separated by a blank line
+                const events = buffer.split("\n\n");
+                buffer = events.pop() ?? "";
+                for (const raw of events) {
+                    const dataLine = raw.split("\n").find((line) => line.startsWith("data: "));
+                    if (!dataLine) continue;
+                    const event = JSON.parse(dataLine.slice("data: ".length));
+                    if (event.type === "token") {
+                        updateAssistant((content) => content + event.content);
+                    } else if (event.type === "done" || event.type === "error") {
+                        // The final answer is authoritative (tokens may include intermediate steps)
+                        updateAssistant(() => event.response);
+                    }
+                }
+            }
         } catch (error) {
             console.error("Error sending message:", error);
         } finally {
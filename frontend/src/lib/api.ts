@@ -1,5 +1,9 @@
 const API_BASE_URL = 'http://localhost:8000/api';
 
+// The backend sends ETag/Last-Modified and Cache-Control; let Next.js reuse
+// responses for this long before revalidating (usually a cheap 304).
+const REVALIDATE_SECONDS = 60;
+
 export interface Company {
     symbol: string;
     latest_quarter: string;
@@ -29,10 +33,12 @@ export interface QuarterlyReport {
     quarter: string;
     year: string;
     financial_metrics: FinancialMetrics;
+    // Only present when requested via the `metrics` query parameter
+    derived_metrics?: Record<string, number | null>;
 }
 
 export async function getCompanies(): Promise<Company[]> {
-    const response = await fetch(`${API_BASE_URL}/companies`);
+    const response = await fetch(`${API_BASE_URL}/companies`, { next: { revalidate: REVALIDATE_SECONDS } });
     const data = await response.json();
     return data.companies;
 }
@@ -41,6 +47,42 @@ export async function getCompanyFinancials(symbol: string, year?: string): Promi
     const url = year
         ? `${API_BASE_URL}/companies/${symbol}/financials?year=${year}`
         : `${API_BASE_URL}/companies/${symbol}/financials`;
-    const response = await fetch(url);
+    const response = await fetch(url, { next: { revalidate: REVALIDATE_SECONDS } });
+    return response.json();
+}
+
+export interface CompanySeries {
+    symbol: string;
+    periods: string[];  // e.g. "2024-Q1"
+    metrics: Record<string, (number | null)[]>;
+}
+
+export interface BulkFinancials {
+    metrics: string[];
+    companies: CompanySeries[];
+}
+
+export async function getBulkFinancials(
+    symbols: string[],
+    options: { start?: string; end?: string; metrics?: string[] } = {}
+): Promise<BulkFinancials> {
+    const params = new URLSearchParams({ symbols: symbols.join(",") });
+    if (options.start) params.set("start", options.start);
+    if (options.end) params.set("end", options.end);
+    if (options.metrics) params.set("metrics", options.metrics.join(","));
+    const response = await fetch(`${API_BASE_URL}/companies/financials?${params}`, {
+        next: { revalidate: REVALIDATE_SECONDS },
+    });
     return response.json();
-} 
\ No newline at end of file
+}
+
+// Convert a bulk series back into per-quarter reports for existing components
+export function seriesToReports(series: CompanySeries): QuarterlyReport[] {
+    return series.periods.map((period, i) => {
+        const [year, quarter] = period.split("-");
+        const metrics = Object.fromEntries(
+            Object.entries(series.metrics).map(([name, values]) => [name, values[i]])
+        );
+        return { year, quarter, financial_metrics: metrics as unknown as FinancialMetrics };
+    });
+}
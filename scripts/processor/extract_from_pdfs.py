@@ -1,7 +1,36 @@
 import os
 import json
 import re
-from openai_data_extractor import OpenAIPDFExtractor
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+from extraction_cache import DEFAULT_CACHE_DIR, CacheLookup, ExtractionCache
+from manual_data_extractor import LocalExtraction, extract_financials
+from openai_data_extractor import (
+    COMPLETION_PARAMS,
+    DEFAULT_PROMPT,
+    OpenAIPDFExtractor,
+    build_messages,
+    count_tokens,
+    extract_text_from_pdf,
+    parse_response,
+)
+
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Local extractions at least this confident are used without calling the LLM
+DEFAULT_MIN_CONFIDENCE = 0.9
 
 def correct_quarter_and_year_from_filename(filename, extracted_data):
     # Try to extract year and quarter from filename (e.g., Q1-2023)
@@ -30,49 +59,303 @@ def correct_quarter_and_year_from_filename(filename, extracted_data):
         extracted_data["year"] = year
     return extracted_data
 
-def process_pdfs(pdf_dir: str) -> None:
+def output_path_for(file: str, output_dir: str) -> str:
+    # Create output filename (replace .pdf with .json)
+    return os.path.join(output_dir, file.replace(".pdf", ".json"))
+
+
+def save_results(file: str, results: Dict, output_dir: str) -> str:
+    """Save the extracted data for ``file`` next to the other processed JSONs."""
+    # Correct quarter and year based on filename
+    results = correct_quarter_and_year_from_filename(file, results)
+    output_path = output_path_for(file, output_dir)
+
+    # Save results to JSON file
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return output_path
+
+
+def lookup_cache(cache: Optional[ExtractionCache], file: str, pdf_path: str, output_dir: str) -> Optional[CacheLookup]:
+    if cache is None:
+        return None
+    return cache.lookup(file, pdf_path, output_path_for(file, output_dir), DEFAULT_PROMPT, COMPLETION_PARAMS)
+
+
+def store_results(
+    file: str,
+    pdf_path: str,
+    results: Dict,
+    output_dir: str,
+    cache: Optional[ExtractionCache],
+    lookup: Optional[CacheLookup],
+    from_llm: bool = True,
+) -> str:
+    """Save the results and, with a cache, remember them for later runs."""
+    # Only model responses are cached under the model request's key
+    if cache is not None and lookup.result is None and from_llm:
+        cache.put_result(lookup.key, results)
+    output_path = save_results(file, results, output_dir)
+    if cache is not None and "error" not in results:
+        cache.record(file, pdf_path, lookup, output_path)
+    return output_path
+
+
+def extract_locally(pdf_path: str) -> Optional[LocalExtraction]:
+    """Run the local extractor; failures just mean falling back to OpenAI."""
+    try:
+        return extract_financials(pdf_path)
+    except Exception as e:
+        print(f"Local extraction of {pdf_path} failed: {str(e)}")
+        return None
+
+
+def accept_local(file: str, extraction: Optional[LocalExtraction], min_confidence: Optional[float]) -> Optional[Dict]:
+    """The local extraction's result if it is confident enough, else None."""
+    if extraction is None:
+        return None
+    if extraction.confidence >= min_confidence:
+        print(f"Extracted {file} locally from page {extraction.page} (confidence {extraction.confidence})")
+        return extraction.result
+    print(f"Local extraction of {file} not confident enough ({extraction.confidence}), using OpenAI")
+    return None
+
+
+def process_pdfs(
+    pdf_dir: str,
+    output_dir: str = "data/processed/jsons",
+    cache: Optional[ExtractionCache] = None,
+    min_confidence: Optional[float] = DEFAULT_MIN_CONFIDENCE,
+) -> None:
     """
-    Process all PDF files in the specified directory using OpenAI extractor.
+    Process all PDF files in the specified directory, using the local
+    extractor where it is confident and the OpenAI extractor otherwise.
 
     Args:
         pdf_dir (str): Directory containing PDF files
+        output_dir (str): Directory the extracted JSON files are written to
+        cache (ExtractionCache): Skip unchanged PDFs and reuse cached results
+        min_confidence (float): Confidence needed to skip the LLM (None: always use it)
     """
-    # Initialize OpenAI extractor
-    extractor = OpenAIPDFExtractor()
-    
+    # The OpenAI extractor (and its API key) is only needed once a file
+    # can't be handled from the cache or locally
+    extractor = None
+
     # Create output directory if it doesn't exist
-    output_dir = "data/processed/jsons"
     os.makedirs(output_dir, exist_ok=True)
     
     # Process each PDF file
-    for file in os.listdir(pdf_dir):
-        if file.endswith(".pdf"):
-            try:
-                pdf_path = os.path.join(pdf_dir, file)
-                print(f"Processing {file}...")
-                
-                # Extract data using OpenAI
-                results = extractor.analyze_pdf_content(pdf_path)
-                
-                # Correct quarter and year based on filename
-                results = correct_quarter_and_year_from_filename(file, results)
-                
-                # Create output filename (replace .pdf with .json)
-                output_filename = file.replace(".pdf", ".json")
-                output_path = os.path.join(output_dir, output_filename)
-                
-                # Save results to JSON file
-                with open(output_path, "w", encoding="utf-8") as f:
-                    json.dump(results, f, ensure_ascii=False, indent=2)
-                
-                print(f"Saved extracted data to {output_path}")
-                
-            except Exception as e:
-                print(f"Error processing {file}: {str(e)}")
+    unchanged = 0
+    try:
+        for file in os.listdir(pdf_dir):
+            if file.endswith(".pdf"):
+                try:
+                    pdf_path = os.path.join(pdf_dir, file)
+                    lookup = lookup_cache(cache, file, pdf_path, output_dir)
+                    if lookup and lookup.unchanged:
+                        unchanged += 1
+                        continue
+                    print(f"Processing {file}...")
+
+                    from_llm = True
+                    if lookup and lookup.result is not None:
+                        print(f"Using cached extraction for {file}")
+                        results = lookup.result
+                    else:
+                        local = extract_locally(pdf_path) if min_confidence is not None else None
+                        results = accept_local(file, local, min_confidence)
+                        from_llm = results is None
+
+                    if results is None:
+                        pdf_text = lookup.text if lookup else None
+                        if pdf_text is None:
+                            pdf_text = extract_text_from_pdf(pdf_path)
+                            if cache is not None:
+                                cache.put_text(lookup.pdf_hash, pdf_text)
+
+                        # Extract data using OpenAI
+                        if extractor is None:
+                            extractor = OpenAIPDFExtractor()
+                        results = extractor.analyze_text(pdf_text)
+
+                    output_path = store_results(file, pdf_path, results, output_dir, cache, lookup, from_llm)
+                    print(f"Saved extracted data to {output_path}")
+
+                except Exception as e:
+                    print(f"Error processing {file}: {str(e)}")
+    finally:
+        if cache is not None:
+            cache.save()
+    if unchanged:
+        print(f"Skipped {unchanged} unchanged PDFs")
+
+
+async def _complete_with_backoff(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    pdf_text: str,
+    max_retries: int,
+) -> Optional[str]:
+    """Send one extraction request, retrying transient errors with exponential backoff."""
+    messages = build_messages(pdf_text)
+    print(f"Sending request to OpenAI API ({count_tokens(messages)} prompt tokens)")
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    messages=messages,
+                    **COMPLETION_PARAMS,
+                )
+            return response.choices[0].message.content
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            # Honour Retry-After when the server sends it, otherwise back off exponentially
+            retry_after = None
+            response = getattr(e, "response", None)
+            if response is not None:
+                try:
+                    retry_after = float(response.headers.get("retry-after", ""))
+                except ValueError:
+                    pass
+            delay = retry_after if retry_after is not None else min(2 ** attempt, 60) + random.random()
+            print(f"{type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+
+async def process_pdfs_concurrently(
+    pdf_dir: str,
+    output_dir: str = "data/processed/jsons",
+    concurrency: int = 4,
+    workers: Optional[int] = None,
+    max_retries: int = 5,
+    cache: Optional[ExtractionCache] = None,
+    min_confidence: Optional[float] = DEFAULT_MIN_CONFIDENCE,
+) -> None:
+    """
+    Process all PDF files in the specified directory concurrently.
+
+    Text is extracted in a process pool while at most ``concurrency`` OpenAI
+    requests are in flight; each JSON is written as soon as its file is done.
+
+    Args:
+        pdf_dir (str): Directory containing PDF files
+        output_dir (str): Directory the extracted JSON files are written to
+        concurrency (int): Maximum number of concurrent OpenAI requests
+        workers (int): Number of text extraction processes (default: CPU count)
+        max_retries (int): Retries per request for rate limits and transient errors
+        cache (ExtractionCache): Skip unchanged PDFs and reuse cached results
+        min_confidence (float): Confidence needed to skip the LLM (None: always use it)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    files = sorted(file for file in os.listdir(pdf_dir) if file.endswith(".pdf"))
+    # Created on first use, so runs served from the cache or locally need no API key
+    client: Optional[AsyncOpenAI] = None
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    unchanged = 0
+
+    def get_client() -> AsyncOpenAI:
+        nonlocal client
+        if client is None:
+            if not os.getenv("OPENAI_API_KEY"):
+                raise ValueError("OPENAI_API_KEY not found in environment variables")
+            # Retries are handled here so they share the concurrency limit
+            client = AsyncOpenAI(base_url=os.getenv("OPENAI_BASE_URL") or None, max_retries=0)
+        return client
+
+    async def process(pool: ProcessPoolExecutor, file: str) -> bool:
+        nonlocal unchanged
+        try:
+            pdf_path = os.path.join(pdf_dir, file)
+            # Hashing reads the whole PDF, so keep it off the event loop
+            lookup = await loop.run_in_executor(None, lookup_cache, cache, file, pdf_path, output_dir)
+            if lookup and lookup.unchanged:
+                unchanged += 1
+                return True
+
+            from_llm = True
+            if lookup and lookup.result is not None:
+                print(f"Using cached extraction for {file}")
+                results = lookup.result
+            else:
+                local = None
+                if min_confidence is not None:
+                    local = await loop.run_in_executor(pool, extract_locally, pdf_path)
+                results = accept_local(file, local, min_confidence)
+                from_llm = results is None
+
+            if results is None:
+                pdf_text = lookup.text if lookup else None
+                if pdf_text is None:
+                    pdf_text = await loop.run_in_executor(pool, extract_text_from_pdf, pdf_path)
+                    if cache is not None:
+                        cache.put_text(lookup.pdf_hash, pdf_text)
+                response_text = await _complete_with_backoff(get_client(), semaphore, pdf_text, max_retries)
+                results = parse_response(response_text)
+
+            output_path = store_results(file, pdf_path, results, output_dir, cache, lookup, from_llm)
+            print(f"Saved extracted data to {output_path}")
+            return True
+        except Exception as e:
+            print(f"Error processing {file}: {str(e)}")
+            return False
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = await asyncio.gather(*(process(pool, file) for file in files))
+    finally:
+        if client is not None:
+            await client.close()
+        if cache is not None:
+            cache.save()
+
+    print(
+        f"Processed {sum(done)}/{len(files)} PDFs ({unchanged} unchanged) in "
+        f"{time.perf_counter() - start:.1f}s (concurrency {concurrency})"
+    )
+
 
 if __name__ == "__main__":
-    # Path to the raw PDFs directory
-    pdf_dir = "data/raw/pdfs"
-    
+    parser = argparse.ArgumentParser(description="Extract financial data from quarterly report PDFs")
+    parser.add_argument("--pdf-dir", default="data/raw/pdfs", help="Directory containing PDF files")
+    parser.add_argument("--output-dir", default="data/processed/jsons", help="Directory for the extracted JSONs")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="Process PDFs concurrently with this many OpenAI requests in flight (default: one at a time)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Text extraction processes in concurrent mode")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per request in concurrent mode")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Extraction cache and manifest directory")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract every PDF, ignoring the cache")
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help="Use the local extractor's result when at least this confident (0-1)",
+    )
+    parser.add_argument("--no-local", action="store_true", help="Always extract with OpenAI")
+    args = parser.parse_args()
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir)
+    min_confidence = None if args.no_local else args.min_confidence
+
     # Process all PDFs
-    process_pdfs(pdf_dir)
+    if args.concurrency > 0:
+        asyncio.run(
+            process_pdfs_concurrently(
+                args.pdf_dir,
+                args.output_dir,
+                concurrency=args.concurrency,
+                workers=args.workers,
+                max_retries=args.max_retries,
+                cache=cache,
+                min_confidence=min_confidence,
+            )
+        )
+    else:
+        process_pdfs(args.pdf_dir, args.output_dir, cache=cache, min_confidence=min_confidence)
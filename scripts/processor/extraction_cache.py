@@ -0,0 +1,148 @@
+"""
+Content-addressed cache for PDF extraction results.
+
+Extracted text is stored under the SHA-256 of the PDF bytes, and parsed LLM
+results under a hash of (PDF bytes, prompt, model parameters), so the same
+filing is never sent to the model twice with the same request. A manifest
+remembers each PDF's size, mtime and hash, which lets incremental runs skip
+unchanged files without reading them.
+
+Layout of ``cache_dir``:
+
+    manifest.json                  file name -> size, mtime, hashes, output
+    text/<pdf hash>.v<version>.txt extracted statement text
+    results/<result key>.json      parsed extraction result
+"""
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/cache/extractions"
+
+# Bump to invalidate every cached text and result (e.g. after changing page
+# selection or response parsing)
+CACHE_VERSION = 2
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def result_key(pdf_hash: str, prompt: str, params: Dict) -> str:
+    """Cache key of one extraction request."""
+    request = json.dumps(
+        {"version": CACHE_VERSION, "pdf": pdf_hash, "prompt": prompt, "params": params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class CacheLookup:
+    pdf_hash: str
+    key: str
+    # The output JSON is already up to date; nothing to do
+    unchanged: bool = False
+    result: Optional[Dict] = None
+    text: Optional[str] = None
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.manifest: Dict[str, Dict] = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {str(e)}")
+
+    def _text_path(self, pdf_hash: str) -> str:
+        return os.path.join(self.cache_dir, "text", f"{pdf_hash}.v{CACHE_VERSION}.txt")
+
+    def _result_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "results", f"{key}.json")
+
+    def get_text(self, pdf_hash: str) -> Optional[str]:
+        try:
+            with open(self._text_path(pdf_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_text(self, pdf_hash: str, text: str) -> None:
+        _write_atomic(self._text_path(pdf_hash), text)
+
+    def get_result(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._result_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put_result(self, key: str, result: Dict) -> None:
+        if "error" in result:
+            return  # failed extractions are retried next run
+        _write_atomic(self._result_path(key), json.dumps(result, ensure_ascii=False, indent=2))
+
+    def lookup(self, file: str, pdf_path: str, output_path: str, prompt: str, params: Dict) -> CacheLookup:
+        """
+        Find what is already known about ``pdf_path``.
+
+        The PDF is only read when its size or mtime differs from the manifest.
+        """
+        stat = os.stat(pdf_path)
+        entry = self.manifest.get(file)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            pdf_hash = entry["pdf_hash"]
+        else:
+            pdf_hash = hash_file(pdf_path)
+        key = result_key(pdf_hash, prompt, params)
+
+        if (
+            entry
+            and entry["result_key"] == key
+            and entry["output"] == output_path
+            and os.path.exists(output_path)
+        ):
+            # Touched but identical; don't hash it again next run
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            return CacheLookup(pdf_hash, key, unchanged=True)
+        lookup = CacheLookup(pdf_hash, key, result=self.get_result(key))
+        if lookup.result is None:
+            lookup.text = self.get_text(pdf_hash)
+        return lookup
+
+    def record(self, file: str, pdf_path: str, lookup: CacheLookup, output_path: str) -> None:
+        """Remember that ``output_path`` holds the result for this version of the PDF."""
+        stat = os.stat(pdf_path)
+        self.manifest[file] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "pdf_hash": lookup.pdf_hash,
+            "result_key": lookup.key,
+            "output": output_path,
+        }
+
+    def save(self) -> None:
+        _write_atomic(self.manifest_path, json.dumps(self.manifest, indent=2, sort_keys=True))
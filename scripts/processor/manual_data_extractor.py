@@ -1,5 +1,98 @@
 import pdfplumber
 import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# Fields of the extraction JSON, in the same order as the OpenAI prompt's schema
+METRIC_FIELDS = [
+    "revenue",
+    "cost_of_goods_sold",
+    "gross_profit",
+    "other_income",
+    "distribution_costs",
+    "administrative_expenses",
+    "operating_income",
+    "finance_costs",
+    "finance_income",
+    "share_of_profit_equity_investee",
+    "profit_before_tax",
+    "tax_expense",
+    "net_income",
+    "eps_basic",
+    "eps_diluted",
+    "dividend_per_share",
+]
+
+# Statement line label (lowercase prefix) -> field. More specific labels come
+# first; the first line matching a field wins.
+LABEL_MAP = [
+    ("revenue from contracts with customers", "revenue"),
+    ("revenue", "revenue"),
+    ("turnover", "revenue"),
+    ("cost of sales", "cost_of_goods_sold"),
+    ("cost of goods sold", "cost_of_goods_sold"),
+    ("gross profit", "gross_profit"),
+    ("other operating income", "other_income"),
+    ("other income", "other_income"),
+    ("selling and distribution", "distribution_costs"),
+    ("distribution costs", "distribution_costs"),
+    ("distribution expenses", "distribution_costs"),
+    ("administrative expenses", "administrative_expenses"),
+    ("results from operating activities", "operating_income"),
+    ("profit from operations", "operating_income"),
+    ("operating profit", "operating_income"),
+    ("finance costs", "finance_costs"),
+    ("finance cost", "finance_costs"),
+    ("finance expenses", "finance_costs"),
+    ("finance income", "finance_income"),
+    ("share of profit of equity", "share_of_profit_equity_investee"),
+    ("share of profit", "share_of_profit_equity_investee"),
+    ("profit before taxation", "profit_before_tax"),
+    ("profit before tax", "profit_before_tax"),
+    ("income tax expense", "tax_expense"),
+    ("tax expense", "tax_expense"),
+    ("taxation", "tax_expense"),
+    ("profit for the period", "net_income"),
+    ("profit for the year", "net_income"),
+    ("profit after tax", "net_income"),
+    ("diluted earnings per share", "eps_diluted"),
+    ("earnings per share - diluted", "eps_diluted"),
+    ("basic earnings per share", "eps_basic"),
+    ("earnings per share - basic", "eps_basic"),
+    ("earnings per share", "eps_basic"),
+    ("dividend per share", "dividend_per_share"),
+]
+
+# Per-share values are in rupees; everything else is stated in Rs. '000
+PER_SHARE_FIELDS = {"eps_basic", "eps_diluted", "dividend_per_share"}
+
+# Fields a usable income statement must have
+CORE_FIELDS = ["revenue", "profit_before_tax", "net_income"]
+
+# Header column markers, in the order they appear across the statement
+COLUMN_MARKER = re.compile(
+    r"\b(0?3|0?6|0?9|12)\s*months?\b|\b(?:change|variance)\b(?:\s*%)?|%", re.IGNORECASE
+)
+
+# "Rs. '000", "Rs. ’000", "Rs 000's", "in thousands"
+THOUSANDS = re.compile(r"['’`]\s*000\b|\b000\s*['’]?s\b|thousands")
+
+QUARTER_BY_MONTH = {3: "Q1", 6: "Q2", 9: "Q3", 12: "Q4"}
+MONTHS = {
+    name: i
+    for i, name in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"],
+        1,
+    )
+}
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[./-](\d{1,2})[./-](20\d{2})\b")
+TEXT_DATE = re.compile(
+    r"\b\d{1,2}(?:st|nd|rd|th)?\s+(" + "|".join(MONTHS) + r")[,\s]+(20\d{2})\b"
+    r"|\b(" + "|".join(MONTHS) + r")\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+(20\d{2})\b",
+    re.IGNORECASE,
+)
 
 
 def split_line_into_columns(line):
@@ -13,10 +106,11 @@ def split_line_into_columns(line):
     if not text_match:
         return None
 
-    text = text_match.group(1).strip()
+    # A trailing "(" belongs to the first number, e.g. 'Cost of sales (1,234)'
+    text = text_match.group(1).rstrip(" (-").strip()
 
-    # Find all numbers in the line
-    numbers = re.findall(r"[-]?\(?[\d,]+\)?", line)
+    # Find all numbers in the line (decimals included, e.g. EPS of 1.25)
+    numbers = re.findall(r"-?\(?[\d,]*\.?\d+\)?", line)
 
     # Clean up numbers (remove commas, convert parentheses to negative signs)
     cleaned_numbers = []
@@ -29,6 +123,184 @@ def split_line_into_columns(line):
     return {"text": text, "numbers": cleaned_numbers}
 
 
+def match_label(text: str) -> Optional[str]:
+    """Map a statement line label to a metric field, if it is one we extract."""
+    label = " ".join(text.lower().split())
+    for prefix, metric in LABEL_MAP:
+        if label.startswith(prefix):
+            return metric
+    return None
+
+
+def _drop_note_refs(raw_numbers: List[str], columns: int) -> List[str]:
+    # A leading one- or two-digit integer is a note reference, not an amount,
+    # when the line has more numbers than the header has columns
+    numbers = list(raw_numbers)
+    if columns and len(numbers) > columns and re.fullmatch(r"\d{1,2}", numbers[0]):
+        numbers.pop(0)
+    return numbers
+
+
+@dataclass
+class ValueColumn:
+    # Position of the value among a statement line's amounts
+    index: int = 0
+    # Amount columns named in the header; 0 when it has none
+    count: int = 0
+    # False when no "3 months" column was found and ``index`` is a fallback
+    found: bool = False
+
+
+def find_value_column(lines: List[str]) -> ValueColumn:
+    """
+    The latest "3 months" Group column among a line's amounts.
+
+    Column headers ("03 months to 31.03.2024", "Change %", ...) are read in
+    order. Group figures come first unless "Company" precedes "Group".
+    """
+    markers = []
+    group_pos = company_pos = None
+    for line in lines:
+        lower = line.lower()
+        if group_pos is None and "group" in lower:
+            group_pos = len(markers)
+        if company_pos is None and "company" in lower:
+            company_pos = len(markers)
+        columns = split_line_into_columns(line)
+        if columns and columns["numbers"] and match_label(columns["text"]):
+            break  # header ends where the statement lines begin
+        markers.extend(m.group(1) or "other" for m in COLUMN_MARKER.finditer(line))
+
+    candidates = range(len(markers))
+    if group_pos is not None and company_pos is not None and company_pos < group_pos:
+        candidates = range(len(markers) // 2, len(markers))
+    for i in candidates:
+        if markers[i].lstrip("0") == "3":
+            return ValueColumn(index=i, count=len(markers), found=True)
+    return ValueColumn(count=len(markers))
+
+
+def detect_period(text: str) -> Dict[str, str]:
+    """Quarter and year of the first quarter-end date in the text."""
+    for match in sorted(
+        [*NUMERIC_DATE.finditer(text), *TEXT_DATE.finditer(text)], key=lambda m: m.start()
+    ):
+        if match.re is NUMERIC_DATE:
+            month, year = int(match.group(2)), match.group(3)
+        else:
+            name = match.group(1) or match.group(3)
+            month, year = MONTHS[name.lower()], match.group(2) or match.group(4)
+        if month in QUARTER_BY_MONTH:
+            return {"quarter": QUARTER_BY_MONTH[month], "year": year}
+    return {}
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= max(abs(a), abs(b)) * 0.005 + 1000
+
+
+def score_confidence(
+    metrics: Dict[str, Optional[float]], column_found: bool = True, aligned: float = 1.0
+) -> float:
+    """
+    0..1 confidence in an extraction: half for finding the core fields, half
+    for the statement adding up (gross profit, net income).
+
+    The value column is validated too: the score is halved when the header
+    has no "3 months" column, and scaled by ``aligned``, the share of
+    matched lines whose amounts line up with the header's columns.
+    """
+    found = sum(metrics.get(name) is not None for name in CORE_FIELDS) / len(CORE_FIELDS)
+
+    checks = []
+    revenue, cogs, gross = (metrics.get(k) for k in ("revenue", "cost_of_goods_sold", "gross_profit"))
+    if None not in (revenue, cogs, gross):
+        checks.append(_close(gross, revenue - abs(cogs)))
+    pbt, tax, net = (metrics.get(k) for k in ("profit_before_tax", "tax_expense", "net_income"))
+    if None not in (pbt, tax, net):
+        checks.append(_close(net, pbt - abs(tax)) or _close(net, pbt + abs(tax)))
+    consistent = sum(checks) / len(checks) if checks else 0.0
+
+    score = 0.5 * found + 0.5 * consistent
+    if not column_found:
+        score *= 0.5
+    return round(score * aligned, 3)
+
+
+@dataclass
+class LocalExtraction:
+    result: Dict
+    confidence: float
+    page: Optional[int] = None
+    lines_matched: List[str] = field(default_factory=list)
+
+
+def extract_from_text(text: str, scale: Optional[int] = None) -> LocalExtraction:
+    """
+    Extract the income statement from one page of text into the same JSON
+    schema the OpenAI extractor returns.
+    """
+    lines = text.split("\n")
+    column = find_value_column(lines)
+    if scale is None:
+        # Amounts are in thousands unless the statement says otherwise
+        lower = text.lower()
+        scale = 1 if ("rs." in lower and not THOUSANDS.search(lower)) else 1000
+
+    metrics: Dict[str, Optional[float]] = {name: None for name in METRIC_FIELDS}
+    matched = []
+    aligned = 0
+    for line in lines:
+        columns = split_line_into_columns(line)
+        if not columns:
+            continue
+        metric = match_label(columns["text"])
+        if metric is None or metrics[metric] is not None:
+            continue
+        numbers = _drop_note_refs(columns["numbers"], column.count)
+        if not numbers:
+            continue
+        try:
+            value = float(numbers[min(column.index, len(numbers) - 1)])
+        except ValueError:
+            continue
+        if metric not in PER_SHARE_FIELDS:
+            value = value * scale
+            value = int(value) if value.is_integer() else value
+        metrics[metric] = value
+        matched.append(columns["text"])
+        aligned += len(numbers) == column.count
+
+    result = {**detect_period(text), "financial_metrics": metrics}
+    # Without column headers there is nothing to line up against; the
+    # missing "3 months" column already lowers the score
+    share_aligned = aligned / len(matched) if matched and column.count else 1.0
+    return LocalExtraction(
+        result=result,
+        confidence=score_confidence(metrics, column.found, share_aligned),
+        lines_matched=matched,
+    )
+
+
+def extract_financials(pdf_path: str) -> LocalExtraction:
+    """
+    Extract the income statement from a quarterly report PDF without an LLM.
+
+    Every page is parsed and the most confident page wins.
+    """
+    best = LocalExtraction(result={"financial_metrics": {}}, confidence=0.0)
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            text = page.extract_text()
+            if not text:
+                continue
+            extraction = extract_from_text(text)
+            extraction.page = page_num
+            if extraction.confidence > best.confidence:
+                best = extraction
+    return best
+
+
 def read_pdf_line_by_line(pdf_path):
     # Pattern to match lines containing both letters and numbers
     pattern = re.compile(r"(?=.*[A-Za-z])(?=.*\d)")
@@ -59,5 +331,9 @@ def read_pdf_line_by_line(pdf_path):
 
 
 if __name__ == "__main__":
+    import json
+
     pdf_file = "data/raw/pdfs/DIPD_2024_03_31.pdf"
-    read_pdf_line_by_line(pdf_file)
+    extraction = extract_financials(pdf_file)
+    print(f"Page {extraction.page}, confidence {extraction.confidence}")
+    print(json.dumps(extraction.result, indent=2))
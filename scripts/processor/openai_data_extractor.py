@@ -2,67 +2,26 @@ import os
 import logging
 import json
 import base64
+import re
 from datetime import datetime
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 import PyPDF2
 
+try:
+    import tiktoken
+except ImportError:  # optional, token counts are estimated instead
+    tiktoken = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-
-class OpenAIPDFExtractor:
-    def __init__(self):
-        """Initialize the PDF data extractor with OpenAI model."""
-        load_dotenv()
-
-        # Configure OpenAI API
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-        # Set environment variable for OpenAI SDK v1.x
-        os.environ["OPENAI_API_KEY"] = api_key
-        self.client = OpenAI()
-
-        # Create logs directory if it doesn't exist
-        self.logs_dir = "data/logs"
-        os.makedirs(self.logs_dir, exist_ok=True)
-
-    def encode_pdf_to_base64(self, pdf_path: str) -> str:
-        """Encode PDF file to base64 string."""
-        try:
-            with open(pdf_path, "rb") as f:
-                pdf_content = f.read()
-            logger.info(f"Successfully read PDF file: {len(pdf_content)} bytes")
-            return base64.b64encode(pdf_content).decode("utf-8")
-        except Exception as e:
-            logger.error(f"Error reading PDF file: {str(e)}")
-            raise
-
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text content from PDF file."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                logger.info(f"Successfully extracted text from PDF: {len(text)} characters")
-                return text
-        except Exception as e:
-            logger.error(f"Error extracting text from PDF: {str(e)}")
-            raise
-
-    def analyze_pdf_content(self, pdf_path: str, prompt: Optional[str] = None) -> Dict:
-        """Analyze PDF content using OpenAI's GPT-4 model."""
-        try:
-            if not prompt:
-                prompt = """
+DEFAULT_PROMPT = """
                 Extract financial information from the quarterly report and return ONLY a JSON object with no additional text or explanation.
                 Important: Numbers shown in parentheses () in the financial statements should be treated as negative values.
                 For example, if you see (1,000) it should be recorded as -1000 in the JSON output.
@@ -114,55 +73,205 @@ class OpenAIPDFExtractor:
                 Use null for any values that are not explicitly stated in the document.
                 """
 
-            # Extract text from PDF
-            pdf_text = self.extract_text_from_pdf(pdf_path)
-            
-            logger.info("Sending request to OpenAI API...")
+SYSTEM_MESSAGE = "You are a financial data extraction assistant. You must respond with valid JSON only, no additional text or explanation."
 
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a financial data extraction assistant. You must respond with valid JSON only, no additional text or explanation."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "text", "text": pdf_text}
-                    ]
-                }
+# Model and sampling parameters for every extraction request
+COMPLETION_PARAMS = {
+    "model": "gpt-4",
+    "max_tokens": 2048,
+    "temperature": 0.2,
+}
+
+
+# Income statement markers and their weights when scoring pages. The
+# balance sheet and cash flow statement share some words, so they count against.
+STATEMENT_MARKERS = [
+    (re.compile(r"statement of (?:profit or loss|comprehensive income)|income statement", re.IGNORECASE), 4),
+    (re.compile(r"\b0?3 months\b|three months", re.IGNORECASE), 3),
+    (re.compile(r"profit before tax", re.IGNORECASE), 3),
+    (re.compile(r"\brevenue\b|\bturnover\b", re.IGNORECASE), 2),
+    (re.compile(r"gross profit", re.IGNORECASE), 2),
+    (re.compile(r"earnings per share", re.IGNORECASE), 2),
+    (re.compile(r"\bgroup\b", re.IGNORECASE), 1),
+    (re.compile(r"statement of financial position|cash flows?", re.IGNORECASE), -3),
+]
+
+# Pages sent to the model: the best page, plus the next if the statement continues on it
+MAX_STATEMENT_PAGES = 2
+
+
+def score_page(text: str) -> int:
+    """How much a page looks like the quarterly income statement."""
+    return sum(weight for pattern, weight in STATEMENT_MARKERS if pattern.search(text))
+
+
+def locate_statement_pages(pages: List[str], max_pages: int = MAX_STATEMENT_PAGES) -> List[int]:
+    """
+    Indexes of the page(s) holding the income statement. Falls back to every
+    page when nothing looks like one.
+    """
+    scores = [score_page(text) for text in pages]
+    if not scores or max(scores) <= 0:
+        return list(range(len(pages)))
+    best = scores.index(max(scores))
+    selected = [best]
+    # Statements often run onto the next page (e.g. EPS below the fold)
+    for i in range(best + 1, min(best + max_pages, len(pages))):
+        if scores[i] * 2 < scores[best]:
+            break
+        selected.append(i)
+    return selected
+
+
+def extract_text_from_pdf(pdf_path: str, all_pages: bool = False) -> str:
+    """Extract the income statement page(s) of a PDF as text.
+
+    A module-level function so it can also run in a worker process.
+    """
+    try:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            pages = [page.extract_text() or "" for page in pdf_reader.pages]
+        selected = range(len(pages)) if all_pages else locate_statement_pages(pages)
+        text = "\n".join(pages[i] for i in selected)
+        logger.info(
+            f"Successfully extracted text from PDF: {len(text)} characters "
+            f"from page(s) {[i + 1 for i in selected]} of {len(pages)}"
+        )
+        return text
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        raise
+
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # Unknown model, or the encoding can't be downloaded
+        logger.warning(f"tiktoken unavailable for {model}, estimating tokens: {str(e)}")
+        return None
+
+
+def count_tokens(messages: List[Dict], model: str = COMPLETION_PARAMS["model"]) -> int:
+    """Prompt tokens of a request; estimated at 4 characters per token without tiktoken."""
+    texts = []
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(part["text"] for part in content if part.get("type") == "text")
+    encoding = _token_encoding(model)
+    if encoding is None:
+        return sum(len(text) for text in texts) // 4
+    return sum(len(encoding.encode(text)) for text in texts)
+
+
+def build_messages(pdf_text: str, prompt: Optional[str] = None) -> List[Dict]:
+    """Build the chat messages for one extraction request."""
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_MESSAGE
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt or DEFAULT_PROMPT},
+                {"type": "text", "text": pdf_text}
             ]
+        }
+    ]
+
+
+def parse_response(response_text: Optional[str]) -> Dict:
+    """Parse the model's reply into the extracted JSON object."""
+    if not response_text:
+        logger.error("Empty response received from model")
+        return {"error": "Empty response from model"}
+
+    try:
+        # Clean the response text to ensure it's valid JSON
+        cleaned_text = response_text.strip()
+        if cleaned_text.startswith('```json'):
+            cleaned_text = cleaned_text[7:]
+        if cleaned_text.endswith('```'):
+            cleaned_text = cleaned_text[:-3]
+        cleaned_text = cleaned_text.strip()
+
+        result_json = json.loads(cleaned_text)
+        logger.info("Successfully parsed response as JSON")
+        return result_json
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON response: {str(e)}")
+        logger.debug(f"Raw response: {response_text}")
+        return {"error": "Invalid JSON response", "raw_text": response_text}
+
+
+
+class OpenAIPDFExtractor:
+    def __init__(self):
+        """Initialize the PDF data extractor with OpenAI model."""
+        load_dotenv()
+
+        # Configure OpenAI API
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+        # Set environment variable for OpenAI SDK v1.x
+        os.environ["OPENAI_API_KEY"] = api_key
+        # OPENAI_BASE_URL points the client at another endpoint (e.g. a local stub)
+        self.client = OpenAI(base_url=os.getenv("OPENAI_BASE_URL") or None)
+
+        # Create logs directory if it doesn't exist
+        self.logs_dir = "data/logs"
+        os.makedirs(self.logs_dir, exist_ok=True)
+
+    def encode_pdf_to_base64(self, pdf_path: str) -> str:
+        """Encode PDF file to base64 string."""
+        try:
+            with open(pdf_path, "rb") as f:
+                pdf_content = f.read()
+            logger.info(f"Successfully read PDF file: {len(pdf_content)} bytes")
+            return base64.b64encode(pdf_content).decode("utf-8")
+        except Exception as e:
+            logger.error(f"Error reading PDF file: {str(e)}")
+            raise
+
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text content from PDF file."""
+        return extract_text_from_pdf(pdf_path)
+
+    def analyze_pdf_content(self, pdf_path: str, prompt: Optional[str] = None) -> Dict:
+        """Analyze PDF content using OpenAI's GPT-4 model."""
+        # Extract text from PDF
+        pdf_text = self.extract_text_from_pdf(pdf_path)
+        return self.analyze_text(pdf_text, prompt)
+
+    def analyze_text(self, pdf_text: str, prompt: Optional[str] = None) -> Dict:
+        """Analyze already extracted PDF text using OpenAI's GPT-4 model."""
+        try:
+            messages = build_messages(pdf_text, prompt)
+            logger.info(f"Sending request to OpenAI API ({count_tokens(messages)} prompt tokens)...")
 
             response = self.client.chat.completions.create(
-                model="gpt-4",
                 messages=messages,
-                max_tokens=2048,
-                temperature=0.2,
+                **COMPLETION_PARAMS,
             )
+            if response.usage is not None:
+                logger.info(
+                    f"OpenAI usage: {response.usage.prompt_tokens} prompt, "
+                    f"{response.usage.completion_tokens} completion tokens"
+                )
 
             response_text = response.choices[0].message.content
             logger.info("Received response from OpenAI API")
-
-            if not response_text:
-                logger.error("Empty response received from model")
-                return {"error": "Empty response from model"}
-
-            try:
-                # Clean the response text to ensure it's valid JSON
-                cleaned_text = response_text.strip()
-                if cleaned_text.startswith('```json'):
-                    cleaned_text = cleaned_text[7:]
-                if cleaned_text.endswith('```'):
-                    cleaned_text = cleaned_text[:-3]
-                cleaned_text = cleaned_text.strip()
-
-                result_json = json.loads(cleaned_text)
-                logger.info("Successfully parsed response as JSON")
-                return result_json
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {str(e)}")
-                logger.debug(f"Raw response: {response_text}")
-                return {"error": "Invalid JSON response", "raw_text": response_text}
+            return parse_response(response_text)
 
         except Exception as e:
             logger.error(f"Error analyzing PDF content: {str(e)}")
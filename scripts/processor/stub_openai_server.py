@@ -0,0 +1,117 @@
+"""
+Minimal local stand-in for the OpenAI chat completions endpoint.
+
+Lets the PDF extraction pipeline run offline:
+
+    python scripts/processor/stub_openai_server.py --port 8001 --latency 0.5
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8001/v1 \\
+        python scripts/processor/extract_from_pdfs.py --concurrency 8
+
+Every request is answered with the same extraction result after ``--latency``
+seconds. ``--rate-limit-every N`` answers every Nth request with a 429 to
+exercise the retry path.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_RESULT = {
+    "quarter": "Q1",
+    "year": "2024",
+    "financial_metrics": {
+        "revenue": 1000000,
+        "cost_of_goods_sold": -600000,
+        "gross_profit": 400000,
+        "other_income": 10000,
+        "distribution_costs": -50000,
+        "administrative_expenses": -80000,
+        "operating_income": 280000,
+        "finance_costs": -20000,
+        "finance_income": 5000,
+        "share_of_profit_equity_investee": None,
+        "profit_before_tax": 265000,
+        "tax_expense": -70000,
+        "net_income": 195000,
+        "eps_basic": 1.25,
+        "eps_diluted": 1.25,
+        "dividend_per_share": None,
+    },
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_every = 0
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        with self.lock:
+            n = next(self.counter)
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                {"Retry-After": "1"},
+            )
+            return
+
+        time.sleep(self.latency)
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{n}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(STUB_RESULT)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait before answering")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with a 429")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.rate_limit_every = args.rate_limit_every
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub OpenAI server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
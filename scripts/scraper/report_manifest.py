@@ -0,0 +1,80 @@
+"""
+Persistent manifest of downloaded quarterly reports.
+
+Maps each report URL to what the scraper already knows about it: the listed
+report date, the quarter-end date read from the PDF, a hash of the downloaded
+content, the extracted output file and the HTTP validators (ETag /
+Last-Modified) used for conditional re-downloads.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Set
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ReportManifest:
+    """URL -> report metadata, stored as JSON next to the downloaded PDFs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        # Downloads record entries from several threads
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.path}: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.entries.get(url)
+
+    def is_known(self, url: str, pdf_dir: Path, report_dir: Optional[Path] = None) -> bool:
+        """
+        True if the report was downloaded before and its output still exists
+        (in ``report_dir`` too, when given, for the full report).
+        """
+        entry = self.entries.get(url)
+        if not entry or not entry.get("output") or not (Path(pdf_dir) / entry["output"]).exists():
+            return False
+        return report_dir is None or (Path(report_dir) / entry["output"]).exists()
+
+    def known_urls(self, pdf_dir: Path, report_dir: Optional[Path] = None) -> Set[str]:
+        with self._lock:
+            urls = list(self.entries)
+        return {url for url in urls if self.is_known(url, pdf_dir, report_dir)}
+
+    def conditional_headers(self, url: str, pdf_dir: Path, report_dir: Optional[Path] = None) -> Dict[str, str]:
+        """Validators for a conditional GET, only if the output can be reused on a 304."""
+        entry = self.entries.get(url)
+        if not entry or not self.is_known(url, pdf_dir, report_dir):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, **fields) -> None:
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry.update(fields)
+            entry["checked_at"] = datetime.now().isoformat(timespec="seconds")
+
+    def save(self) -> None:
+        with self._lock:
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
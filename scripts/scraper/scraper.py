@@ -3,24 +3,38 @@ Main scraper module for CSE financial data.
 Handles the scraping of quarterly reports from CSE-listed companies.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import argparse
+import hashlib
 import logging
+import os
 from pathlib import Path
 import platform
+import shutil
+import tempfile
+import threading
 import time
 import re
 import requests
+from PyPDF2 import PdfReader, PdfWriter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from tqdm import tqdm
 from dateutil import parser as date_parser
+from report_manifest import ReportManifest
+from step_timer import StepTimer
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +42,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+FINANCIALS_TAB_XPATH = "//a[contains(text(), 'Financials')]"
+QUARTERLY_REPORTS_TAB_XPATH = "//button[contains(text(), 'Quarterly Reports')] | //div[contains(@class, 'tab') and contains(text(), 'Quarterly Reports')] | //a[contains(text(), 'Quarterly Reports')]"
+ACTIVE_TAB_ROWS_XPATH = "//div[contains(@class, 'tab-pane') and contains(@class, 'active')]//tr"
+ACTIVE_TAB_PDF_XPATH = "//div[contains(@class, 'tab-pane') and contains(@class, 'active')]//a[contains(@href, '.pdf')]"
+
+
+class network_idle:
+    """
+    Expected condition: no new resources (including XHR/fetch calls) finished
+    loading for ``quiet_period`` seconds, per the Resource Timing API.
+    """
+
+    def __init__(self, quiet_period: float = 0.5):
+        self.quiet_period = quiet_period
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver):
+        count = driver.execute_script(
+            # The default buffer stops recording after 250 entries
+            "performance.setResourceTimingBufferSize(100000);"
+            "return performance.getEntriesByType('resource').length;"
+        )
+        now = time.monotonic()
+        if count != self._count:
+            self._count, self._since = count, now
+            return False
+        return now - self._since >= self.quiet_period
+
+
+class table_rows_changed:
+    """
+    Expected condition: the report table was re-rendered after paging, i.e.
+    the old first row went stale or the rows now differ. Returns the new rows.
+    """
+
+    def __init__(self, old_rows, find_rows):
+        self.find_rows = find_rows
+        self.old_count = len(old_rows)
+        self.old_first = old_rows[0] if old_rows else None
+        try:
+            self.old_text = self.old_first.text if self.old_first else None
+        except StaleElementReferenceException:
+            self.old_text = None
+
+    def __call__(self, driver):
+        rows = self.find_rows()
+        if not rows:
+            return False
+        if len(rows) != self.old_count or self.old_first is None:
+            return rows
+        try:
+            if self.old_first.text != self.old_text:
+                return rows
+        except StaleElementReferenceException:
+            return rows
+        return False
+
 
 class CSEScraper:
     """Scraper for Colombo Stock Exchange financial data."""
@@ -39,13 +111,97 @@ class CSEScraper:
     }
     YEARS_TO_LOOK_BACK = 5
 
-    def __init__(self, output_dir: str = "data/raw"):
+    DOWNLOAD_TIMEOUT = (10, 60)  # connect, read (seconds)
+    WAIT_TIMEOUT = 10  # seconds to wait for any page readiness condition
+    # Downloads larger than this spill from memory to an anonymous temp file
+    SPOOL_MAX_SIZE = 32 * 1024 * 1024
+    DATE_PATTERNS = [
+        re.compile(pattern, re.IGNORECASE)
+        for pattern in (
+            r"(?:ended|as at|for the period ended)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
+            r"(?:quarter|period)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
+            r"(?:as at|as of)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
+            r"(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",  # Fallback to any date
+        )
+    ]
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        output_dir: str = "data/raw",
+        incremental: bool = False,
+        browser_workers: int = 1,
+        download_workers: int = 4,
+        per_host_limit: int = 4,
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.pdf_dir = self.output_dir / "pdfs"
         self.pdf_dir.mkdir(exist_ok=True)
-        self._setup_selenium()
-        self.request_delay = 2  # seconds between requests
+        # Full reports, kept for the report text search alongside the
+        # statement pages the extractor reads
+        self.report_dir = self.output_dir / "reports"
+        self.report_dir.mkdir(exist_ok=True)
+        # Reports downloaded on earlier runs; in incremental mode they are skipped
+        self.incremental = incremental
+        self.manifest = ReportManifest(self.output_dir / "manifest.json")
+
+        # One WebDriver per browser worker thread
+        self.browser_workers = browser_workers
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+        # Downloads share one pooled session, with a cap on requests per host
+        self.session = self._create_session(download_workers)
+        self._download_pool = ThreadPoolExecutor(
+            max_workers=download_workers, thread_name_prefix="pdf-download"
+        )
+        self.per_host_limit = per_host_limit
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+        # Wall time per scraping step, reported at the end of a run
+        self.timer = StepTimer()
+        if self.browser_workers <= 1:
+            # Sequential runs scrape on this thread; parallel workers start
+            # their own browsers on first use instead
+            self._setup_selenium()
+
+    @property
+    def driver(self):
+        """WebDriver of the calling thread, started on first use."""
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            self._setup_selenium()
+            driver = self._local.driver
+        return driver
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        """Limit concurrent requests to the host of ``url``."""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+        with slot:
+            yield
 
     def _setup_selenium(self):
         try:
@@ -60,25 +216,31 @@ class CSEScraper:
                 service = Service()
             else:
                 service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            with self.timer.step("browser_start"):
+                driver = webdriver.Chrome(service=service, options=chrome_options)
+            self._local.driver = driver
+            with self._drivers_lock:
+                self._drivers.append(driver)
             logger.info("Successfully initialized Chrome WebDriver")
 
             # Navigate to base URL and handle consent
-            self.driver.get(self.BASE_URL)
-            time.sleep(3)  # Wait for page to load
+            with self.timer.step("base_page_load"):
+                driver.get(self.BASE_URL)
+                self._wait_for_page_ready(driver)
 
+            consent_locator = (
+                By.XPATH,
+                "//p[contains(@class, 'fc-button-label') and text()='Consent']",
+            )
             try:
-                consent_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (
-                            By.XPATH,
-                            "//p[contains(@class, 'fc-button-label') and text()='Consent']",
-                        )
+                with self.timer.step("consent"):
+                    consent_button = self._wait(driver).until(
+                        EC.element_to_be_clickable(consent_locator)
                     )
-                )
-                consent_button.click()
-                logger.info("Successfully clicked consent button")
-                time.sleep(2)  # Wait for consent to be processed
+                    consent_button.click()
+                    logger.info("Successfully clicked consent button")
+                    # Wait for consent to be processed
+                    self._wait(driver).until(EC.invisibility_of_element_located(consent_locator))
             except TimeoutException:
                 logger.warning("Consent button not found or not clickable")
 
@@ -86,6 +248,24 @@ class CSEScraper:
             logger.error(f"Error setting up Selenium: {str(e)}")
             raise
 
+    def _wait(self, driver=None, timeout: Optional[float] = None) -> WebDriverWait:
+        return WebDriverWait(driver or self.driver, timeout or self.WAIT_TIMEOUT, poll_frequency=0.1)
+
+    def _wait_for_page_ready(self, driver=None):
+        """Wait until the document has loaded and its network traffic has settled."""
+        wait = self._wait(driver)
+        wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+        try:
+            wait.until(network_idle())
+        except TimeoutException:
+            logger.warning("Network did not go idle, continuing")
+
+    def _find_report_rows(self):
+        rows = self.driver.find_elements(By.XPATH, ACTIVE_TAB_ROWS_XPATH)
+        if not rows:
+            rows = self.driver.find_elements(By.XPATH, "//tr")
+        return rows
+
     def _get_company_url(self, symbol: str) -> str:
         return f"{self.BASE_URL}?symbol={symbol}"
 
@@ -101,7 +281,9 @@ class CSEScraper:
 
     def _click_financials_tab(self):
         try:
-            time.sleep(3)
+            self._wait().until(
+                EC.presence_of_element_located((By.XPATH, FINANCIALS_TAB_XPATH))
+            )
             active_tab = self.driver.find_elements(
                 By.XPATH,
                 "//a[contains(@class, 'active') and contains(text(), 'Financials')]",
@@ -109,15 +291,20 @@ class CSEScraper:
             if active_tab:
                 logger.info("Financials tab is already active.")
                 return True
-            financials_tab = self.driver.find_element(
-                By.XPATH, "//a[contains(text(), 'Financials')]"
-            )
+            financials_tab = self.driver.find_element(By.XPATH, FINANCIALS_TAB_XPATH)
             self.driver.execute_script(
                 "arguments[0].scrollIntoView(true);", financials_tab
             )
-            time.sleep(1)
-            financials_tab.click()
-            time.sleep(2)
+            self._wait().until(EC.element_to_be_clickable(financials_tab)).click()
+            # The tab is ready once it is active or its sub-tabs have rendered
+            self._wait().until(
+                EC.any_of(
+                    EC.presence_of_element_located(
+                        (By.XPATH, "//a[contains(@class, 'active') and contains(text(), 'Financials')]")
+                    ),
+                    EC.presence_of_element_located((By.XPATH, QUARTERLY_REPORTS_TAB_XPATH)),
+                )
+            )
             logger.info("Clicked Financials tab.")
             return True
         except Exception as e:
@@ -126,27 +313,33 @@ class CSEScraper:
 
     def _click_quarterly_reports_tab(self):
         try:
-            qr_tab = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        "//button[contains(text(), 'Quarterly Reports')] | //div[contains(@class, 'tab') and contains(text(), 'Quarterly Reports')] | //a[contains(text(), 'Quarterly Reports')]",
-                    )
-                )
+            qr_tab = self._wait().until(
+                EC.element_to_be_clickable((By.XPATH, QUARTERLY_REPORTS_TAB_XPATH))
             )
             self.driver.execute_script("arguments[0].scrollIntoView(true);", qr_tab)
-            time.sleep(1)
-            qr_tab.click()
-            time.sleep(2)
+            self._wait().until(EC.element_to_be_clickable(qr_tab)).click()
+            try:
+                # Ready once the report table shows its PDF links
+                self._wait().until(
+                    EC.presence_of_element_located((By.XPATH, ACTIVE_TAB_PDF_XPATH))
+                )
+            except TimeoutException:
+                logger.warning("No report links appeared after opening Quarterly Reports tab")
             logger.info("Clicked Quarterly Reports tab.")
             return True
         except Exception as e:
             logger.error(f"Error clicking Quarterly Reports tab: {str(e)}")
             return False
 
-    def _get_quarterly_report_links(self) -> List[Tuple[str, str]]:
+    def _get_quarterly_report_links(self, known_urls: Optional[Set[str]] = None) -> List[Tuple[str, str]]:
+        """
+        Collect (report date, PDF URL) pairs from the report table.
+
+        With ``known_urls``, pagination stops after the first page containing
+        an already-seen report, since the table lists the newest reports first.
+        """
         try:
-            WebDriverWait(self.driver, 10).until(
+            self._wait().until(
                 EC.presence_of_element_located(
                     (
                         By.XPATH,
@@ -154,24 +347,15 @@ class CSEScraper:
                     )
                 )
             )
-            rows = self.driver.find_elements(
-                By.XPATH,
-                "//div[contains(@class, 'tab-pane') and contains(@class, 'active')]//tr",
-            )
-            if not rows:
-                rows = self.driver.find_elements(By.XPATH, "//tr")
+            rows = self._find_report_rows()
             reports = []
             now = datetime.now()
             years_ago = now.replace(year=now.year - self.YEARS_TO_LOOK_BACK)
             
-            # Add pagination handling if needed
-            try:
-                next_button = self.driver.find_element(By.XPATH, "//button[contains(@class, 'next') or contains(text(), 'Next')]")
-                has_next = True
-            except:
-                has_next = False
+            next_xpath = "//button[contains(@class, 'next') or contains(text(), 'Next')]"
 
             while True:
+                reached_known = False
                 for row in rows:
                     try:
                         date_cell = row.find_element(By.XPATH, ".//td[1]")
@@ -186,22 +370,25 @@ class CSEScraper:
                             continue
                         if pdf_url and report_date and report_date >= years_ago:
                             reports.append((report_date_str, pdf_url))
+                        if known_urls and pdf_url in known_urls:
+                            reached_known = True
                     except Exception:
                         continue
 
-                if not has_next:
+                # Add pagination handling if needed
+                next_buttons = self.driver.find_elements(By.XPATH, next_xpath)
+                if not next_buttons or not next_buttons[0].is_enabled():
+                    break
+                if reached_known:
+                    logger.info("Reached already downloaded reports, not paginating further.")
                     break
 
                 try:
-                    next_button.click()
-                    time.sleep(self.request_delay)  # Wait for new page to load
-                    rows = self.driver.find_elements(
-                        By.XPATH,
-                        "//div[contains(@class, 'tab-pane') and contains(@class, 'active')]//tr",
-                    )
-                    if not rows:
-                        rows = self.driver.find_elements(By.XPATH, "//tr")
-                except:
+                    with self.timer.step("pagination"):
+                        next_buttons[0].click()
+                        # Wait for the table to re-render with the next page
+                        rows = self._wait().until(table_rows_changed(rows, self._find_report_rows))
+                except Exception:
                     break
 
             if not reports:
@@ -220,122 +407,191 @@ class CSEScraper:
             return []
 
     def _download_pdf(self, url: str, filename: str) -> bool:
+        """
+        Download a report and save its income statement page, plus the full
+        report for the text search.
+
+        The PDF is streamed into one spooled buffer (in memory, spilling to an
+        anonymous temp file for large reports) and parsed once for both the
+        quarter-end date and the required page.
+        The per-host slot is held only while the body is downloading.
+        """
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                # Create a temporary file to store the full PDF
-                temp_full_pdf = self.pdf_dir / f"temp_full_{filename}"
-                with open(temp_full_pdf, "wb") as f:
-                    f.write(response.content)
-
-                # Extract date from the full PDF first
-                company_code = filename.split("_")[0]
-                date_str = self._extract_quarter_end_date_from_pdf(temp_full_pdf)
-
-                if not date_str:
-                    # If date extraction fails, use current timestamp as fallback
-                    date_str = datetime.now().strftime("%Y_%m_%d")
-                    logger.warning(
-                        f"Could not extract date from PDF, using current date: {date_str}"
-                    )
+            # Revalidate reports we already have instead of downloading them again
+            headers = self.manifest.conditional_headers(url, self.pdf_dir, self.report_dir)
+            with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as buffer:
+                with self._host_slot(url), self.session.get(
+                    url, headers=headers, stream=True, timeout=self.DOWNLOAD_TIMEOUT
+                ) as response:
+                    if response.status_code == 304:
+                        logger.info(f"Not modified since last download: {url}")
+                        self.manifest.record(url)
+                        return True
+                    if response.status_code != 200:
+                        logger.error(f"Unexpected status {response.status_code} downloading {url}")
+                        return False
 
-                # Extract only the required page based on company
-                required_page = 3 if company_code == "DIPD" else 4
+                    # Stream the full PDF into the buffer, hashing it on the way
+                    digest = hashlib.sha256()
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        digest.update(chunk)
+                        buffer.write(chunk)
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+
+                # Parsing and writing happen after the slot is released, so
+                # they don't hold up other downloads from the same host
+                content_hash = digest.hexdigest()
+                entry = self.manifest.get(url)
+                if (
+                    entry
+                    and entry.get("sha256") == content_hash
+                    and self.manifest.is_known(url, self.pdf_dir, self.report_dir)
+                ):
+                    logger.info(f"Content unchanged since last download: {url}")
+                    self.manifest.record(url, etag=etag, last_modified=last_modified)
+                    return True
+
+                buffer.seek(0)
+                return self._save_statement_page(
+                    PdfReader(buffer), buffer, url, filename, content_hash, etag, last_modified
+                )
+        except Exception as e:
+            logger.error(f"Error downloading PDF {filename}: {str(e)}")
+            return False
 
-                try:
-                    from PyPDF2 import PdfReader, PdfWriter
-
-                    # Read the full PDF
-                    reader = PdfReader(str(temp_full_pdf))  # Convert Path to string
-
-                    # Check if the required page exists
-                    if len(reader.pages) >= required_page:
-                        # Create a new PDF with only the required page
-                        writer = PdfWriter()
-                        writer.add_page(
-                            reader.pages[required_page - 1]
-                        )  # -1 because pages are 0-indexed
-
-                        # Save the single-page PDF with the extracted date
-                        final_filename = f"{company_code}_{date_str}.pdf"
-                        filepath = self.pdf_dir / final_filename
-                        with open(filepath, "wb") as f:
-                            writer.write(f)
-
-                        logger.info(
-                            f"Downloaded and extracted page {required_page} from PDF: {final_filename}"
-                        )
+    def _save_statement_page(
+        self,
+        reader: PdfReader,
+        buffer: BinaryIO,
+        url: str,
+        filename: str,
+        content_hash: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> bool:
+        # Extract date from the full PDF first
+        company_code = filename.split("_")[0]
+        date_str = self._extract_quarter_end_date(reader, filename)
+
+        if not date_str:
+            # If date extraction fails, use current timestamp as fallback
+            date_str = datetime.now().strftime("%Y_%m_%d")
+            logger.warning(
+                f"Could not extract date from PDF, using current date: {date_str}"
+            )
 
-                        # Clean up temporary file
-                        if temp_full_pdf.exists():
-                            temp_full_pdf.unlink()
-                        return True
-                    else:
-                        logger.error(
-                            f"PDF {filename} doesn't have enough pages. Required page {required_page} not found."
-                        )
-                        if temp_full_pdf.exists():
-                            temp_full_pdf.unlink()
-                        return False
+        # Extract only the required page based on company
+        required_page = 3 if company_code == "DIPD" else 4
 
-                except Exception as e:
-                    logger.error(f"Error processing PDF {filename}: {str(e)}")
-                    if temp_full_pdf.exists():
-                        temp_full_pdf.unlink()
-                    return False
+        try:
+            # Check if the required page exists
+            if len(reader.pages) < required_page:
+                logger.error(
+                    f"PDF {filename} doesn't have enough pages. Required page {required_page} not found."
+                )
+                return False
+
+            # Create a new PDF with only the required page
+            writer = PdfWriter()
+            writer.add_page(
+                reader.pages[required_page - 1]
+            )  # -1 because pages are 0-indexed
+
+            # Save the single-page PDF with the extracted date
+            final_filename = f"{company_code}_{date_str}.pdf"
+            filepath = self.pdf_dir / final_filename
+            tmp_path = filepath.with_suffix(".pdf.tmp")
+            with open(tmp_path, "wb") as f:
+                writer.write(f)
+            os.replace(tmp_path, filepath)
+
+            # Keep the whole report too, under the same name
+            report_path = self.report_dir / final_filename
+            tmp_path = report_path.with_suffix(".pdf.tmp")
+            buffer.seek(0)
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(buffer, f)
+            os.replace(tmp_path, report_path)
+
+            logger.info(
+                f"Downloaded and extracted page {required_page} from PDF: {final_filename}"
+            )
+            self.manifest.record(
+                url,
+                date=date_str,
+                sha256=content_hash,
+                output=final_filename,
+                etag=etag,
+                last_modified=last_modified,
+            )
+            return True
 
-            return False
         except Exception as e:
-            logger.error(f"Error downloading PDF {filename}: {str(e)}")
+            logger.error(f"Error processing PDF {filename}: {str(e)}")
             return False
 
-    def _extract_quarter_end_date_from_pdf(self, pdf_path: Path) -> str:
+    def _extract_quarter_end_date(self, reader: PdfReader, source: str) -> Optional[str]:
         try:
-            if not pdf_path.exists():
-                logger.error(f"PDF file does not exist: {pdf_path}")
+            if not reader.pages:
                 return None
 
-            with open(pdf_path, "rb") as file:
-                import PyPDF2
-
-                pdf_reader = PyPDF2.PdfReader(file)
-                if not pdf_reader.pages:
-                    return None
-
-                # Try to find date in first few pages
-                for page_num in range(min(3, len(pdf_reader.pages))):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text() or ""
-
-                    # Try multiple patterns to match different date formats
-                    patterns = [
-                        r"(?:ended|as at|for the period ended)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
-                        r"(?:quarter|period)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
-                        r"(?:as at|as of)[^\n\d]*(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",
-                        r"(\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+\d{4})",  # Fallback to any date
-                    ]
-
-                    for pattern in patterns:
-                        match = re.search(pattern, text, re.IGNORECASE)
-                        if match:
-                            date_str = match.group(1)
-                            # Clean up the date string
-                            date_str = re.sub(r"(st|nd|rd|th)", "", date_str)
-                            try:
-                                dt = date_parser.parse(date_str, fuzzy=True)
-                                return dt.strftime("%Y_%m_%d")
-                            except Exception:
-                                continue
-
-                logger.warning(f"Could not extract date from PDF {pdf_path}")
-                return None
+            # Try to find date in first few pages
+            for page_num in range(min(3, len(reader.pages))):
+                page = reader.pages[page_num]
+                text = page.extract_text() or ""
+
+                # Try multiple patterns to match different date formats
+                for pattern in self.DATE_PATTERNS:
+                    match = pattern.search(text)
+                    if match:
+                        date_str = match.group(1)
+                        # Clean up the date string
+                        date_str = re.sub(r"(st|nd|rd|th)", "", date_str)
+                        try:
+                            dt = date_parser.parse(date_str, fuzzy=True)
+                            return dt.strftime("%Y_%m_%d")
+                        except Exception:
+                            continue
+
+            logger.warning(f"Could not extract date from PDF {source}")
+            return None
 
         except Exception as e:
             logger.error(
-                f"Error extracting quarter end date from PDF {pdf_path}: {str(e)}"
+                f"Error extracting quarter end date from PDF {source}: {str(e)}"
             )
             return None
 
+    def _process_report(self, company_code: str, report_date: str, pdf_url: str) -> None:
+        try:
+            # Try to parse the date from the report_date string first
+            try:
+                dt = date_parser.parse(report_date, fuzzy=True)
+                date_str = dt.strftime("%Y_%m_%d")
+            except Exception:
+                date_str = datetime.now().strftime("%Y_%m_%d")
+                logger.warning(
+                    f"Could not parse date from {report_date}, using current date"
+                )
+
+            # Download and process the PDF
+            self.manifest.record(pdf_url, company=company_code, report_date=report_date)
+            with self.timer.step("pdf_download"):
+                downloaded = self._download_pdf(pdf_url, f"{company_code}_{date_str}.pdf")
+            if downloaded:
+                logger.info(
+                    f"Successfully processed PDF for {company_code} dated {date_str}"
+                )
+            else:
+                logger.error(
+                    f"Failed to process PDF for {company_code} dated {date_str}"
+                )
+        except Exception as e:
+            logger.error(
+                f"Error processing report for {company_code}: {str(e)}"
+            )
+
     def scrape_company_data(self, company_code: str) -> None:
         symbol = self.COMPANIES.get(company_code)
         if not symbol:
@@ -343,65 +599,118 @@ class CSEScraper:
         url = self._get_company_url(symbol)
         logger.info(f"Scraping data for {company_code} from {url}")
         try:
-            self.driver.get(url)
-            time.sleep(2)
-            if not self._click_financials_tab():
-                logger.error(f"Could not access Financials tab for {company_code}")
-                return
-            if not self._click_quarterly_reports_tab():
-                logger.error(
-                    f"Could not access Quarterly Reports tab for {company_code}"
-                )
-                return
-            reports = self._get_quarterly_report_links()
+            with self.timer.step("company_page_load"):
+                self.driver.get(url)
+                self._wait_for_page_ready()
+            with self.timer.step("financials_tab"):
+                if not self._click_financials_tab():
+                    logger.error(f"Could not access Financials tab for {company_code}")
+                    return
+            with self.timer.step("quarterly_reports_tab"):
+                if not self._click_quarterly_reports_tab():
+                    logger.error(
+                        f"Could not access Quarterly Reports tab for {company_code}"
+                    )
+                    return
+            known_urls = None
+            if self.incremental:
+                known_urls = self.manifest.known_urls(self.pdf_dir, self.report_dir)
+            with self.timer.step("report_links"):
+                reports = self._get_quarterly_report_links(known_urls)
             if not reports:
                 logger.error(f"No quarterly reports found for {company_code}")
                 return
-            for report_date, pdf_url in reports:
-                try:
-                    # Try to parse the date from the report_date string first
-                    try:
-                        dt = date_parser.parse(report_date, fuzzy=True)
-                        date_str = dt.strftime("%Y_%m_%d")
-                    except Exception:
-                        date_str = datetime.now().strftime("%Y_%m_%d")
-                        logger.warning(
-                            f"Could not parse date from {report_date}, using current date"
-                        )
-
-                    # Download and process the PDF
-                    if self._download_pdf(pdf_url, f"{company_code}_{date_str}.pdf"):
-                        logger.info(
-                            f"Successfully processed PDF for {company_code} dated {date_str}"
-                        )
-                    else:
-                        logger.error(
-                            f"Failed to process PDF for {company_code} dated {date_str}"
-                        )
-                except Exception as e:
-                    logger.error(
-                        f"Error processing report for {company_code}: {str(e)}"
-                    )
-                    continue
+            if known_urls:
+                new_reports = [(date, url) for date, url in reports if url not in known_urls]
+                logger.info(
+                    f"{len(reports) - len(new_reports)} of {len(reports)} reports already downloaded for {company_code}"
+                )
+                reports = new_reports
+            # Download this company's PDFs in parallel on the shared download pool
+            futures = [
+                self._download_pool.submit(self._process_report, company_code, report_date, pdf_url)
+                for report_date, pdf_url in reports
+            ]
+            for future in as_completed(futures):
+                future.result()
         except Exception as e:
             logger.error(f"Error scraping data for {company_code}: {str(e)}")
             raise
+        finally:
+            self.manifest.save()
 
     def scrape_all_companies(self):
-        for company_code in tqdm(self.COMPANIES.keys(), desc="Scraping companies"):
+        start = time.perf_counter()
+        try:
+            self._scrape_companies()
+        finally:
+            logger.info(
+                f"Scraping took {time.perf_counter() - start:.1f}s. Time per step:\n{self.timer.report()}"
+            )
+
+    def _scrape_companies(self):
+        if self.browser_workers <= 1:
+            for company_code in tqdm(self.COMPANIES.keys(), desc="Scraping companies"):
+                try:
+                    self.scrape_company_data(company_code)
+                except Exception as e:
+                    logger.error(f"Failed to scrape {company_code}: {str(e)}")
+            return
+
+        # Each worker thread drives its own browser; downloads go to the shared pool
+        with ThreadPoolExecutor(
+            max_workers=self.browser_workers, thread_name_prefix="browser"
+        ) as pool:
+            futures = {
+                pool.submit(self.scrape_company_data, company_code): company_code
+                for company_code in self.COMPANIES
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Scraping companies"):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to scrape {futures[future]}: {str(e)}")
+
+    def close(self):
+        """Stop the download pool and quit every browser."""
+        self._download_pool.shutdown(wait=True)
+        self.session.close()
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
             try:
-                self.scrape_company_data(company_code)
+                driver.quit()
             except Exception as e:
-                logger.error(f"Failed to scrape {company_code}: {str(e)}")
+                logger.warning(f"Error quitting WebDriver: {str(e)}")
 
     def __del__(self):
-        if hasattr(self, "driver"):
-            self.driver.quit()
-
+        if hasattr(self, "_drivers"):
+            self.close()
 
 def main():
-    scraper = CSEScraper()
-    scraper.scrape_all_companies()
+    parser = argparse.ArgumentParser(description="Download quarterly reports from the CSE website")
+    parser.add_argument("--output-dir", default="data/raw", help="Directory for downloaded reports")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only download reports not already in the manifest",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Browser workers scraping companies in parallel")
+    parser.add_argument("--download-workers", type=int, default=4, help="Concurrent PDF downloads")
+    parser.add_argument("--per-host-limit", type=int, default=4, help="Concurrent downloads per host")
+    args = parser.parse_args()
+
+    scraper = CSEScraper(
+        args.output_dir,
+        incremental=args.incremental,
+        browser_workers=args.workers,
+        download_workers=args.download_workers,
+        per_host_limit=args.per_host_limit,
+    )
+    try:
+        scraper.scrape_all_companies()
+    finally:
+        scraper.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+"""
+Wall-time profile of scraper steps.
+
+Wrap each step in ``with timer.step("name"):`` and call ``timer.report()`` at
+the end of a run to see where the time goes.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StepTimer:
+    """Collects durations per named step; safe to use from several threads."""
+
+    def __init__(self):
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._durations[name].append(elapsed)
+
+    def summary(self) -> List[Dict]:
+        """Per-step count, total, mean and max seconds, slowest total first."""
+        with self._lock:
+            items = [(name, list(durations)) for name, durations in self._durations.items()]
+        rows = [
+            {
+                "step": name,
+                "count": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "max": max(durations),
+            }
+            for name, durations in items
+        ]
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def report(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "No steps timed."
+        width = max(len(row["step"]) for row in rows)
+        lines = [f"{'step'.ljust(width)}  count   total(s)  mean(s)  max(s)"]
+        for row in rows:
+            lines.append(
+                f"{row['step'].ljust(width)}  {row['count']:5d}  {row['total']:9.2f}"
+                f"  {row['mean']:7.2f}  {row['max']:6.2f}"
+            )
+        return "\n".join(lines)
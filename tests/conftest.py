@@ -0,0 +1,62 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+# The backend is imported as the ``app`` package; the processor scripts
+# import their sibling modules directly
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT / "scripts" / "processor"))
+
+
+def make_frame(rows, version=1):
+    """Frame built from (symbol, year, quarter, metrics) rows."""
+    from app.services.financial_frame import FinancialFrame
+
+    return FinancialFrame.from_reports(
+        [
+            ((symbol, year, quarter), {"year": year, "quarter": quarter, "financial_metrics": metrics})
+            for symbol, year, quarter, metrics in rows
+        ],
+        version=version,
+    )
+
+
+def write_report(data_dir: Path, name: str, year: str, quarter: str, **metrics) -> Path:
+    """Write a processed report JSON the way the extractor does."""
+    path = Path(data_dir) / name
+    with open(path, "w") as f:
+        json.dump({"year": year, "quarter": quarter, "financial_metrics": metrics}, f)
+    return path
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "jsons"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def serve(data_dir, monkeypatch):
+    """
+    Start the companies API on ``data_dir``. Each call is like a fresh
+    worker process: a new DataService and an empty response cache.
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routers import companies
+    from app.services.data_service import DataService
+    from app.services.response_cache import response_cache
+
+    def start():
+        monkeypatch.setattr(companies, "data_service", DataService(data_dir))
+        response_cache.clear()
+        app = FastAPI()
+        app.include_router(companies.router, prefix="/api")
+        return TestClient(app)
+
+    return start
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from app.services.analytics import parse_filters, parse_quarter
+from app.services.data_service import DataService
+from app.services.financial_frame import parse_period
+
+from conftest import write_report
+
+
+@pytest.fixture
+def service(data_dir):
+    write_report(data_dir, "AAA_2024_Q1.json", "2024", "Q1", revenue=100, net_income=10)
+    write_report(data_dir, "BBB_2024_Q1.json", "2024", "Q1", revenue=100, net_income=30)
+    write_report(data_dir, "CCC_2024_Q1.json", "2024", "Q1", revenue=300, net_income=-5)
+    write_report(data_dir, "DDD_2024_Q1.json", "2024", "Q1", revenue=50)
+    write_report(data_dir, "AAA_2023_Q4.json", "2023", "Q4", revenue=90, net_income=9)
+    return DataService(data_dir)
+
+
+def ranked(ranking):
+    return [(company.symbol, company.value) for company in ranking.companies]
+
+
+def test_parse_quarter_rejects_bare_years():
+    assert parse_quarter("2024-Q2") == parse_period("2024-Q2")
+    with pytest.raises(ValueError):
+        parse_quarter("2024")
+
+
+def test_parse_filters():
+    assert parse_filters(["net_margin>0.1", "revenue_yoy >= -1e-3"]) == [
+        ("net_margin", ">", 0.1),
+        ("revenue_yoy", ">=", -0.001),
+    ]
+    with pytest.raises(ValueError):
+        parse_filters(["net_margin=0.1"])
+
+
+def test_rank_breaks_ties_by_symbol_in_both_directions(service):
+    descending = service.rank_companies("revenue")
+    assert descending.period == "2024-Q1"
+    assert ranked(descending) == [("CCC", 300), ("AAA", 100), ("BBB", 100), ("DDD", 50)]
+    ascending = service.rank_companies("revenue", order="asc")
+    assert ranked(ascending) == [("DDD", 50), ("AAA", 100), ("BBB", 100), ("CCC", 300)]
+
+
+def test_rank_limit_and_explicit_period(service):
+    ranking = service.rank_companies("net_income", period="2023-Q4", limit=1)
+    assert ranking.total == 1
+    assert ranked(ranking) == [("AAA", 9)]
+    assert ranked(service.rank_companies("net_income", limit=2)) == [("BBB", 30), ("AAA", 10)]
+
+
+def test_screen_applies_every_filter(service):
+    result = service.screen_companies(["revenue>=100", "net_margin>0"], sort="net_margin")
+    assert [company.symbol for company in result.companies] == ["BBB", "AAA"]
+    assert result.companies[0].metrics == {"revenue": 100.0, "net_margin": 0.3}
+
+
+def test_screen_sort_ties_follow_symbol_order(service):
+    result = service.screen_companies(["revenue<=100"], sort="revenue")
+    assert [company.symbol for company in result.companies] == ["AAA", "BBB", "DDD"]
+
+
+def test_aggregates_match_numpy(service):
+    (revenue,) = service.get_metric_aggregates(["revenue"], percentiles=[10, 90])
+    values = [100, 100, 300, 50]
+    assert revenue.period == "2024-Q1"
+    assert revenue.count == 4
+    assert revenue.mean == pytest.approx(np.mean(values))
+    assert (revenue.min, revenue.max) == (50, 300)
+    assert revenue.median == pytest.approx(np.median(values))
+    assert revenue.percentiles == {
+        "p10": pytest.approx(np.percentile(values, 10)),
+        "p90": pytest.approx(np.percentile(values, 90)),
+    }
+
+
+def test_aggregates_of_unreported_metrics_are_empty(service):
+    # The default call covers every reported field, including ones no company files
+    aggregates = {result.metric: result for result in service.get_metric_aggregates()}
+    empty = aggregates["share_of_profit_equity_investee"]
+    assert empty.period == "2024-Q1"
+    assert empty.count == 0
+    assert empty.mean is None and empty.median is None
+    assert set(empty.percentiles.values()) == {None}
+    assert aggregates["revenue"].count == 4
+
+
+def test_empty_store(data_dir):
+    service = DataService(data_dir)
+    (revenue,) = service.get_metric_aggregates(["revenue"])
+    assert (revenue.period, revenue.count) == (None, 0)
+    assert service.rank_companies("revenue").companies == []
+
+
+def test_unknown_metrics_are_rejected(service):
+    with pytest.raises(ValueError):
+        service.get_metric_aggregates(["not_a_metric"])
+    with pytest.raises(ValueError):
+        service.rank_companies("revenue", order="up")
+
+
+def test_new_quarter_keeps_older_indexes(service, data_dir):
+    service.rank_companies("revenue", period="2023-Q4")
+    old_index = service.analytics._indexes[parse_period("2023-Q4")]
+    write_report(data_dir, "BBB_2024_Q2.json", "2024", "Q2", revenue=120, net_income=12)
+    service.store.refresh(force=True)
+    assert ranked(service.rank_companies("revenue")) == [("BBB", 120)]
+    assert service.analytics._indexes[parse_period("2023-Q4")] is old_index
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.derived_metrics import DERIVED_FIELDS, DerivedMetricsEngine
+
+from conftest import make_frame
+
+
+def column(frame, symbol, name):
+    return frame.columns[name][frame.rows(symbol)].tolist()
+
+
+QUARTERS = [("2023", "Q1"), ("2023", "Q2"), ("2023", "Q3"), ("2023", "Q4"), ("2024", "Q1")]
+
+
+def dipd_rows():
+    return [
+        ("DIPD", year, quarter, {
+            "revenue": 100 + 10 * i,
+            "gross_profit": 40,
+            "other_income": 5,
+            "distribution_costs": -10,
+            "administrative_expenses": -5,
+            "profit_before_tax": 20,
+            "tax_expense": -5,
+            "net_income": 15,
+        })
+        for i, (year, quarter) in enumerate(QUARTERS)
+    ]
+
+
+@pytest.fixture
+def frame():
+    frame = make_frame(dipd_rows() + [("REXP", "2024", "Q1", {"revenue": 0, "net_income": 1})])
+    DerivedMetricsEngine().apply(frame, {"DIPD": 1, "REXP": 1})
+    return frame
+
+
+def test_every_derived_column_is_added(frame):
+    assert set(DERIVED_FIELDS) <= set(frame.columns)
+
+
+def test_operating_income_is_calculated(frame):
+    # 40 + 5 - 10 - 5
+    assert column(frame, "DIPD", "operating_income") == [30] * 5
+
+
+def test_ratios(frame):
+    assert column(frame, "DIPD", "gross_margin")[0] == pytest.approx(0.4)
+    assert column(frame, "DIPD", "effective_tax_rate")[0] == pytest.approx(0.25)
+    # Division by zero revenue gives a missing value, not inf
+    assert math.isnan(column(frame, "REXP", "net_margin")[0])
+
+
+def test_growth_uses_the_same_company(frame):
+    qoq = column(frame, "DIPD", "revenue_qoq")
+    assert math.isnan(qoq[0])
+    assert qoq[1] == pytest.approx(0.1)
+    yoy = column(frame, "DIPD", "revenue_yoy")
+    assert all(math.isnan(v) for v in yoy[:4])
+    assert yoy[4] == pytest.approx(40 / 100)
+    assert math.isnan(column(frame, "REXP", "revenue_qoq")[0])
+
+
+def test_ttm_needs_four_quarters(frame):
+    ttm = column(frame, "DIPD", "revenue_ttm")
+    assert all(math.isnan(v) for v in ttm[:3])
+    assert ttm[3:] == [100 + 110 + 120 + 130, 110 + 120 + 130 + 140]
+
+
+def test_gaps_are_not_bridged():
+    frame = make_frame([
+        ("DIPD", "2023", "Q1", {"revenue": 100}),
+        ("DIPD", "2023", "Q3", {"revenue": 120}),
+    ])
+    DerivedMetricsEngine().apply(frame, {"DIPD": 1})
+    assert all(math.isnan(v) for v in column(frame, "DIPD", "revenue_qoq"))
+
+
+def test_only_changed_companies_are_recomputed(caplog):
+    engine = DerivedMetricsEngine()
+    engine.apply(make_frame(dipd_rows() + [("REXP", "2024", "Q1", {"revenue": 0})]), {"DIPD": 1, "REXP": 1})
+    changed = make_frame(dipd_rows() + [("REXP", "2024", "Q1", {"revenue": 50, "net_income": 5})], version=2)
+    with caplog.at_level("INFO"):
+        engine.apply(changed, {"DIPD": 1, "REXP": 2})
+    assert "for 1 of 2 companies" in caplog.text
+    assert column(changed, "REXP", "net_margin") == [pytest.approx(0.1)]
+    assert np.allclose(column(changed, "DIPD", "operating_income"), [30] * 5)
@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.document_service import DocumentService, content_hash, report_to_document
+
+from conftest import write_report
+
+
+@pytest.fixture
+def service(tmp_path):
+    return DocumentService(persist_dir=tmp_path / "chroma", embedding_backend="local")
+
+
+@pytest.fixture
+def reports(data_dir):
+    return [
+        write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=1000, net_income=100),
+        write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=500, net_income=-20),
+    ]
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": {"c": 2}}) == content_hash({"b": {"c": 2}, "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_report_to_document():
+    document = report_to_document(
+        {"year": 2024, "quarter": "Q1", "financial_metrics": {"revenue": 1234567, "eps_basic": 1.5}}, "DIPD"
+    )
+    assert document.id == "DIPD_2024_Q1"
+    assert "Revenue: LKR 1,234,567" in document.text
+    assert "EPS (basic): LKR 1.50" in document.text
+    assert "Net income: not reported" in document.text
+    assert document.metadata["year"] == "2024"
+
+
+def test_files_are_indexed_once(service, reports):
+    stats = service.index_files(reports)
+    assert (stats.files, stats.indexed, stats.skipped, stats.failed) == (2, 2, 0, 0)
+
+    stats = service.index_files(reports)
+    assert (stats.indexed, stats.skipped) == (0, 2)
+
+    stats = service.index_files(reports, force=True)
+    assert (stats.indexed, stats.skipped) == (2, 0)
+
+
+def test_changed_report_is_reindexed(service, reports, data_dir):
+    service.index_files(reports)
+    write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=600, net_income=-20)
+
+    stats = service.index_files(reports)
+    assert (stats.indexed, stats.skipped) == (1, 1)
+    assert "LKR 600" in service.collection.get(ids=["REXP_2024_Q1"])["documents"][0]
+
+
+def test_unreadable_files_fail(service, reports, data_dir):
+    broken = data_dir / "ACME_2024_03_31.json"
+    broken.write_text("{")
+    stats = service.index_files(reports + [broken])
+    assert (stats.files, stats.indexed, stats.failed) == (3, 2, 1)
+
+
+def test_search(service, reports):
+    assert service.search("revenue") == []
+    service.index_files(reports)
+
+    results = service.search("DIPD quarterly income statement", k=1)
+    assert results[0]["id"] == "DIPD_2024_Q1"
+    assert results[0]["metadata"]["symbol"] == "DIPD"
+
+    results = service.search("income statement", where={"symbol": "REXP"})
+    assert [r["id"] for r in results] == ["REXP_2024_Q1"]
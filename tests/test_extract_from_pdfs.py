@@ -0,0 +1,164 @@
+import asyncio
+import itertools
+import json
+import threading
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import extract_from_pdfs
+from extract_from_pdfs import process_pdfs, process_pdfs_concurrently
+from extraction_cache import ExtractionCache
+from manual_data_extractor import LocalExtraction
+from stub_openai_server import STUB_RESULT, StubHandler, ThreadingHTTPServer
+
+FILES = [f"{symbol}_{date}.pdf" for symbol in ("DIPD", "REXP") for date in ("2023_12_31", "2024_03_31", "2024_06_30")]
+
+
+class CountingHandler(StubHandler):
+    """Stub endpoint that records how many requests it served, and how many at once."""
+
+    latency = 0.1
+    counter = itertools.count(1)
+    requests = 0
+    active = 0
+    peak = 0
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            super().do_POST()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    handler = type("Handler", (CountingHandler,), {"counter": itertools.count(1), "lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    for name in FILES:
+        writer = PdfWriter()
+        writer.add_blank_page(width=200, height=200)
+        # Distinct bytes per file, so each has its own content hash
+        writer.add_metadata({"/Title": name})
+        with open(directory / name, "wb") as f:
+            writer.write(f)
+    return directory
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record backoff delays instead of sleeping through them."""
+    recorded = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(extract_from_pdfs.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def run(pdf_dir, output_dir, cache=None, concurrency=2):
+    asyncio.run(
+        process_pdfs_concurrently(
+            str(pdf_dir), str(output_dir), concurrency=concurrency, workers=1, cache=cache, min_confidence=None
+        )
+    )
+
+
+def outputs(output_dir):
+    return {path.name: json.loads(path.read_text()) for path in output_dir.iterdir()}
+
+
+def test_concurrent_pipeline_extracts_every_pdf(stub, pdf_dir, tmp_path, delays):
+    output_dir = tmp_path / "jsons"
+    run(pdf_dir, output_dir)
+
+    saved = outputs(output_dir)
+    assert sorted(saved) == sorted(name.replace(".pdf", ".json") for name in FILES)
+    # Quarter and year come from the file name, the figures from the model
+    assert saved["REXP_2024_06_30.json"]["quarter"] == "Q2"
+    assert saved["DIPD_2023_12_31.json"]["year"] == "2023"
+    assert saved["DIPD_2023_12_31.json"]["financial_metrics"] == STUB_RESULT["financial_metrics"]
+    assert stub.requests == len(FILES)
+    assert delays == []
+
+
+def test_requests_in_flight_are_bounded(stub, pdf_dir, tmp_path, delays):
+    # Slow enough that text extraction for the next files finishes meanwhile
+    stub.latency = 0.3
+    run(pdf_dir, tmp_path / "jsons", concurrency=2)
+    assert stub.peak == 2
+
+
+def test_rate_limited_requests_are_retried(stub, pdf_dir, tmp_path, delays):
+    stub.rate_limit_every = 3
+    output_dir = tmp_path / "jsons"
+    run(pdf_dir, output_dir)
+
+    assert len(outputs(output_dir)) == len(FILES)
+    assert all("error" not in result for result in outputs(output_dir).values())
+    # The stub's Retry-After header sets the delay
+    assert delays and set(delays) == {1.0}
+    assert stub.requests == len(FILES) + len(delays)
+
+
+def test_cached_pdfs_are_not_sent_again(stub, pdf_dir, tmp_path, delays):
+    cache_dir = tmp_path / "cache"
+    output_dir = tmp_path / "jsons"
+    run(pdf_dir, output_dir, ExtractionCache(str(cache_dir)))
+    assert stub.requests == len(FILES)
+
+    # Unchanged PDFs are skipped
+    run(pdf_dir, output_dir, ExtractionCache(str(cache_dir)))
+    assert stub.requests == len(FILES)
+
+    # Lost outputs are rebuilt from the cached results, keyed by content
+    for path in output_dir.iterdir():
+        path.unlink()
+    (pdf_dir / FILES[0]).rename(pdf_dir / "DIPD_Q4-2023.pdf")
+    run(pdf_dir, output_dir, ExtractionCache(str(cache_dir)))
+    assert stub.requests == len(FILES)
+    assert outputs(output_dir)["DIPD_Q4-2023.json"]["quarter"] == "Q4"
+
+
+def confident_extraction(pdf_path):
+    return LocalExtraction(result={"financial_metrics": {"revenue": 1}}, confidence=1.0)
+
+
+def test_local_extractions_need_no_api_key(monkeypatch, pdf_dir, tmp_path):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    # Inherited by the forked text extraction workers too
+    monkeypatch.setattr(extract_from_pdfs, "extract_financials", confident_extraction)
+    output_dir = tmp_path / "jsons"
+
+    process_pdfs(str(pdf_dir), str(output_dir))
+    assert len(outputs(output_dir)) == len(FILES)
+
+    for path in output_dir.iterdir():
+        path.unlink()
+    asyncio.run(process_pdfs_concurrently(str(pdf_dir), str(output_dir), workers=1))
+    assert len(outputs(output_dir)) == len(FILES)
@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.data_service import DataService
+from app.services.financial_frame import format_period, optional_float, parse_period, period_ordinal
+
+from conftest import make_frame, write_report
+
+
+@pytest.fixture
+def frame():
+    return make_frame([
+        ("REXP", "2024", "Q1", {"revenue": 30}),
+        ("DIPD", "2024", "Q1", {"revenue": 120, "net_income": None}),
+        ("DIPD", "2023", "Q4", {"revenue": 110}),
+        ("DIPD", "2023", "Q3", {"revenue": "bad"}),
+    ], version=3)
+
+
+def test_period_ordinals_are_consecutive():
+    assert period_ordinal("2024", "Q1") - period_ordinal("2023", "Q4") == 1
+    assert period_ordinal("2024", "Q5") == -1
+
+
+@pytest.mark.parametrize("value, end, expected", [
+    ("2024-Q2", False, "2024-Q2"),
+    ("2024q2", False, "2024-Q2"),
+    ("2024", False, "2024-Q1"),
+    ("2024", True, "2024-Q4"),
+])
+def test_parse_period(value, end, expected):
+    assert format_period(parse_period(value, end=end)) == expected
+
+
+def test_parse_period_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_period("last year")
+
+
+def test_rows_are_sorted_by_symbol_and_period(frame):
+    assert frame.company_symbols() == ["DIPD", "REXP"]
+    assert [format_period(p) for p in frame.periods[frame.rows("DIPD")]] == ["2023-Q3", "2023-Q4", "2024-Q1"]
+    assert frame.version == 3
+
+
+def test_rows_limits_period_range(frame):
+    rows = frame.rows("DIPD", parse_period("2023-Q4"), parse_period("2024", end=True))
+    assert frame.columns["revenue"][rows].tolist() == [110, 120]
+    assert frame.rows("NOPE") == slice(0, 0)
+
+
+def test_missing_and_invalid_values_are_nan(frame):
+    rows, columns = frame.select("DIPD", metrics=["revenue", "net_income"])
+    assert math.isnan(columns["revenue"][0])
+    assert all(math.isnan(v) for v in columns["net_income"])
+
+
+def test_to_reports_maps_nan_to_none(frame):
+    report = frame.to_reports(frame.rows("REXP"))[0]
+    assert (report.year, report.quarter) == ("2024", "Q1")
+    assert report.financial_metrics.revenue == 30
+    assert report.financial_metrics.net_income is None
+    assert report.derived_metrics is None
+
+
+def test_year_filter_matches_the_year_label(data_dir):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    write_report(data_dir, "DIPD_2024_06_30.json", "2024", "H1", revenue=210)
+    write_report(data_dir, "DIPD_2023_12_31.json", "2023", "Q4", revenue=90)
+    service = DataService(data_dir)
+    # Quarters outside Q1-Q4 stay in their year, as with the per-file filter
+    assert [r.quarter for r in service.get_company_financials("DIPD", "2024")] == ["H1", "Q1"]
+    # An unknown year is an empty result, not an error
+    assert service.get_company_financials("DIPD", "abc") == []
+
+
+def test_optional_float():
+    assert optional_float(float("nan")) is None
+    assert optional_float(np.float64(1.5)) == 1.5 and type(optional_float(np.float64(1.5))) is float
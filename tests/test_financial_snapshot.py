@@ -0,0 +1,42 @@
+import os
+
+from conftest import write_report
+
+from app.services.data_service import DataService
+from app.services.financial_snapshot import FrameReports, compile_snapshot, load_snapshot
+
+
+def test_snapshot_round_trip(data_dir):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100, net_income=None)
+    write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=50.5)
+    frame, files = load_snapshot(compile_snapshot(data_dir))
+    assert frame.company_symbols() == ["DIPD", "REXP"]
+    assert frame.columns["revenue"].tolist() == [100, 50.5]
+    assert files["REXP_2024_03_31.json"][1] == ("REXP", "2024", "Q1")
+
+
+def test_store_is_seeded_lazily(data_dir):
+    for i in range(3):
+        write_report(data_dir, f"C{i}_2024_03_31.json", "2024", "Q1", revenue=i)
+    compile_snapshot(data_dir)
+    service = DataService(data_dir)
+    reports = service.store._reports
+    assert isinstance(reports, FrameReports)
+    # Serving from the snapshot does not build any report dicts
+    assert service.get_company_financials("C1")[0].financial_metrics.revenue == 1
+    assert reports._overlay == {}
+    assert service.store.get("C2", "2024", "Q1")["financial_metrics"]["revenue"] == 2
+    assert list(reports._overlay) == [("C2", "2024", "Q1")]
+
+
+def test_changes_after_the_snapshot_overlay_it(data_dir):
+    write_report(data_dir, "C0_2024_03_31.json", "2024", "Q1", revenue=1)
+    stale = write_report(data_dir, "C1_2024_03_31.json", "2024", "Q1", revenue=2)
+    compile_snapshot(data_dir)
+    os.remove(stale)
+    write_report(data_dir, "C0_2024_06_30.json", "2024", "Q2", revenue=3)
+    service = DataService(data_dir)
+    assert service.store.version == 2
+    assert not service.has_company("C1")
+    assert sorted(service.store._reports) == [("C0", "2024", "Q1"), ("C0", "2024", "Q2")]
+    assert [r.financial_metrics.revenue for r in service.get_company_financials("C0")] == [1, 3]
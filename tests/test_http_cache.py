@@ -0,0 +1,60 @@
+from email.utils import formatdate
+
+from conftest import write_report
+
+
+def test_unchanged_files_keep_their_etag_across_restarts(data_dir, serve):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    etag = serve().get("/api/companies/DIPD/financials").headers["ETag"]
+    response = serve().get("/api/companies/DIPD/financials", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_changed_files_invalidate_the_etag_after_a_restart(data_dir, serve):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    etag = serve().get("/api/companies/DIPD/financials").headers["ETag"]
+    # Same number of files and refreshes, so the in-process versions match
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=123456)
+    response = serve().get("/api/companies/DIPD/financials", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["financial_metrics"]["revenue"] == 123456
+
+
+def test_other_companies_keep_their_etag(data_dir, serve):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=50)
+    client = serve()
+    dipd = client.get("/api/companies/DIPD/financials").headers["ETag"]
+    companies = client.get("/api/companies").headers["ETag"]
+    write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=55555)
+    client = serve()
+    assert client.get("/api/companies/DIPD/financials", headers={"If-None-Match": dipd}).status_code == 304
+    assert client.get("/api/companies", headers={"If-None-Match": companies}).status_code == 200
+
+
+def test_if_modified_since(data_dir, serve):
+    path = write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    client = serve()
+    response = client.get("/api/companies")
+    assert response.headers["Last-Modified"] == formatdate(int(path.stat().st_mtime), usegmt=True)
+    since = {"If-Modified-Since": response.headers["Last-Modified"]}
+    assert client.get("/api/companies", headers=since).status_code == 304
+    older = {"If-Modified-Since": formatdate(path.stat().st_mtime - 3600, usegmt=True)}
+    assert client.get("/api/companies", headers=older).status_code == 200
+
+
+def test_not_modified_response_has_no_body(data_dir, serve):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    client = serve()
+    etag = client.get("/api/companies").headers["ETag"]
+    response = client.get("/api/companies", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert "max-age" in response.headers["Cache-Control"]
+
+
+def test_unknown_company_is_not_found(data_dir, serve):
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    assert serve().get("/api/companies/NOPE/financials").status_code == 404
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from conftest import write_report
+
+
+@pytest.fixture
+def llm_service(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    from app.services import llm_service
+
+    monkeypatch.setattr(llm_service, "_fast_answer", lambda message: "DIPD revenue for Q1 2024: LKR 100")
+
+    def failing_save(self, message, response):
+        # e.g. the tokenizer download failing while offline
+        raise ConnectionError("could not fetch cl100k_base")
+
+    monkeypatch.setattr(llm_service.session_store.get("s1").__class__, "save", failing_save)
+    return llm_service
+
+
+def test_history_save_failure_keeps_the_answer(llm_service):
+    answer = asyncio.run(llm_service.get_llm_response("DIPD revenue Q1 2024", "s1"))
+    assert answer == "DIPD revenue for Q1 2024: LKR 100"
+
+
+def test_history_save_failure_still_sends_done(llm_service):
+    async def collect():
+        return [event async for event in llm_service.stream_llm_response("DIPD revenue Q1 2024", "s1")]
+
+    events = asyncio.run(collect())
+    assert events[-1] == {"type": "done", "response": "DIPD revenue for Q1 2024: LKR 100"}
+
+
+class FakeAgent:
+    """Numbers its answers, so a reused answer is easy to spot."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        return {"output": f"answer {len(self.calls)}"}
+
+
+@pytest.fixture
+def agent_service(llm_service, monkeypatch, data_dir):
+    from app.services.answer_cache import AnswerCache
+    from app.services.data_service import DataService
+    from app.services.session_memory import ChatSession, SessionMemoryStore
+
+    write_report(data_dir, "DIPD_2024_03_31.json", "2024", "Q1", revenue=100)
+    write_report(data_dir, "REXP_2024_03_31.json", "2024", "Q1", revenue=50)
+    monkeypatch.setattr(llm_service, "data_service", DataService(data_dir))
+    monkeypatch.setattr(llm_service, "fast_path_enabled", True)
+    monkeypatch.setattr(llm_service, "_fast_answer", lambda message: None)
+    monkeypatch.setattr(llm_service, "agent_executor", FakeAgent())
+    monkeypatch.setattr(llm_service, "answer_cache", AnswerCache())
+    monkeypatch.setattr(llm_service, "session_store", SessionMemoryStore(llm_service.llm))
+    # Plain in-memory history instead of the token-counted buffer
+    monkeypatch.setattr(ChatSession, "save", lambda self, message, response: self.__dict__.setdefault("turns", []).append(message))
+    monkeypatch.setattr(ChatSession, "history", lambda self: list(self.__dict__.get("turns", [])))
+    return llm_service
+
+
+def ask(service, message, session_id):
+    return asyncio.run(service.get_llm_response(message, session_id))
+
+
+def test_follow_ups_are_not_shared_between_sessions(agent_service):
+    ask(agent_service, "Tell me about DIPD", "a")
+    first = ask(agent_service, "and for REXP?", "a")
+    ask(agent_service, "What does REXP export?", "b")
+    second = ask(agent_service, "and for REXP?", "b")
+    assert len(agent_service.agent_executor.calls) == 4
+    assert second != first
+
+
+def test_self_contained_questions_are_shared(agent_service):
+    first = ask(agent_service, "Tell me about DIPD", "a")
+    assert ask(agent_service, "Tell me about DIPD", "b") == first
+    ask(agent_service, "What does REXP export?", "c")
+    # A fully stated question may be shared even within a conversation
+    stated = ask(agent_service, "REXP revenue in Q1 2024", "c")
+    assert ask(agent_service, "REXP revenue in Q1 2024", "d") == stated
+    assert len(agent_service.agent_executor.calls) == 3
@@ -0,0 +1,127 @@
+import pytest
+
+from manual_data_extractor import (
+    _drop_note_refs,
+    detect_period,
+    extract_from_text,
+    find_value_column,
+    match_label,
+    score_confidence,
+    split_line_into_columns,
+)
+
+HEADER = [
+    "DIPPED PRODUCTS PLC",
+    "STATEMENT OF PROFIT OR LOSS",
+    "Group",
+    "03 months to 31.03.2024 03 months to 31.03.2023 Change % "
+    "12 months to 31.03.2024 12 months to 31.03.2023 Change %",
+    "Rs. '000 Rs. '000 Rs. '000 Rs. '000",
+]
+
+LINES = [
+    "Revenue 5 10,000 8,000 25 40,000 32,000 25",
+    "Cost of sales (6,000) (5,000) 20 (24,000) (20,000) 20",
+    "Gross profit 4,000 3,000 33 16,000 12,000 33",
+    "Finance income 50 40 25 200 160 25",
+    "Profit before tax 2,000 1,500 33 8,000 6,000 33",
+    "Income tax expense (500) (375) 33 (2,000) (1,500) 33",
+    "Profit for the period 1,500 1,125 33 6,000 4,500 33",
+    "Basic earnings per share 6 1.25 0.94 33 5.00 3.75 33",
+]
+
+
+def statement(header=HEADER, lines=LINES):
+    return "\n".join(header + lines)
+
+
+def test_split_line_into_columns():
+    assert split_line_into_columns("Cost of sales ( 1,234) 5 ,678 12.5") == {
+        "text": "Cost of sales",
+        "numbers": ["-1234", "5678", "12.5"],
+    }
+    assert split_line_into_columns("31.03.2024 31.03.2023") is None
+
+
+def test_match_label_prefers_specific_labels():
+    assert match_label("Revenue from contracts with customers") == "revenue"
+    assert match_label("Diluted  Earnings per share") == "eps_diluted"
+    assert match_label("Earnings per share") == "eps_basic"
+    assert match_label("Net assets per share") is None
+
+
+@pytest.mark.parametrize("numbers, columns, expected", [
+    (["5", "10000", "8000"], 2, ["10000", "8000"]),
+    # As many numbers as columns: the leading small amount is a value
+    (["50", "40", "25"], 3, ["50", "40", "25"]),
+    # At most one note reference is dropped
+    (["5", "12", "100", "80"], 2, ["12", "100", "80"]),
+    # Without a header there is no column count to compare against
+    (["5", "100", "80"], 0, ["5", "100", "80"]),
+    (["500", "100", "80"], 2, ["500", "100", "80"]),
+])
+def test_drop_note_refs(numbers, columns, expected):
+    assert _drop_note_refs(numbers, columns) == expected
+
+
+def test_find_value_column_reads_the_header():
+    column = find_value_column(HEADER + LINES)
+    assert (column.index, column.count, column.found) == (0, 6, True)
+
+
+def test_find_value_column_skips_company_columns():
+    header = ["Company", "12 months 03 months", "Group", "12 months 03 months"]
+    column = find_value_column(header + LINES)
+    assert (column.index, column.count, column.found) == (3, 4, True)
+
+
+def test_find_value_column_falls_back_without_a_quarter_column():
+    column = find_value_column(["Group", "12 months to 31.03.2024 12 months to 31.03.2023"] + LINES)
+    assert (column.index, column.count, column.found) == (0, 2, False)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("For the quarter ended 31.03.2024", {"quarter": "Q1", "year": "2024"}),
+    ("Interim statements as at 31st December 2023", {"quarter": "Q4", "year": "2023"}),
+    ("Issued on 15.05.2024 for the period ended September 30, 2024", {"quarter": "Q3", "year": "2024"}),
+    ("No dates here", {}),
+])
+def test_detect_period(text, expected):
+    assert detect_period(text) == expected
+
+
+def test_extract_from_text():
+    extraction = extract_from_text(statement())
+    metrics = extraction.result["financial_metrics"]
+    assert extraction.result["quarter"] == "Q1" and extraction.result["year"] == "2024"
+    assert metrics["revenue"] == 10_000_000
+    assert metrics["cost_of_goods_sold"] == -6_000_000
+    assert metrics["finance_income"] == 50_000
+    assert metrics["net_income"] == 1_500_000
+    assert metrics["eps_basic"] == 1.25
+    assert extraction.confidence == 1.0
+
+
+def test_misaligned_lines_lower_confidence():
+    lines = LINES[:-2] + ["Profit for the period 1,500 1,125"]
+    extraction = extract_from_text(statement(lines=lines))
+    assert extraction.result["financial_metrics"]["net_income"] == 1_500_000
+    assert extraction.confidence == pytest.approx(6 / 7, abs=1e-3)
+
+
+def test_fallback_column_lowers_confidence():
+    header = ["Group", "12 months to 31.03.2024 12 months to 31.03.2023 Change %"]
+    lines = [line.split(" 25 ")[0] for line in LINES]
+    extraction = extract_from_text(statement(header, lines))
+    assert extraction.confidence <= 0.5
+
+
+def test_score_confidence_checks_the_statement_adds_up():
+    metrics = {
+        "revenue": 100, "cost_of_goods_sold": -60, "gross_profit": 40,
+        "profit_before_tax": 20, "tax_expense": -5, "net_income": 15,
+    }
+    assert score_confidence(metrics) == 1.0
+    assert score_confidence({**metrics, "net_income": 50_000}) == 0.75
+    assert score_confidence({"revenue": 100}) == pytest.approx(1 / 6, abs=1e-3)
+    assert score_confidence(metrics, column_found=False) == 0.5
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.offload import BlockingOffload
+
+
+class Gate:
+    """Blocking function that counts its calls and waits until released."""
+
+    def __init__(self, result="ok"):
+        self.result = result
+        self.calls = 0
+        self.released = threading.Event()
+
+    def __call__(self, *args):
+        self.calls += 1
+        assert self.released.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return (self.result, args)
+
+
+async def until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+async def coalesce(offload, gate, callers=10):
+    tasks = [asyncio.ensure_future(offload.run_once("key", gate, "arg")) for _ in range(callers)]
+    await until(lambda: gate.calls == 1)
+    assert offload.in_flight == 1
+    gate.released.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_concurrent_callers_share_one_call():
+    offload = BlockingOffload()
+    gate = Gate()
+
+    async def main():
+        results = await coalesce(offload, gate)
+        assert offload.in_flight == 0
+        return results
+
+    assert asyncio.run(main()) == [("ok", ("arg",))] * 10
+    assert gate.calls == 1
+
+
+def test_concurrent_callers_share_the_exception():
+    offload = BlockingOffload()
+    error = ValueError("bad report")
+    gate = Gate(result=error)
+
+    results = asyncio.run(coalesce(offload, gate))
+    assert gate.calls == 1
+    assert all(result is error for result in results)
+
+
+def test_finished_key_runs_again():
+    offload = BlockingOffload()
+    gate = Gate()
+    gate.released.set()
+
+    async def main():
+        await offload.run_once("key", gate)
+        await offload.run_once("key", gate)
+
+    asyncio.run(main())
+    assert gate.calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    offload = BlockingOffload()
+    gate = Gate()
+
+    async def main():
+        first = asyncio.ensure_future(offload.run_once("key", gate))
+        second = asyncio.ensure_future(offload.run_once("key", gate))
+        await until(lambda: gate.calls == 1)
+        first.cancel()
+        gate.released.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("ok", ())
+    assert gate.calls == 1
+
+
+def test_worker_threads_are_bounded():
+    offload = BlockingOffload(max_threads=2)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(offload.run(work) for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services.data_service import DataService
+from app.services.query_router import ParsedQuery, answer_query, parse_query, try_fast_answer
+
+from conftest import write_report
+
+SYMBOLS = ["DIPD", "REXP"]
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("What was REXP net income in Q2 2023?", ParsedQuery(["REXP"], ["net_income"], "2023", "Q2")),
+    ("DIPD revenue, fourth quarter of 2024", ParsedQuery(["DIPD"], ["revenue"], "2024", "Q4")),
+    ("dipd revenue q4-2024", ParsedQuery(["DIPD"], ["revenue"], "2024", "Q4")),
+    ("Dipped Products gross profit for 2024", ParsedQuery(["DIPD"], ["gross_profit"], "2024")),
+    ("Show me DIPD's latest EPS", ParsedQuery(["DIPD"], ["eps_basic"])),
+    (
+        "Compare DIPD and REXP revenue for 2024",
+        ParsedQuery(["DIPD", "REXP"], ["revenue"], "2024", compare=True),
+    ),
+    (
+        "Richard Pieris Exports gross profit and net profit in Q1 2024",
+        ParsedQuery(["REXP"], ["gross_profit", "net_income"], "2024", "Q1"),
+    ),
+])
+def test_structured_questions_are_parsed(message, expected):
+    assert parse_query(message, SYMBOLS) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "DIPD revenue last 4 quarters",
+    "DIPD revenue for the first half of 2024",
+    "REXP net income for the 9 months ended December 2023",
+    "DIPD revenue yoy change in Q4 2024",
+    "REXP profit margins",
+    "DIPD revenue for FY 2024",
+    "DIPD revenue in Q4",
+    "DIPD revenue in 2023 and 2024",
+    "Why did DIPD revenue fall in 2024?",
+    "Should I invest in REXP?",
+    "What is the revenue of ACME in 2024?",
+])
+def test_qualified_or_open_ended_questions_go_to_the_agent(message):
+    assert parse_query(message, SYMBOLS) is None
+
+
+@pytest.fixture
+def service(data_dir):
+    for quarter, revenue in (("Q1", 100), ("Q2", 110), ("Q3", 120), ("Q4", 130)):
+        write_report(data_dir, f"DIPD_2024_{quarter}.json", "2024", quarter, revenue=revenue)
+    write_report(data_dir, "REXP_2024_Q4.json", "2024", "Q4", revenue=90)
+    return DataService(data_dir)
+
+
+def test_quarter_answer(service):
+    answer = try_fast_answer("DIPD revenue in the fourth quarter of 2024", service)
+    assert answer.splitlines()[0] == "DIPD revenue for Q4 2024: LKR 130"
+
+
+def test_year_answer_lists_quarters_and_total(service):
+    answer = answer_query(ParsedQuery(["DIPD"], ["revenue"], "2024"), service)
+    assert "- Q3 2024: LKR 120" in answer
+    assert "- Total: LKR 460" in answer
+
+
+def test_comparison_names_the_leader(service):
+    answer = try_fast_answer("Compare DIPD and REXP revenue in Q4 2024", service)
+    assert "DIPD had the higher revenue, by LKR 40 over REXP." in answer
+
+
+def test_missing_period_is_reported(service):
+    answer = answer_query(ParsedQuery(["REXP"], ["revenue"], "2023"), service)
+    assert answer == "No financial data is available for REXP for 2023."
+
+
+def test_unparsed_questions_fall_through(service):
+    assert try_fast_answer("DIPD revenue last 4 quarters", service) is None
+
+
+def test_comparison_over_different_quarters_has_no_verdict(service):
+    # DIPD reported all of 2024, REXP only Q4
+    answer = try_fast_answer("Compare DIPD and REXP revenue for 2024", service)
+    assert "- Total: LKR 460" in answer
+    assert "- Total: LKR 90 (1 quarter reported)" in answer
+    assert "had the higher" not in answer
+    assert "The revenue figures cover different quarters, so they are not ranked." in answer
+
+
+def test_latest_quarter_comparison_needs_the_same_quarter(data_dir):
+    write_report(data_dir, "DIPD_2024_Q4.json", "2024", "Q4", revenue=130)
+    write_report(data_dir, "REXP_2024_Q1.json", "2024", "Q1", revenue=90)
+    answer = try_fast_answer("Compare DIPD and REXP revenue", DataService(data_dir))
+    assert "DIPD revenue for Q4 2024: LKR 130" in answer
+    assert "REXP revenue for Q1 2024: LKR 90" in answer
+    assert "had the higher" not in answer
@@ -0,0 +1,118 @@
+import pytest
+
+from app.services.report_text import ReportTextIndex, chunk_text, report_period
+
+
+def write_pdf(path, pages):
+    """Minimal PDF with one line of Helvetica text per entry of ``pages`` ("" for a blank page)."""
+    count = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(count)), count
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET" if text else ""
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ReportTextIndex(persist_dir=tmp_path / "chroma", embedding_backend="local")
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    write_pdf(directory / "DIPD_2024_03_31.pdf", ["Glove exports to Europe grew strongly", "Outlook for latex prices"])
+    write_pdf(directory / "REXP_2024_06_30.pdf", ["Coir fibre mattresses and brushes"])
+    return directory
+
+
+def test_report_period():
+    assert report_period("DIPD_2024_09_30.pdf") == {"symbol": "DIPD", "year": "2024", "quarter": "Q3"}
+    assert report_period("DIPD_2024_08_31.pdf") is None
+    assert report_period("annual_report.pdf") is None
+
+
+def test_chunks_overlap_on_line_boundaries():
+    text = "\n".join(f"line {i} " + "x" * 40 for i in range(10))
+    chunks = chunk_text(text, chunk_size=200, overlap=100)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    # The last lines of a chunk start the next one
+    assert chunks[1].startswith(chunks[0].splitlines()[-2])
+
+
+def test_long_lines_are_split():
+    line = " ".join(f"word{i}" for i in range(500))
+    chunks = chunk_text(line, chunk_size=100, overlap=0)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks).split() == line.split()
+    # A single unbroken token is cut too
+    assert all(len(chunk) <= 100 for chunk in chunk_text("x" * 450, chunk_size=100, overlap=0))
+
+
+def test_pdfs_are_indexed_once(index, pdfs):
+    stats = index.index_pdfs(sorted(pdfs.iterdir()))
+    assert (stats.files, stats.indexed, stats.skipped, stats.failed) == (2, 2, 0, 0)
+    assert index.collection.count() == 3
+
+    stats = index.index_pdfs(sorted(pdfs.iterdir()))
+    assert (stats.indexed, stats.skipped) == (0, 2)
+
+
+def test_changed_pdf_replaces_its_chunks(index, pdfs):
+    index.index_pdfs(sorted(pdfs.iterdir()))
+    write_pdf(pdfs / "DIPD_2024_03_31.pdf", ["Glove exports to Europe grew strongly"])
+
+    stats = index.index_pdfs(sorted(pdfs.iterdir()))
+    assert (stats.indexed, stats.skipped) == (1, 1)
+    assert sorted(index.collection.get()["ids"]) == ["DIPD_2024_Q1_p1_0", "REXP_2024_Q2_p1_0"]
+
+
+def test_pdf_without_text_is_not_reread(index, pdfs):
+    write_pdf(pdfs / "SCAN_2024_12_31.pdf", [""])
+    stats = index.index_pdfs(sorted(pdfs.iterdir()))
+    assert (stats.indexed, stats.failed) == (2, 1)
+
+    stats = index.index_pdfs(sorted(pdfs.iterdir()))
+    assert (stats.indexed, stats.skipped, stats.failed) == (0, 3, 0)
+    # The placeholder is never returned as a passage
+    assert index.search_reports("no extractable text", symbol="SCAN") == []
+
+
+def test_unrecognised_file_names_fail(index, tmp_path):
+    stats = index.index_pdfs([write_pdf(tmp_path / "annual_report.pdf", ["text"])])
+    assert (stats.files, stats.failed) == (1, 1)
+
+
+def test_search_filters_by_symbol_and_period(index, pdfs):
+    index.index_pdfs(sorted(pdfs.iterdir()))
+
+    results = index.search_reports("glove exports", top_k=1)
+    assert results[0]["id"] == "DIPD_2024_Q1_p1_0"
+    assert "Glove exports to Europe" in results[0]["text"]
+
+    results = index.search_reports("glove exports", symbol="rexp")
+    assert [r["metadata"]["symbol"] for r in results] == ["REXP"]
+    assert index.search_reports("glove exports", symbol="DIPD", quarter="Q2") == []
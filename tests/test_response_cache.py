@@ -0,0 +1,125 @@
+import gzip
+import json
+
+import pytest
+
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import MIN_COMPRESS_SIZE, CachedBody, ResponseCache, encode_json
+
+from conftest import write_report
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResponseCache(max_bytes=30, compress=False)
+    for key in ("a", "b", "c"):
+        cache.put(key, 1, b"x" * 10)
+    assert cache.get("a", 1) is not None  # "a" is now the most recently used
+    cache.put("d", 1, b"x" * 10)
+    assert cache.get("b", 1) is None
+    assert [key for key in ("a", "c", "d") if cache.get(key, 1) is not None] == ["a", "c", "d"]
+
+
+def test_byte_budget_is_enforced():
+    cache = ResponseCache(max_bytes=25, compress=False)
+    cache.put("a", 1, b"x" * 10)
+    cache.put("b", 1, b"x" * 10)
+    cache.put("c", 1, b"x" * 10)
+    assert cache._size == 20
+    # Too large to keep at all: returned for this response, never cached
+    entry = cache.put("big", 1, b"x" * 26)
+    assert entry.identity == b"x" * 26
+    assert cache.get("big", 1) is None
+    assert cache._size == 20
+
+
+def test_replacing_an_entry_keeps_the_size_right():
+    cache = ResponseCache(max_bytes=100, compress=False)
+    cache.put("a", 1, b"x" * 10)
+    cache.put("a", 1, b"x" * 40)
+    assert cache._size == 40
+
+
+def test_new_data_version_drops_every_entry():
+    cache = ResponseCache(compress=False)
+    cache.put("a", 1, b"{}")
+    assert cache.get("a", 2) is None
+    assert cache._size == 0
+
+
+def test_compressed_copies_only_for_large_bodies():
+    cache = ResponseCache()
+    assert cache.put("small", 1, b"x" * (MIN_COMPRESS_SIZE - 1)).gzip is None
+    body = b"x" * MIN_COMPRESS_SIZE
+    assert gzip.decompress(cache.put("large", 1, body).gzip) == body
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=1.0, gzip;q=0.8", "br"),
+    ("gzip", "gzip"),
+    ("deflate", None),
+    ("", None),
+])
+def test_encoding_follows_accept_encoding(accept, expected):
+    entry = CachedBody(identity=b"identity", gzip=b"gzip", br=b"br")
+    body, encoding = entry.for_encoding(accept)
+    assert encoding == expected
+    assert body == (expected or "identity").encode()
+
+
+def test_brotli_is_skipped_when_not_available():
+    entry = CachedBody(identity=b"identity", gzip=b"gzip")
+    assert entry.for_encoding("br, gzip") == (b"gzip", "gzip")
+
+
+def test_encode_json_handles_models():
+    from app.models.financial import Company
+
+    payload = {"companies": [Company(symbol="DIPD", latest_year="2024", latest_quarter="Q1")]}
+    assert json.loads(encode_json(payload)) == {
+        "companies": [{"symbol": "DIPD", "latest_year": "2024", "latest_quarter": "Q1"}]
+    }
+
+
+@pytest.fixture
+def client(data_dir, serve):
+    # Enough quarters for the body to be worth compressing
+    for year in range(2015, 2025):
+        for quarter in ("Q1", "Q2", "Q3", "Q4"):
+            write_report(data_dir, f"DIPD_{year}_{quarter}.json", str(year), quarter, revenue=year * 10)
+    return serve()
+
+
+def test_endpoint_serves_gzip_when_accepted(client):
+    response = client.get("/api/companies/DIPD/financials", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert len(response.json()) == 40
+
+
+def test_endpoint_serves_identity_otherwise(client):
+    response = client.get("/api/companies/DIPD/financials", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert len(response.json()) == 40
+
+
+def test_endpoint_serves_brotli_when_available(client):
+    pytest.importorskip("brotli")
+    response = client.get("/api/companies/DIPD/financials", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["Content-Encoding"] == "br"
+
+
+def test_endpoint_builds_each_response_once(client, monkeypatch):
+    from app.routers import companies
+
+    calls = []
+    service = companies.data_service
+    original = service.get_company_financials
+    monkeypatch.setattr(service, "get_company_financials", lambda *args: calls.append(args) or original(*args))
+    first = client.get("/api/companies/DIPD/financials?year=2024")
+    second = client.get("/api/companies/DIPD/financials?year=2024")
+    assert first.content == second.content
+    assert len(calls) == 1
+    client.get("/api/companies/DIPD/financials?year=2023")
+    assert len(calls) == 2
+    assert response_cache_module.response_cache.get(first.headers["ETag"], service.version) is not None